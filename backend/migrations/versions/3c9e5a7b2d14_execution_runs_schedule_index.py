@@ -0,0 +1,30 @@
+"""index execution runs by (schedule_id, status)
+
+Listing the runs of a schedule, and the foreign-key check PostgreSQL
+performs on `execution_runs.schedule_id` when a schedule is deleted,
+both scanned the whole run history. The composite index turns them
+into range scans.
+
+Revision ID: 3c9e5a7b2d14
+Revises: b2e9c7d4f180
+Create Date: 2026-10-17 14:00:00.000000
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e5a7b2d14"
+down_revision: str | None = "b2e9c7d4f180"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_runs_schedule_status", "execution_runs", ["schedule_id", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_schedule_status", table_name="execution_runs")
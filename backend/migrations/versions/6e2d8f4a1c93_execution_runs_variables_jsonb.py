@@ -0,0 +1,43 @@
+"""store execution run variables as JSONB
+
+`execution_runs.variables` held a `json.dumps` string in a TEXT column.
+On PostgreSQL it becomes JSONB, so the driver hands back a dict and the
+column can be queried server-side. SQLite stores SQLAlchemy's JSON type
+as text already, so existing rows read back unchanged and this revision
+is a no-op there.
+
+Revision ID: 6e2d8f4a1c93
+Revises: 3c9e5a7b2d14
+Create Date: 2026-10-17 15:00:00.000000
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "6e2d8f4a1c93"
+down_revision: str | None = "3c9e5a7b2d14"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.alter_column(
+        "execution_runs", "variables",
+        existing_type=sa.Text(), type_=postgresql.JSONB(), existing_nullable=True,
+        postgresql_using="variables::jsonb",
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.alter_column(
+        "execution_runs", "variables",
+        existing_type=postgresql.JSONB(), type_=sa.Text(), existing_nullable=True,
+        postgresql_using="variables::text",
+    )
@@ -0,0 +1,30 @@
+"""add environments.docker_image_hash
+
+SHA-256 of the Dockerfile the environment's image was last built from;
+`build_docker_image` skips the build when it is unchanged and the image
+is still present.
+
+Revision ID: 8a1f3e6c5d20
+Revises: 6e2d8f4a1c93
+Create Date: 2026-10-17 16:00:00.000000
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a1f3e6c5d20"
+down_revision: str | None = "6e2d8f4a1c93"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("environments", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("docker_image_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("environments", schema=None) as batch_op:
+        batch_op.drop_column("docker_image_hash")
@@ -0,0 +1,52 @@
+"""composite index on environment_variables(environment_id, key)
+
+Adds ix_env_var_env_key for per-environment key lookups and the
+key-ordered variable listing. The single-column environment_id indexes
+on environment_variables and environment_packages are dropped: the new
+index and uq_env_pkg both lead with environment_id and cover them.
+
+Revision ID: a8d3f6c2e519
+Revises: e7c4a2b9d1f0
+Create Date: 2026-10-17 11:00:00.000000
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d3f6c2e519"
+down_revision: str | None = "e7c4a2b9d1f0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_env_var_env_key",
+        "environment_variables",
+        ["environment_id", "key"],
+    )
+    op.drop_index(
+        "ix_environment_variables_environment_id",
+        table_name="environment_variables",
+        if_exists=True,
+    )
+    op.drop_index(
+        "ix_environment_packages_environment_id",
+        table_name="environment_packages",
+        if_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_environment_packages_environment_id",
+        "environment_packages",
+        ["environment_id"],
+    )
+    op.create_index(
+        "ix_environment_variables_environment_id",
+        "environment_variables",
+        ["environment_id"],
+    )
+    op.drop_index("ix_env_var_env_key", table_name="environment_variables")
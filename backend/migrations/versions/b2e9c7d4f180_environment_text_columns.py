@@ -0,0 +1,43 @@
+"""store environment paths and index URLs as TEXT
+
+`venv_path`, `index_url` and `extra_index_url` were VARCHAR(500) while
+the API accepts them unbounded; a longer value surfaced as a database
+error on PostgreSQL. VARCHAR -> TEXT needs no table rewrite there.
+SQLite ignores declared lengths, so this revision is a no-op on it.
+
+Revision ID: b2e9c7d4f180
+Revises: a8d3f6c2e519
+Create Date: 2026-10-17 12:00:00.000000
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b2e9c7d4f180"
+down_revision: str | None = "a8d3f6c2e519"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_COLUMNS = ("venv_path", "index_url", "extra_index_url")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in _COLUMNS:
+        op.alter_column(
+            "environments", column,
+            existing_type=sa.String(500), type_=sa.Text(), existing_nullable=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in _COLUMNS:
+        op.alter_column(
+            "environments", column,
+            existing_type=sa.Text(), type_=sa.String(500), existing_nullable=True,
+        )
@@ -0,0 +1,37 @@
+"""add covering index for the users login lookup (PostgreSQL only)
+
+`get_auth_user_by_email` reads id, role, is_active and hashed_password
+by email; INCLUDE-ing those columns lets PostgreSQL answer it from the
+index alone. SQLite has no covering-index syntax and already has the
+unique `ix_users_email`, so this revision is a no-op there.
+
+Revision ID: e7c4a2b9d1f0
+Revises: f1a2b3c4d5e6
+Create Date: 2026-10-17 09:00:00.000000
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7c4a2b9d1f0"
+down_revision: str | None = "f1a2b3c4d5e6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_index(
+        "ix_users_email_login_covering",
+        "users",
+        ["email"],
+        postgresql_include=["id", "hashed_password", "is_active", "role"],
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_users_email_login_covering", table_name="users")
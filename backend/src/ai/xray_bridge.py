@@ -150,74 +150,10 @@ def xray_to_roboscope(xray_data: dict) -> dict:
             groups[set_key] = []
         groups[set_key].append(test)
 
-    test_sets: list[dict] = []
-    for group_key, group_tests in groups.items():
-        ts: dict = {
-            "name": group_key if group_key != "__default__" else "Imported Tests",
-            "description": "",
-            "tags": [],
-            "setup": None,
-            "teardown": None,
-            "test_cases": [],
-        }
-
-        if group_key != "__default__":
-            ts["external_id"] = group_key
-
-        for test in group_tests:
-            test_info = test.get("testInfo", {})
-            tc: dict = {
-                "name": test_info.get("summary", "Unnamed"),
-                "description": test_info.get("description", ""),
-                "priority": _map_xray_priority(test_info.get("priority", "Medium")),
-                "steps": [],
-                "expected_result": "",
-            }
-
-            # External ID
-            test_key = test.get("testKey")
-            if test_key:
-                tc["external_id"] = test_key
-
-            # Labels → tags (first test case sets test-set tags)
-            labels = test_info.get("labels", [])
-            if labels:
-                # Add unique labels to test set tags
-                for label in labels:
-                    if label not in ts["tags"]:
-                        ts["tags"].append(label)
-
-            # Preconditions
-            precondition = test_info.get("precondition", "")
-            if precondition:
-                tc["preconditions"] = [
-                    line.strip()
-                    for line in precondition.split("\n")
-                    if line.strip()
-                ]
-
-            # Steps
-            for step_data in test.get("steps", []):
-                fields = step_data.get("fields", {})
-                action = fields.get("Action", "")
-                data = fields.get("Data", "")
-                expected = fields.get("Expected Result", "")
-
-                if data or expected:
-                    # Structured step
-                    step_obj: dict = {"action": action}
-                    if data:
-                        step_obj["data"] = data
-                    if expected:
-                        step_obj["expected_result"] = expected
-                    tc["steps"].append(step_obj)
-                else:
-                    # Simple string step
-                    tc["steps"].append(action)
-
-            ts["test_cases"].append(tc)
-
-        test_sets.append(ts)
+    test_sets = [
+        _xray_group_to_ts(group_key, group_tests)
+        for group_key, group_tests in groups.items()
+    ]
 
     return {
         "version": "2",
@@ -226,6 +162,77 @@ def xray_to_roboscope(xray_data: dict) -> dict:
     }
 
 
+def _xray_group_to_ts(group_key: str, group_tests: list[dict]) -> dict:
+    """Build one .roboscope test set from a group of Xray tests."""
+    ts_tags: list[str] = []
+    ts: dict = {
+        "name": group_key if group_key != "__default__" else "Imported Tests",
+        "description": "",
+        "tags": ts_tags,
+        "setup": None,
+        "teardown": None,
+        "test_cases": [_xray_test_to_tc(test, ts_tags) for test in group_tests],
+    }
+    if group_key != "__default__":
+        ts["external_id"] = group_key
+    return ts
+
+
+def _xray_test_to_tc(test: dict, ts_tags: list[str]) -> dict:
+    """Convert one Xray test to a .roboscope test case.
+
+    Labels are merged (deduplicated) into ``ts_tags``, the owning test
+    set's tag list.
+    """
+    test_info = test.get("testInfo", {})
+    tc: dict = {
+        "name": test_info.get("summary", "Unnamed"),
+        "description": test_info.get("description", ""),
+        "priority": _map_xray_priority(test_info.get("priority", "Medium")),
+        "steps": [_xray_step(step_data) for step_data in test.get("steps", [])],
+        "expected_result": "",
+    }
+
+    # External ID
+    test_key = test.get("testKey")
+    if test_key:
+        tc["external_id"] = test_key
+
+    # Labels → test set tags
+    for label in test_info.get("labels", []):
+        if label not in ts_tags:
+            ts_tags.append(label)
+
+    # Preconditions
+    precondition = test_info.get("precondition", "")
+    if precondition:
+        tc["preconditions"] = list(
+            filter(None, (line.strip() for line in precondition.splitlines()))
+        )
+
+    return tc
+
+
+def _xray_step(step_data: dict) -> str | dict:
+    """Convert one Xray step to a simple string or structured step."""
+    fields = step_data.get("fields", {})
+    action = fields.get("Action", "")
+    data = fields.get("Data", "")
+    expected = fields.get("Expected Result", "")
+
+    if not (data or expected):
+        # Simple string step
+        return action
+
+    # Structured step
+    step_obj: dict = {"action": action}
+    if data:
+        step_obj["data"] = data
+    if expected:
+        step_obj["expected_result"] = expected
+    return step_obj
+
+
 def _map_xray_priority(priority: str) -> str:
     """Map Xray priority string to .roboscope priority."""
     mapping = {
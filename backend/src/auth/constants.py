@@ -28,6 +28,10 @@ ROLE_HIERARCHY = {
     Role.ADMIN: 3,
 }
 
+# Same levels keyed by the raw string stored on `User.role`, so hot-path
+# checks can skip the `Role(...)` lookup.
+ROLE_LEVEL: dict[str, int] = {role.value: level for role, level in ROLE_HIERARCHY.items()}
+
 # Error messages
 ERR_INVALID_CREDENTIALS = "Invalid email or password"
 ERR_INACTIVE_USER = "User account is inactive"
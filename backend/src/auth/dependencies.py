@@ -11,10 +11,11 @@ from src.auth.constants import (
     ERR_INSUFFICIENT_PERMISSIONS,
     ERR_TOKEN_INVALID,
     ROLE_HIERARCHY,
+    ROLE_LEVEL,
     Role,
 )
 from src.auth.models import User
-from src.auth.service import decode_token, get_user_by_id
+from src.auth.service import decode_token, get_cached_user, get_user_by_id
 from src.database import get_db
 
 security = HTTPBearer()
@@ -55,7 +56,7 @@ def get_current_user(
         )
 
     user_id = int(payload["sub"])
-    user = get_user_by_id(db, user_id)
+    user = get_cached_user(db, user_id)
 
     if user is None:
         raise HTTPException(
@@ -105,8 +106,8 @@ def _authenticate_api_token(token_str: str, db: Session) -> User:
 
     # Override user role with token's scoped role (may be more restrictive)
     # We create a transient copy with the token's role for this request
-    token_role_level = ROLE_HIERARCHY.get(Role(api_token.role), 0)
-    user_role_level = ROLE_HIERARCHY.get(Role(user.role), 0)
+    token_role_level = ROLE_LEVEL.get(api_token.role, 0)
+    user_role_level = ROLE_LEVEL.get(user.role, 0)
     effective_role = api_token.role if token_role_level <= user_role_level else user.role
 
     # Store effective role on request-scoped user object
@@ -122,12 +123,10 @@ def _authenticate_api_token(token_str: str, db: Session) -> User:
 
 def require_role(min_role: Role):
     """Dependency factory that requires a minimum role level."""
+    required_level = ROLE_LEVEL.get(min_role.value, 999)
 
     def role_checker(current_user: User = Depends(get_current_user)) -> User:
-        user_level = ROLE_HIERARCHY.get(Role(current_user.role), -1)
-        required_level = ROLE_HIERARCHY.get(min_role, 999)
-
-        if user_level < required_level:
+        if ROLE_LEVEL.get(current_user.role, -1) < required_level:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERR_INSUFFICIENT_PERMISSIONS,
@@ -148,6 +147,7 @@ def require_effective_role(min_role: Role):
     - 404 if `repo_id` is missing, non-int, or no such repository.
     - 403 if the effective role is below `min_role`.
     """
+    required_level = ROLE_LEVEL.get(min_role.value, 999)
 
     def check(
         request: Request,
@@ -177,8 +177,7 @@ def require_effective_role(min_role: Role):
         # team/project elevation. This preserves the existing rbs_… token
         # contract for CI/CD pipelines.
         if getattr(current_user, "_auth_via_api_token", False):
-            user_level = ROLE_HIERARCHY.get(Role(current_user.role), -1)
-            if user_level < ROLE_HIERARCHY.get(min_role, 999):
+            if ROLE_LEVEL.get(current_user.role, -1) < required_level:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=ERR_INSUFFICIENT_PERMISSIONS,
@@ -186,7 +185,7 @@ def require_effective_role(min_role: Role):
             return current_user
 
         er = effective_role(db, current_user, repo)
-        if ROLE_HIERARCHY.get(er, -1) < ROLE_HIERARCHY.get(min_role, 999):
+        if ROLE_HIERARCHY.get(er, -1) < required_level:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERR_INSUFFICIENT_PERMISSIONS,
@@ -204,6 +203,7 @@ def require_effective_role_for_run(min_role: Role):
     then reuses the same effective-role computation as
     `require_effective_role`. Story 3-8 migration entry point.
     """
+    required_level = ROLE_LEVEL.get(min_role.value, 999)
 
     def check(
         request: Request,
@@ -238,8 +238,7 @@ def require_effective_role_for_run(min_role: Role):
             )
 
         if getattr(current_user, "_auth_via_api_token", False):
-            user_level = ROLE_HIERARCHY.get(Role(current_user.role), -1)
-            if user_level < ROLE_HIERARCHY.get(min_role, 999):
+            if ROLE_LEVEL.get(current_user.role, -1) < required_level:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=ERR_INSUFFICIENT_PERMISSIONS,
@@ -247,7 +246,7 @@ def require_effective_role_for_run(min_role: Role):
             return current_user
 
         er = effective_role(db, current_user, repo)
-        if ROLE_HIERARCHY.get(er, -1) < ROLE_HIERARCHY.get(min_role, 999):
+        if ROLE_HIERARCHY.get(er, -1) < required_level:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERR_INSUFFICIENT_PERMISSIONS,
@@ -264,6 +263,7 @@ def require_effective_role_for_report(min_role: Role):
     Reads `report_id` from the path, joins report → run → repo, then
     reuses the effective-role computation. Story 3-9 migration entry.
     """
+    required_level = ROLE_LEVEL.get(min_role.value, 999)
 
     def check(
         request: Request,
@@ -312,8 +312,7 @@ def require_effective_role_for_report(min_role: Role):
             )
 
         if getattr(current_user, "_auth_via_api_token", False):
-            user_level = ROLE_HIERARCHY.get(Role(current_user.role), -1)
-            if user_level < ROLE_HIERARCHY.get(min_role, 999):
+            if ROLE_LEVEL.get(current_user.role, -1) < required_level:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=ERR_INSUFFICIENT_PERMISSIONS,
@@ -321,7 +320,7 @@ def require_effective_role_for_report(min_role: Role):
             return current_user
 
         er = effective_role(db, current_user, repo)
-        if ROLE_HIERARCHY.get(er, -1) < ROLE_HIERARCHY.get(min_role, 999):
+        if ROLE_HIERARCHY.get(er, -1) < required_level:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERR_INSUFFICIENT_PERMISSIONS,
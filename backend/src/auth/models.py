@@ -2,7 +2,17 @@
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, ForeignKey, LargeBinary, String, Text, UniqueConstraint, false, func
+from sqlalchemy import (
+    Boolean,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    false,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.auth.constants import Role
@@ -13,6 +23,21 @@ class User(Base, TimestampMixin):
     """User account model."""
 
     __tablename__ = "users"
+    # Fetch server-generated columns (created_at/updated_at) via RETURNING
+    # as part of the INSERT/UPDATE itself, so writers don't need a
+    # follow-up `refresh()` round-trip.
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # PostgreSQL covering index for the login lookup: the credential
+        # columns ride along in the leaf pages, so `get_auth_user_by_email`
+        # is an index-only scan. SQLite has no INCLUDE and would only get a
+        # duplicate of `ix_users_email`, so it is skipped there.
+        Index(
+            "ix_users_email_login_covering",
+            "email",
+            postgresql_include=["id", "hashed_password", "is_active", "role"],
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
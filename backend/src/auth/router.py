@@ -3,10 +3,12 @@
 import time
 from collections import defaultdict
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from src.auth.constants import ERR_INVALID_CREDENTIALS, ERR_TOKEN_INVALID, Role
+from src.utc_response import UtcJSONResponse
 
 # Simple in-memory rate limiter for login endpoint.
 # Tracks timestamps of failed attempts per IP. Allows MAX_ATTEMPTS in WINDOW_SECONDS.
@@ -39,7 +41,6 @@ from src.auth.schemas import (
     FirstLoginCompleteRequest,
     LoginRequest,
     MeResponse,
-    RefreshRequest,
     RegisterRequest,
     TeamSummary,
     TokenResponse,
@@ -48,14 +49,15 @@ from src.auth.schemas import (
 )
 from sqlalchemy import select
 from src.auth.service import (
-    authenticate_user,
+    authenticate_user_async,
+    count_users,
     create_token_response,
     create_user,
     decode_token,
     get_user_by_email,
     get_user_by_id,
     get_users,
-    hash_password,
+    hash_password_async,
     update_user,
 )
 from src.database import get_db
@@ -63,32 +65,51 @@ from src.database import get_db
 router = APIRouter()
 
 
+def _token_json(user: User) -> UtcJSONResponse:
+    """Serialize a freshly minted token pair straight to a response.
+
+    The values are built server-side, so returning a Response skips
+    FastAPI's outbound `response_model` re-validation and
+    `jsonable_encoder` pass; `response_model` still documents the shape.
+    """
+    return UtcJSONResponse(create_token_response(user).model_dump())
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     data: LoginRequest,
     request: Request,
     db: Session = Depends(get_db),
 ):
-    """Authenticate user and return JWT tokens."""
+    """Authenticate user and return JWT tokens.
+
+    Async so the bcrypt check can be awaited on the dedicated hashing
+    pool instead of pinning a threadpool worker for its full duration;
+    the DB lookups run on the threadpool.
+    """
     _check_rate_limit(request)
-    user = authenticate_user(db, data.email, data.password)
+    user = await authenticate_user_async(db, data.email, data.password)
     if user is None:
         _record_failed_attempt(request)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERR_INVALID_CREDENTIALS,
         )
-    return create_token_response(user)
+    return _token_json(user)
 
 
 @router.post("/refresh", response_model=TokenResponse)
 def refresh_token(
-    data: RefreshRequest,
+    refresh_token: str = Body(..., embed=True),
     db: Session = Depends(get_db),
 ):
-    """Refresh access token using refresh token."""
+    """Refresh access token using refresh token.
+
+    The token is opaque, so it is read as a plain embedded body field
+    (`{"refresh_token": "..."}`) rather than through a request model.
+    """
     try:
-        payload = decode_token(data.refresh_token)
+        payload = decode_token(refresh_token)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -108,7 +129,7 @@ def refresh_token(
             detail=ERR_TOKEN_INVALID,
         )
 
-    return create_token_response(user)
+    return _token_json(user)
 
 
 @router.get("/me", response_model=MeResponse)
@@ -233,30 +254,42 @@ def change_password_endpoint(
 
 @router.get("/users", response_model=list[UserResponse])
 def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: int | None = None,
     db: Session = Depends(get_db),
     _current_user: User = Depends(require_role(Role.ADMIN)),
 ):
-    """List all users (admin only)."""
-    return get_users(db, skip=skip, limit=limit)
+    """List all users (admin only).
+
+    Pass `after_id` (the last id of the previous page) for keyset
+    pagination; `skip` is ignored then. The total number of users is
+    returned in the `X-Total-Count` header.
+    """
+    response.headers["X-Total-Count"] = str(count_users(db))
+    return get_users(db, skip=skip, limit=limit, after_id=after_id)
 
 
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     data: RegisterRequest,
     db: Session = Depends(get_db),
     _current_user: User = Depends(require_role(Role.ADMIN)),
 ):
-    """Create a new user (admin only)."""
-    existing = get_user_by_email(db, data.email)
+    """Create a new user (admin only).
+
+    Async so the password is hashed on the bcrypt pool; the DB calls run
+    on the threadpool.
+    """
+    existing = await run_in_threadpool(get_user_by_email, db, data.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email already exists",
         )
-    user = create_user(db, data)
-    return user
+    hashed = await hash_password_async(data.password)
+    return await run_in_threadpool(create_user, db, data, hashed)
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
@@ -309,7 +342,7 @@ def _cascade_revoke_on_deactivate(
 
 
 @router.patch("/users/{user_id}", response_model=UserResponse)
-def patch_user(
+async def patch_user(
     user_id: int,
     data: UserUpdate,
     request: Request,
@@ -320,16 +353,29 @@ def patch_user(
 
     Story 5-3: flipping is_active from True to False cascade-revokes all
     of the user's ApiTokens and emits `user.deactivated` with the
-    revocation count.
+    revocation count. Async so a new password is hashed on the bcrypt
+    pool; the DB work runs on the threadpool.
     """
-    user = get_user_by_id(db, user_id)
+    user = await run_in_threadpool(get_user_by_id, db, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    update_data = data.model_dump(exclude_unset=True)
+    update_data = {field: getattr(data, field) for field in data.model_fields_set}
     if "password" in update_data:
-        update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password_async(
+            update_data.pop("password")
+        )
 
+    ip = request.client.host if request.client else None
+    return await run_in_threadpool(
+        _apply_user_update, db, user, update_data, current_user.id, ip,
+    )
+
+
+def _apply_user_update(
+    db: Session, user: User, update_data: dict, actor_id: int, ip: str | None,
+) -> User:
+    """Write `patch_user`'s changes, cascading a deactivation."""
     will_deactivate = (
         "is_active" in update_data
         and update_data["is_active"] is False
@@ -339,8 +385,7 @@ def patch_user(
     updated = update_user(db, user, **update_data)
 
     if will_deactivate:
-        ip = request.client.host if request.client else None
-        _cascade_revoke_on_deactivate(db, updated, current_user.id, ip)
+        _cascade_revoke_on_deactivate(db, updated, actor_id, ip)
         db.commit()
 
     return updated
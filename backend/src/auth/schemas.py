@@ -27,10 +27,6 @@ class RegisterRequest(BaseModel):
     role: Role = Role.RUNNER
 
 
-class RefreshRequest(BaseModel):
-    refresh_token: str
-
-
 # --- Response Schemas ---
 
 
@@ -1,18 +1,30 @@
 """Authentication service: user creation, verification, JWT handling."""
 
+import asyncio
+import functools
+import hashlib
+import hmac
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
 import jwt as pyjwt
+from fastapi.concurrency import run_in_threadpool
 from jwt.exceptions import InvalidTokenError
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, event, func, select
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from sqlalchemy.orm.util import identity_key
 
 from src.auth.constants import ERR_TOKEN_EXPIRED, ERR_TOKEN_INVALID, Role
 from src.auth.models import User
 from src.auth.schemas import RegisterRequest, TokenResponse, UserResponse
 from src.config import settings
+from src.database import on_transaction_end
 
 logger = logging.getLogger("roboscope.auth")
 
@@ -22,44 +34,161 @@ def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
 
+# Short-TTL memo of bcrypt verdicts so scripted clients re-sending the
+# same credentials don't pay the full bcrypt cost each time. Keys are an
+# HMAC(SECRET_KEY) over password + stored hash — the plaintext is never
+# kept — and since the stored hash is part of the key, a password change
+# naturally misses. Trade-off: a repeat attempt is answered faster than
+# a first one, and the verdict lives in memory for up to
+# `_PASSWORD_CACHE_TTL` seconds.
+_PASSWORD_CACHE_MAX = 512
+_PASSWORD_CACHE_TTL = 30.0
+_password_cache: OrderedDict[bytes, tuple[bool, float]] = OrderedDict()
+_password_cache_lock = threading.Lock()
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    key = hmac.new(
+        settings.SECRET_KEY.encode("utf-8"),
+        plain_password.encode("utf-8") + b"\0" + hashed_password.encode("utf-8"),
+        hashlib.sha256,
+    ).digest()
+    now = time.monotonic()
+    with _password_cache_lock:
+        cached = _password_cache.get(key)
+        if cached is not None:
+            if cached[1] > now:
+                return cached[0]
+            del _password_cache[key]
+
+    ok = bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    with _password_cache_lock:
+        _password_cache[key] = (ok, now + _PASSWORD_CACHE_TTL)
+        if len(_password_cache) > _PASSWORD_CACHE_MAX:
+            _password_cache.popitem(last=False)
+    return ok
+
+
+# bcrypt runs on its own pool so the async auth handlers never hash on
+# the event loop, and a burst of logins can't starve the AnyIO
+# threadpool that serves the sync DB-bound handlers.
+_bcrypt_pool = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="roboscope-bcrypt",
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """`hash_password` on the dedicated bcrypt pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """`verify_password` on the dedicated bcrypt pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _bcrypt_pool, verify_password, plain_password, hashed_password,
+    )
+
+
+# One PyJWT instance for all encode/decode calls, plus the signing key
+# as bytes. The key is re-derived only if SECRET_KEY changes at runtime.
+_jwt = pyjwt.PyJWT()
+_signing_key: tuple[str, bytes] = ("", b"")
+
+
+def _jwt_key() -> bytes:
+    global _signing_key
+    secret = settings.SECRET_KEY
+    if _signing_key[0] != secret:
+        _signing_key = (secret, secret.encode("utf-8"))
+    return _signing_key[1]
 
 
 def create_access_token(user_id: int, role: str) -> str:
     """Create a JWT access token."""
-    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    now = datetime.now(timezone.utc)
     payload = {
         "sub": str(user_id),
         "role": role,
         "type": "access",
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "exp": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        "iat": now,
     }
-    return pyjwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return _jwt.encode(payload, _jwt_key(), algorithm=settings.ALGORITHM)
 
 
 def create_refresh_token(user_id: int) -> str:
     """Create a JWT refresh token."""
-    expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    now = datetime.now(timezone.utc)
     payload = {
         "sub": str(user_id),
         "type": "refresh",
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "exp": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        "iat": now,
     }
-    return pyjwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return _jwt.encode(payload, _jwt_key(), algorithm=settings.ALGORITHM)
+
+
+# Decoded-JWT cache. Every authenticated request runs `decode_token`,
+# so repeat presentations of the same token skip the HMAC verify + JSON
+# parse. Valid tokens are kept until their own `exp`; rejected tokens
+# are remembered by a 16-byte digest only, so replayed garbage doesn't
+# pin full token strings in memory.
+_TOKEN_CACHE_MAX = 2048
+_token_cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+_invalid_token_cache: OrderedDict[bytes, None] = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def clear_token_cache() -> None:
+    """Drop all cached decode results (e.g. after rotating SECRET_KEY)."""
+    with _token_cache_lock:
+        _token_cache.clear()
+        _invalid_token_cache.clear()
 
 
 def decode_token(token: str) -> dict:
-    """Decode and validate a JWT token."""
+    """Decode and validate a JWT token.
+
+    Results are memoised per token string (see `_token_cache`); a cached
+    payload is only served while its `exp` lies in the future.
+    """
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            if cached[1] > now:
+                _token_cache.move_to_end(token)
+                return dict(cached[0])
+            del _token_cache[token]
+        digest = _token_digest(token)
+        known_invalid = digest in _invalid_token_cache
+    if known_invalid:
+        raise ValueError(ERR_TOKEN_INVALID)
+
     try:
-        payload = pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = _jwt.decode(token, _jwt_key(), algorithms=[settings.ALGORITHM])
     except InvalidTokenError as e:
+        with _token_cache_lock:
+            _invalid_token_cache[digest] = None
+            if len(_invalid_token_cache) > _TOKEN_CACHE_MAX:
+                _invalid_token_cache.popitem(last=False)
         raise ValueError(ERR_TOKEN_INVALID) from e
 
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        with _token_cache_lock:
+            _token_cache[token] = (payload, float(exp))
+            if len(_token_cache) > _TOKEN_CACHE_MAX:
+                _token_cache.popitem(last=False)
+    return dict(payload)
+
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     """Find a user by email."""
@@ -67,40 +196,208 @@ def get_user_by_email(db: Session, email: str) -> User | None:
     return result.scalar_one_or_none()
 
 
+# Columns the credential check needs — `authenticate_user` reads these
+# as a plain row and only hydrates the full ORM `User` once the password
+# has verified, so failed logins never build an instance.
+_AUTH_COLUMNS = (User.id, User.role, User.is_active, User.hashed_password)
+
+
+def get_auth_user_by_email(db: Session, email: str) -> Row | None:
+    """Fetch only the credential-check columns for a user by email."""
+    return db.execute(select(*_AUTH_COLUMNS).where(User.email == email)).first()
+
+
 def get_user_by_id(db: Session, user_id: int) -> User | None:
     """Find a user by ID."""
     result = db.execute(select(User).where(User.id == user_id))
     return result.scalar_one_or_none()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
-    """List all users with pagination."""
-    result = db.execute(select(User).offset(skip).limit(limit))
-    return list(result.scalars().all())
+# Short-TTL principal cache for `get_current_user`. Holds a detached,
+# column-only snapshot per user id; hits are merged into the request's
+# session with `load=False`, so the handler still gets a normal
+# persistent `User` (its own copy — mutations never reach the cache)
+# without a SELECT. Any ORM insert/update/delete of a user evicts the
+# entry once the writing transaction ends (see `_evict_cached_user`).
+# The cache is per process: other workers keep serving their snapshot —
+# e.g. a just-deactivated user stays authenticated there — for up to
+# `USER_CACHE_TTL` seconds.
+USER_CACHE_TTL = 10.0
+_user_cache: dict[int, tuple[float, User]] = {}
+_user_cache_lock = threading.Lock()
+# Bumped on every eviction, so a read that started before a write
+# committed doesn't re-cache the old row afterwards.
+_user_cache_generation = 0
+
+
+def _snapshot_user(user: User) -> User:
+    snapshot = User(**{
+        attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs
+    })
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def get_cached_user(db: Session, user_id: int) -> User | None:
+    """Find a user by ID, serving from `_user_cache` while fresh."""
+    in_session = db.identity_map.get(identity_key(User, user_id))
+    if in_session is not None:
+        return in_session
+
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        generation = _user_cache_generation
+    if entry is not None and entry[0] > time.monotonic():
+        return db.merge(entry[1], load=False)
+
+    user = get_user_by_id(db, user_id)
+    if user is not None:
+        snapshot = _snapshot_user(user)
+        with _user_cache_lock:
+            if generation == _user_cache_generation:
+                _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, snapshot)
+    return user
 
 
-def create_user(db: Session, data: RegisterRequest) -> User:
-    """Create a new user."""
+# Admin user-list pages, keyed by (skip, limit, after_id), plus the total
+# user count. Paging back and forth through the list reuses the snapshots
+# for a few seconds; any committed user write clears both.
+USERS_PAGE_CACHE_TTL = 3.0
+_USERS_PAGE_CACHE_MAX = 256
+_users_page_cache: dict[tuple[int, int, int | None], tuple[float, list[User]]] = {}
+_users_count_cache: tuple[float, int] | None = None
+
+
+def clear_user_cache() -> None:
+    """Drop every cached user snapshot, user-list page and the user count."""
+    global _users_count_cache
+    with _user_cache_lock:
+        _user_cache.clear()
+        _users_page_cache.clear()
+        _users_count_cache = None
+
+
+def _evict_user(user_id: int) -> None:
+    global _user_cache_generation, _users_count_cache
+    with _user_cache_lock:
+        _user_cache_generation += 1
+        _user_cache.pop(user_id, None)
+        _users_page_cache.clear()
+        _users_count_cache = None
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_cached_user(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is None:
+        _evict_user(target.id)
+    else:
+        on_transaction_end(session, ("user", target.id), functools.partial(_evict_user, target.id))
+
+
+def get_users(
+    db: Session, skip: int = 0, limit: int = 100, after_id: int | None = None,
+) -> list[User]:
+    """List all users with pagination.
+
+    With `after_id` set, pages by keyset (`id > after_id ORDER BY id`)
+    and `skip` is ignored — an index seek instead of an OFFSET scan.
+    Cached pages are returned as fresh detached copies.
+    """
+    key = (skip, limit, after_id)
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _users_page_cache.get(key)
+        generation = _user_cache_generation
+    if entry is not None and entry[0] > now:
+        return [_snapshot_user(u) for u in entry[1]]
+
+    stmt = select(User)
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id).order_by(User.id)
+    else:
+        stmt = stmt.offset(skip)
+    users = list(db.execute(stmt.limit(limit)).scalars().all())
+
+    snapshots = [_snapshot_user(u) for u in users]
+    with _user_cache_lock:
+        if generation == _user_cache_generation:
+            if len(_users_page_cache) >= _USERS_PAGE_CACHE_MAX:
+                _users_page_cache.clear()
+            _users_page_cache[key] = (now + USERS_PAGE_CACHE_TTL, snapshots)
+    return users
+
+
+def count_users(db: Session) -> int:
+    """Return the total number of users, cached like the list pages."""
+    global _users_count_cache
+    now = time.monotonic()
+    with _user_cache_lock:
+        cached = _users_count_cache
+        generation = _user_cache_generation
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    total = db.scalar(select(func.count()).select_from(User)) or 0
+    with _user_cache_lock:
+        if generation == _user_cache_generation:
+            _users_count_cache = (now + USERS_PAGE_CACHE_TTL, total)
+    return total
+
+
+def create_user(
+    db: Session, data: RegisterRequest, hashed_password: str | None = None,
+) -> User:
+    """Create a new user.
+
+    Pass `hashed_password` when the caller already hashed `data.password`
+    off-thread (see `hash_password_async`).
+    """
     user = User(
         email=data.email,
         username=data.username,
-        hashed_password=hash_password(data.password),
+        hashed_password=hashed_password or hash_password(data.password),
         role=data.role,
     )
     db.add(user)
     db.flush()
-    db.refresh(user)
     return user
 
 
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     """Authenticate a user by email and password."""
-    user = get_user_by_email(db, email)
-    if user is None:
+    auth_row = get_auth_user_by_email(db, email)
+    if auth_row is None:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not verify_password(password, auth_row.hashed_password):
         return None
-    if not user.is_active:
+    if not auth_row.is_active:
+        return None
+    return _complete_login(db, auth_row.id)
+
+
+async def authenticate_user_async(db: Session, email: str, password: str) -> User | None:
+    """`authenticate_user` with the bcrypt check on the dedicated pool.
+
+    The DB lookups run on the AnyIO threadpool, so neither blocks the
+    event loop.
+    """
+    auth_row = await run_in_threadpool(get_auth_user_by_email, db, email)
+    if auth_row is None:
+        return None
+    if not await verify_password_async(password, auth_row.hashed_password):
+        return None
+    if not auth_row.is_active:
+        return None
+    return await run_in_threadpool(_complete_login, db, auth_row.id)
+
+
+def _complete_login(db: Session, user_id: int) -> User | None:
+    """Load the authenticated user and stamp `last_login_at`."""
+    user = db.get(User, user_id)
+    if user is None:
         return None
     # Update last login
     user.last_login_at = datetime.now(timezone.utc)
@@ -139,13 +436,19 @@ def change_password(
     db.flush()
 
 
+# Columns `update_user` may write; anything else in kwargs is ignored.
+_UPDATABLE_USER_FIELDS = frozenset({
+    "email", "username", "role", "is_active", "hashed_password", "last_login_at",
+})
+
+
 def update_user(db: Session, user: User, **kwargs) -> User:
     """Update user fields."""
-    for key, value in kwargs.items():
-        if value is not None and hasattr(user, key):
+    for key in kwargs.keys() & _UPDATABLE_USER_FIELDS:
+        value = kwargs[key]
+        if value is not None:
             setattr(user, key, value)
     db.flush()
-    db.refresh(user)
     return user
 
 
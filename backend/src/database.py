@@ -6,11 +6,14 @@ FastAPI runs sync route handlers in a thread pool automatically.
 """
 
 import logging
-from collections.abc import Generator
+import re
+from collections.abc import Callable, Generator, Hashable
 from datetime import datetime
 
-from sqlalchemy import MetaData, create_engine, func, text
+from sqlalchemy import MetaData, TextClause, create_engine, event, func, text
+from sqlalchemy.exc import DatabaseError
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
 
 logger = logging.getLogger("roboscope.database")
 
@@ -34,16 +37,73 @@ engine_kwargs: dict = {
 if settings.is_sqlite:
     # FastAPI runs sync handlers in a thread pool; allow cross-thread SQLite access.
     engine_kwargs["connect_args"] = {"check_same_thread": False}
-
-if settings.is_postgres:
+    if ":memory:" in settings.sync_database_url:
+        # Every new connection to :memory: is a fresh, empty database; share
+        # a single connection so all threads see the same schema and data.
+        engine_kwargs["poolclass"] = StaticPool
+    else:
+        # SQLite connections are just file handles; keep enough pooled that
+        # concurrent request threads never wait on QueuePool's default 5+10.
+        engine_kwargs.update({
+            "pool_size": 20,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+        })
+
+if settings.is_postgres and settings.DATABASE_NULL_POOL:
+    # An external pooler (PgBouncer in transaction mode) multiplexes
+    # connections; a second client-side pool would only pin them.
+    engine_kwargs["poolclass"] = NullPool
+elif settings.is_postgres:
+    # Size the pool from the run concurrency (each parallel run holds a
+    # session in a background thread) plus headroom for API requests.
+    # LIFO reuse keeps a warm subset of connections hot, letting the rest
+    # idle out; recycling stays under typical server/NAT idle timeouts.
     engine_kwargs.update({
-        "pool_size": 10,
-        "max_overflow": 20,
-        "pool_recycle": 3600,
+        "pool_size": max(5, settings.MAX_PARALLEL_RUNS * 2),
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_use_lifo": True,
     })
 
 engine = create_engine(settings.sync_database_url, **engine_kwargs)
 
+# Per-connection SQLite tuning. WAL lets dashboard reads run alongside a
+# writer and, with synchronous=NORMAL, commits skip the per-transaction
+# fsync of the default rollback journal (durable up to the last
+# checkpoint, which is the standard WAL trade-off). foreign_keys is left
+# at SQLite's default (OFF): the legacy `repositories` table rebuild in
+# `_migrate_sqlite` DROPs a referenced table and relies on it.
+_SQLITE_CONNECT_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # KiB → 64 MB page cache per connection
+    "PRAGMA mmap_size=268435456",
+)
+
+if settings.is_sqlite:
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_on_connect(dbapi_conn, connection_record) -> None:
+        cursor = dbapi_conn.cursor()
+        try:
+            for pragma in _SQLITE_CONNECT_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, "close")
+    def _sqlite_on_close(dbapi_conn, connection_record) -> None:
+        # Refresh planner statistics cheaply (bounded by analysis_limit)
+        # as pooled connections are retired.
+        try:
+            dbapi_conn.execute("PRAGMA analysis_limit=400")
+            dbapi_conn.execute("PRAGMA optimize")
+        except Exception:
+            logger.debug("PRAGMA optimize on close failed", exc_info=True)
+
 SessionLocal = sessionmaker(
     bind=engine,
     expire_on_commit=False,
@@ -95,6 +155,31 @@ def get_db() -> Generator[Session, None, None]:
             raise
 
 
+# Session.info key holding the callbacks registered by `on_transaction_end`.
+_TX_END_CALLBACKS = "roboscope_tx_end_callbacks"
+
+
+def on_transaction_end(session: Session, key: Hashable, callback: Callable[[], None]) -> None:
+    """Run `callback` once `session`'s outermost transaction has ended.
+
+    Used to invalidate in-process read caches: evicting at flush time
+    lets a concurrent reader re-cache the old row before the write is
+    committed. Callbacks also run on rollback, where an extra eviction is
+    harmless. Registrations are de-duplicated by `key`.
+    """
+    session.info.setdefault(_TX_END_CALLBACKS, {})[key] = callback
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_tx_end_callbacks(session: Session, transaction) -> None:
+    if transaction.parent is not None:
+        return
+    callbacks = session.info.pop(_TX_END_CALLBACKS, None)
+    if callbacks:
+        for callback in callbacks.values():
+            callback()
+
+
 def create_tables() -> None:
     """Create all tables (for development/testing)."""
     with engine.begin() as conn:
@@ -102,266 +187,411 @@ def create_tables() -> None:
     _run_migrations()
 
 
+# Version of the lightweight migrations below. Recorded in
+# `PRAGMA user_version` (SQLite) / the `schema_meta` table (PostgreSQL)
+# once they have run, so later boots skip the column probes entirely.
+# Bump this whenever a step is added to `_migrate_sqlite` /
+# `_migrate_postgres`.
+CURRENT_SCHEMA_VERSION = 7
+
+
+_SQLITE_GET_USER_VERSION = text("PRAGMA user_version")
+_POSTGRES_CREATE_SCHEMA_META = text(
+    "CREATE TABLE IF NOT EXISTS schema_meta (version INTEGER NOT NULL)"
+)
+_POSTGRES_GET_SCHEMA_VERSION = text("SELECT MAX(version) FROM schema_meta")
+_POSTGRES_CLEAR_SCHEMA_VERSION = text("DELETE FROM schema_meta")
+_POSTGRES_SET_SCHEMA_VERSION = text("INSERT INTO schema_meta (version) VALUES (:v)")
+
+
+def _get_schema_version(conn) -> int:
+    if settings.is_sqlite:
+        return conn.execute(_SQLITE_GET_USER_VERSION).scalar() or 0
+    conn.execute(_POSTGRES_CREATE_SCHEMA_META)
+    return conn.execute(_POSTGRES_GET_SCHEMA_VERSION).scalar() or 0
+
+
+def _set_schema_version(conn, version: int) -> None:
+    if settings.is_sqlite:
+        # PRAGMA takes no bound parameters; `version` is an int constant.
+        conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+        return
+    conn.execute(_POSTGRES_CLEAR_SCHEMA_VERSION)
+    conn.execute(_POSTGRES_SET_SCHEMA_VERSION, {"v": version})
+
+
+# Arbitrary fixed key for the PostgreSQL advisory lock serialising
+# startup migrations across replicas/workers (Python's hash() is salted
+# per process, so it cannot be used to derive one).
+_MIGRATION_LOCK_KEY = 0x526F626F53636F70  # "RoboScop"
+_POSTGRES_MIGRATION_LOCK = text("SELECT pg_advisory_xact_lock(:key)")
+
+
+def _lock_migrations(conn) -> None:
+    """Serialise concurrent migrators for the rest of `conn`'s transaction.
+
+    Whoever gets the lock first migrates; the others block until it
+    commits and then see the bumped schema version and skip.
+    """
+    if settings.is_sqlite:
+        # Take the write lock up front instead of on the first DDL
+        # statement, so two workers can't both read a stale user_version.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.execute(_POSTGRES_MIGRATION_LOCK, {"key": _MIGRATION_LOCK_KEY})
+
+
 def _run_migrations() -> None:
     """Run lightweight schema migrations for new columns on existing tables."""
     with engine.begin() as conn:
+        _lock_migrations(conn)
+        if _get_schema_version(conn) >= CURRENT_SCHEMA_VERSION:
+            return
         if settings.is_sqlite:
             _migrate_sqlite(conn)
         else:
             _migrate_postgres(conn)
+        _set_schema_version(conn, CURRENT_SCHEMA_VERSION)
+        logger.info("Schema migrations applied (version %d)", CURRENT_SCHEMA_VERSION)
+
+
+# Migration SQL is built once at import; stable TextClause objects hit
+# SQLAlchemy's compiled cache on every subsequent run.
+
+# Additive SQLite column migrations: (table, column, ALTER statement).
+_SQLITE_ADD_COLUMNS: tuple[tuple[str, str, TextClause], ...] = (
+    ("repositories", "sync_status",
+     text("ALTER TABLE repositories ADD COLUMN sync_status VARCHAR(20) DEFAULT 'idle'")),
+    ("repositories", "sync_error",
+     text("ALTER TABLE repositories ADD COLUMN sync_error TEXT")),
+    # Story REPO-3: pre-run sync flag
+    ("repositories", "pre_run_sync",
+     text("ALTER TABLE repositories ADD COLUMN pre_run_sync BOOLEAN DEFAULT 0")),
+    ("repositories", "environment_id",
+     text("ALTER TABLE repositories ADD COLUMN environment_id INTEGER "
+          "REFERENCES environments(id) ON DELETE SET NULL")),
+    # Phase-4: repositories.team_id (nullable; FK enforced by Alembic migration, not here)
+    ("repositories", "team_id",
+     text("ALTER TABLE repositories ADD COLUMN team_id INTEGER")),
+    ("ai_jobs", "report_id",
+     text("ALTER TABLE ai_jobs ADD COLUMN report_id INTEGER REFERENCES reports(id)")),
+    ("environment_packages", "install_status",
+     text("ALTER TABLE environment_packages "
+          "ADD COLUMN install_status VARCHAR(20) DEFAULT 'installed'")),
+    ("environment_packages", "install_error",
+     text("ALTER TABLE environment_packages ADD COLUMN install_error TEXT")),
+    ("environments", "default_runner_type",
+     text("ALTER TABLE environments "
+          "ADD COLUMN default_runner_type VARCHAR(20) DEFAULT 'subprocess'")),
+    ("environments", "max_docker_containers",
+     text("ALTER TABLE environments ADD COLUMN max_docker_containers INTEGER DEFAULT 1")),
+    # Phase-4: users.first_login_complete
+    ("users", "first_login_complete",
+     text("ALTER TABLE users ADD COLUMN first_login_complete BOOLEAN NOT NULL DEFAULT 0")),
+    # Story SECURITY-1: users.password_change_required
+    ("users", "password_change_required",
+     text("ALTER TABLE users ADD COLUMN password_change_required BOOLEAN NOT NULL DEFAULT 0")),
+    ("environments", "docker_image_hash",
+     text("ALTER TABLE environments ADD COLUMN docker_image_hash VARCHAR(64)")),
+)
+
+
+_SQLITE_REPO_TABLE_INFO = text("PRAGMA table_info(repositories)")
+
+_SQLITE_EXISTING_COLUMNS = text(
+    "SELECT m.name, p.name FROM sqlite_master AS m, pragma_table_info(m.name) AS p "
+    "WHERE m.type = 'table' AND m.name IN ("
+    + ", ".join(f"'{table}'" for table in sorted({t for t, _, _ in _SQLITE_ADD_COLUMNS}))
+    + ")"
+)
+
+# Legacy `repositories` rebuild: adds repo_type and drops NOT NULL on git_url.
+_SQLITE_CREATE_REPOSITORIES_NEW = text(
+    "CREATE TABLE IF NOT EXISTS repositories_new ("
+    "  id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    "  name VARCHAR(255) UNIQUE NOT NULL,"
+    "  repo_type VARCHAR(20) DEFAULT 'git',"
+    "  git_url VARCHAR(500),"
+    "  default_branch VARCHAR(100) DEFAULT 'main',"
+    "  local_path VARCHAR(500) NOT NULL,"
+    "  last_synced_at DATETIME,"
+    "  auto_sync BOOLEAN DEFAULT 1,"
+    "  sync_interval_minutes INTEGER DEFAULT 15,"
+    "  created_by INTEGER NOT NULL REFERENCES users(id),"
+    "  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,"
+    "  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP"
+    ")"
+)
+_SQLITE_REPOSITORIES_ID_RANGE = text("SELECT MIN(id), MAX(id) FROM repositories")
+_SQLITE_COPY_REPOSITORIES_BATCH = text(
+    "INSERT OR IGNORE INTO repositories_new "
+    "(id, name, repo_type, git_url, default_branch, local_path, "
+    " last_synced_at, auto_sync, sync_interval_minutes, created_by, "
+    " created_at, updated_at) "
+    "SELECT id, name, 'git', git_url, default_branch, local_path, "
+    " last_synced_at, auto_sync, sync_interval_minutes, created_by, "
+    " created_at, updated_at "
+    "FROM repositories WHERE id >= :lo AND id < :hi"
+)
+_SQLITE_SWAP_REPOSITORIES: tuple[TextClause, ...] = (
+    text("DROP TABLE repositories"),
+    text("ALTER TABLE repositories_new RENAME TO repositories"),
+    text("CREATE UNIQUE INDEX IF NOT EXISTS ix_repo_name ON repositories(name)"),
+)
+_REBUILD_BATCH_SIZE = 5000
+
+
+def _sqlite_rebuild_repositories(conn) -> None:
+    """Copy `repositories` into the relaxed schema and swap it in.
+
+    Rows are copied in primary-key ranges so no single statement has to
+    materialise the whole table. All batches and the swap deliberately
+    share the caller's transaction rather than committing per batch:
+    that transaction holds the `BEGIN IMMEDIATE` write lock serialising
+    concurrent migrators (see `_lock_migrations`), and committing early
+    would let another worker start a second rebuild, or let writes to
+    already-copied rows slip past the `INSERT OR IGNORE` copy. The cost
+    is one long write transaction, paid once on legacy databases only.
+    """
+    conn.execute(_SQLITE_CREATE_REPOSITORIES_NEW)
+    lo, hi = conn.execute(_SQLITE_REPOSITORIES_ID_RANGE).one()
+    if lo is not None:
+        for start in range(lo, hi + 1, _REBUILD_BATCH_SIZE):
+            conn.execute(
+                _SQLITE_COPY_REPOSITORIES_BATCH,
+                {"lo": start, "hi": start + _REBUILD_BATCH_SIZE},
+            )
+    for stmt in _SQLITE_SWAP_REPOSITORIES:
+        conn.execute(stmt)
+
+
+_SQLITE_ADD_REPO_TYPE = text(
+    "ALTER TABLE repositories ADD COLUMN repo_type VARCHAR(20) DEFAULT 'git'"
+)
+_SQLITE_REPO_TABLE_SQL = text(
+    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'repositories'"
+)
+_SQLITE_SET_REPO_TABLE_SQL = text(
+    "UPDATE sqlite_master SET sql = :sql WHERE type = 'table' AND name = 'repositories'"
+)
+_GIT_URL_NOT_NULL = re.compile(r"(\bgit_url\b[^,]*?)\s+NOT\s+NULL", re.IGNORECASE)
+
+
+class _SchemaEditError(Exception):
+    """The in-place `repositories` schema edit left the database inconsistent."""
+
+
+def _sqlite_relax_git_url_in_place(conn) -> bool:
+    """Drop NOT NULL on `repositories.git_url` by editing the stored schema.
+
+    Relaxing a NOT NULL constraint does not change the on-disk record
+    format, so SQLite permits it via `writable_schema` — an O(1) catalog
+    edit instead of copying every row into a rebuilt table. Returns False
+    (leaving the schema untouched) if the stored CREATE TABLE does not
+    have the expected shape, or if SQLite refuses or botches the edit
+    (e.g. a build running in defensive mode), so the caller can fall back
+    to a rebuild.
+    """
+    table_sql = conn.execute(_SQLITE_REPO_TABLE_SQL).scalar()
+    new_sql, count = _GIT_URL_NOT_NULL.subn(r"\1", table_sql or "", count=1)
+    if count != 1:
+        return False
+
+    try:
+        # The savepoint undoes a partial edit before the caller rebuilds.
+        with conn.begin_nested():
+            schema_version = conn.execute(text("PRAGMA schema_version")).scalar()
+            conn.execute(text("PRAGMA writable_schema = ON"))
+            try:
+                conn.execute(_SQLITE_SET_REPO_TABLE_SQL, {"sql": new_sql})
+                # Bumping schema_version makes every connection reload the catalog.
+                conn.execute(text(f"PRAGMA schema_version = {int(schema_version) + 1}"))
+            finally:
+                conn.execute(text("PRAGMA writable_schema = OFF"))
+            # Scoped to the edited table: a whole-database check would cost
+            # more than the rebuild this edit avoids, under the migration lock.
+            result = conn.execute(text("PRAGMA quick_check(repositories)")).scalar()
+            if result != "ok":
+                raise _SchemaEditError(f"quick check: {result}")
+    except (DatabaseError, _SchemaEditError) as e:
+        logger.warning("In-place git_url relax failed (%s); rebuilding repositories", e)
+        return False
+
+    if "repo_type" not in {row[1] for row in conn.execute(_SQLITE_REPO_TABLE_INFO)}:
+        conn.execute(_SQLITE_ADD_REPO_TYPE)
+    logger.info("Migration: added repo_type column, made git_url nullable")
+    return True
+
+
+# Environment index layout (mirrors Alembic a8d3f6c2e519); valid on both
+# SQLite and PostgreSQL.
+_ENV_INDEX_STATEMENTS: tuple[TextClause, ...] = (
+    text("CREATE INDEX IF NOT EXISTS ix_env_var_env_key "
+         "ON environment_variables (environment_id, key)"),
+    text("DROP INDEX IF EXISTS ix_environment_variables_environment_id"),
+    text("DROP INDEX IF EXISTS ix_environment_packages_environment_id"),
+    # Runs per schedule (mirrors Alembic 3c9e5a7b2d14).
+    text("CREATE INDEX IF NOT EXISTS ix_runs_schedule_status "
+         "ON execution_runs (schedule_id, status)"),
+)
+
+
+# Package lookups by (environment_id, package_name) rely on uq_env_pkg.
+# Databases created before it existed (and upgraded only by these startup
+# migrations) lack it, and the single-column index above is dropped — so
+# ensure an equivalent unique index, de-duplicating first exactly like
+# Alembic f1a2b3c4d5e6 does.
+_SQLITE_ENV_PKG_UNIQUE_PROBE = text(
+    "SELECT 1 FROM pragma_index_list('environment_packages') AS il "
+    "WHERE il.\"unique\" = 1 AND ("
+    "  SELECT group_concat(ii.name) FROM pragma_index_info(il.name) AS ii"
+    ") = 'environment_id,package_name'"
+)
+_POSTGRES_ENV_PKG_UNIQUE_PROBE = text(
+    "SELECT 1 FROM pg_indexes WHERE tablename = 'environment_packages' "
+    "AND indexdef LIKE 'CREATE UNIQUE INDEX % (environment_id, package_name)'"
+)
+_ENV_PKG_DEDUPE = text(
+    "DELETE FROM environment_packages WHERE id NOT IN ("
+    "SELECT MAX(id) FROM environment_packages GROUP BY environment_id, package_name)"
+)
+_ENV_PKG_UNIQUE_INDEX = text(
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_envpkg_env_name "
+    "ON environment_packages (environment_id, package_name)"
+)
+
+
+def _ensure_env_pkg_unique_index(conn, probe: TextClause) -> None:
+    if conn.execute(probe).first() is not None:
+        return
+    conn.execute(_ENV_PKG_DEDUPE)
+    conn.execute(_ENV_PKG_UNIQUE_INDEX)
+    logger.info(
+        "Migration: added unique index on environment_packages (environment_id, package_name)"
+    )
 
 
 def _migrate_sqlite(conn) -> None:
     """SQLite migrations — add repo_type column and make git_url nullable."""
-    result = conn.execute(text("PRAGMA table_info(repositories)"))
-    columns = {row[1]: row for row in result.fetchall()}
+    columns = {row[1]: row for row in conn.execute(_SQLITE_REPO_TABLE_INFO).fetchall()}
 
     # Check if git_url still has NOT NULL constraint (notnull is index 3 in PRAGMA)
     git_url_notnull = columns.get("git_url", (0, 0, 0, 1))[3] == 1
-    if "repo_type" not in columns or git_url_notnull:
-        # Need to recreate the table to change NOT NULL on git_url and add repo_type
-        conn.execute(text(
-            "CREATE TABLE IF NOT EXISTS repositories_new ("
-            "  id INTEGER PRIMARY KEY AUTOINCREMENT,"
-            "  name VARCHAR(255) UNIQUE NOT NULL,"
-            "  repo_type VARCHAR(20) DEFAULT 'git',"
-            "  git_url VARCHAR(500),"
-            "  default_branch VARCHAR(100) DEFAULT 'main',"
-            "  local_path VARCHAR(500) NOT NULL,"
-            "  last_synced_at DATETIME,"
-            "  auto_sync BOOLEAN DEFAULT 1,"
-            "  sync_interval_minutes INTEGER DEFAULT 15,"
-            "  created_by INTEGER NOT NULL REFERENCES users(id),"
-            "  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,"
-            "  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP"
-            ")"
-        ))
-        conn.execute(text(
-            "INSERT OR IGNORE INTO repositories_new "
-            "(id, name, repo_type, git_url, default_branch, local_path, "
-            " last_synced_at, auto_sync, sync_interval_minutes, created_by, "
-            " created_at, updated_at) "
-            "SELECT id, name, 'git', git_url, default_branch, local_path, "
-            " last_synced_at, auto_sync, sync_interval_minutes, created_by, "
-            " created_at, updated_at "
-            "FROM repositories"
-        ))
-        conn.execute(text("DROP TABLE repositories"))
-        conn.execute(text("ALTER TABLE repositories_new RENAME TO repositories"))
-        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_repo_name ON repositories(name)"))
-        logger.info("Migration: added repo_type column, made git_url nullable")
-        # Re-read columns after possible recreation
-        result = conn.execute(text("PRAGMA table_info(repositories)"))
-        columns = {row[1]: row for row in result.fetchall()}
-
-    # Add sync_status and sync_error columns if missing
-    if "sync_status" not in columns:
-        conn.execute(text("ALTER TABLE repositories ADD COLUMN sync_status VARCHAR(20) DEFAULT 'idle'"))
-        logger.info("Migration: added sync_status column")
-    if "sync_error" not in columns:
-        conn.execute(text("ALTER TABLE repositories ADD COLUMN sync_error TEXT"))
-        logger.info("Migration: added sync_error column")
-
-    # Story REPO-3: pre-run sync flag
-    if "pre_run_sync" not in columns:
-        conn.execute(text("ALTER TABLE repositories ADD COLUMN pre_run_sync BOOLEAN DEFAULT 0"))
-        logger.info("Migration: added pre_run_sync column to repositories")
-
-    # Re-read columns after possible changes
-    result = conn.execute(text("PRAGMA table_info(repositories)"))
-    columns = {row[1]: row for row in result.fetchall()}
-
-    if "environment_id" not in columns:
-        conn.execute(text(
-            "ALTER TABLE repositories ADD COLUMN environment_id INTEGER REFERENCES environments(id) ON DELETE SET NULL"
-        ))
-        logger.info("Migration: added environment_id column to repositories")
-
-    # Add report_id column to ai_jobs if missing
-    result = conn.execute(text("PRAGMA table_info(ai_jobs)"))
-    ai_jobs_columns = {row[1] for row in result.fetchall()}
-    if "report_id" not in ai_jobs_columns:
-        conn.execute(text(
-            "ALTER TABLE ai_jobs ADD COLUMN report_id INTEGER REFERENCES reports(id)"
-        ))
-        logger.info("Migration: added report_id column to ai_jobs")
-
-    # Migrate environment_packages table: add install_status and install_error columns
-    result = conn.execute(text("PRAGMA table_info(environment_packages)"))
-    pkg_columns = {row[1] for row in result.fetchall()}
-    if "install_status" not in pkg_columns:
-        conn.execute(text(
-            "ALTER TABLE environment_packages ADD COLUMN install_status VARCHAR(20) DEFAULT 'installed'"
-        ))
-        logger.info("Migration: added install_status column to environment_packages")
-    if "install_error" not in pkg_columns:
-        conn.execute(text(
-            "ALTER TABLE environment_packages ADD COLUMN install_error TEXT"
-        ))
-        logger.info("Migration: added install_error column to environment_packages")
-
-    # Migrate environments table: add default_runner_type and max_docker_containers
-    result = conn.execute(text("PRAGMA table_info(environments)"))
-    env_columns = {row[1] for row in result.fetchall()}
-    if "default_runner_type" not in env_columns:
-        conn.execute(text(
-            "ALTER TABLE environments ADD COLUMN default_runner_type VARCHAR(20) DEFAULT 'subprocess'"
-        ))
-        logger.info("Migration: added default_runner_type column to environments")
-    if "max_docker_containers" not in env_columns:
-        conn.execute(text(
-            "ALTER TABLE environments ADD COLUMN max_docker_containers INTEGER DEFAULT 1"
-        ))
-        logger.info("Migration: added max_docker_containers column to environments")
-
+    if git_url_notnull:
+        if not _sqlite_relax_git_url_in_place(conn):
+            # Unrecognised table definition: fall back to the full table rebuild
+            _sqlite_rebuild_repositories(conn)
+            logger.info("Migration: added repo_type column, made git_url nullable (rebuild)")
+    elif "repo_type" not in columns:
+        conn.execute(_SQLITE_ADD_REPO_TYPE)
+        logger.info("Migration: added repo_type column")
+
+    # Every other step is an additive column. Introspect all affected
+    # tables in one pass, then issue only the ALTERs that are actually
+    # missing — all inside the caller's single transaction.
+    existing = set(conn.execute(_SQLITE_EXISTING_COLUMNS).fetchall())
+    for table, column, ddl in _SQLITE_ADD_COLUMNS:
+        if (table, column) not in existing:
+            conn.execute(ddl)
+            logger.info("Migration: added %s column to %s", column, table)
+
+    _ensure_env_pkg_unique_index(conn, _SQLITE_ENV_PKG_UNIQUE_PROBE)
+    for stmt in _ENV_INDEX_STATEMENTS:
+        conn.execute(stmt)
+
+
+# Additive PostgreSQL column migrations: (table, column, ALTER statement).
+_POSTGRES_ADD_COLUMNS: tuple[tuple[str, str, TextClause], ...] = (
+    ("repositories", "environment_id",
+     text("ALTER TABLE repositories ADD COLUMN environment_id INTEGER "
+          "REFERENCES environments(id) ON DELETE SET NULL")),
+    ("ai_jobs", "report_id",
+     text("ALTER TABLE ai_jobs ADD COLUMN report_id INTEGER REFERENCES reports(id)")),
+    ("environment_packages", "install_status",
+     text("ALTER TABLE environment_packages "
+          "ADD COLUMN install_status VARCHAR(20) DEFAULT 'installed'")),
+    ("environment_packages", "install_error",
+     text("ALTER TABLE environment_packages ADD COLUMN install_error TEXT")),
+    ("environments", "default_runner_type",
+     text("ALTER TABLE environments "
+          "ADD COLUMN default_runner_type VARCHAR(20) DEFAULT 'subprocess'")),
+    ("environments", "max_docker_containers",
+     text("ALTER TABLE environments ADD COLUMN max_docker_containers INTEGER DEFAULT 1")),
     # Phase-4: users.first_login_complete
-    result = conn.execute(text("PRAGMA table_info(users)"))
-    user_columns = {row[1] for row in result.fetchall()}
-    if "first_login_complete" not in user_columns:
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN first_login_complete BOOLEAN NOT NULL DEFAULT 0"
-        ))
-        logger.info("Migration: added first_login_complete column to users")
-
+    ("users", "first_login_complete",
+     text("ALTER TABLE users ADD COLUMN first_login_complete BOOLEAN NOT NULL DEFAULT FALSE")),
     # Story SECURITY-1: users.password_change_required
-    if "password_change_required" not in user_columns:
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN password_change_required BOOLEAN NOT NULL DEFAULT 0"
-        ))
-        logger.info("Migration: added password_change_required column to users")
-
+    ("users", "password_change_required",
+     text("ALTER TABLE users ADD COLUMN password_change_required BOOLEAN NOT NULL DEFAULT FALSE")),
+    ("environments", "docker_image_hash",
+     text("ALTER TABLE environments ADD COLUMN docker_image_hash VARCHAR(64)")),
     # Phase-4: repositories.team_id (nullable; FK enforced by Alembic migration, not here)
-    result = conn.execute(text("PRAGMA table_info(repositories)"))
-    repo_columns = {row[1] for row in result.fetchall()}
-    if "team_id" not in repo_columns:
-        conn.execute(text("ALTER TABLE repositories ADD COLUMN team_id INTEGER"))
-        logger.info("Migration: added team_id column to repositories")
+    ("repositories", "team_id",
+     text("ALTER TABLE repositories ADD COLUMN team_id INTEGER")),
+    # Story REPO-3: pre-run sync flag
+    ("repositories", "pre_run_sync",
+     text("ALTER TABLE repositories ADD COLUMN pre_run_sync BOOLEAN DEFAULT FALSE")),
+)
 
+_POSTGRES_EXISTING_COLUMNS = text(
+    "SELECT table_name, column_name FROM information_schema.columns "
+    "WHERE table_name IN ("
+    + ", ".join(
+        f"'{table}'"
+        for table in sorted({"repositories", *(t for t, _, _ in _POSTGRES_ADD_COLUMNS)})
+    )
+    + ")"
+)
 
-def _migrate_postgres(conn) -> None:
-    """PostgreSQL migrations."""
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'repositories' AND column_name = 'repo_type'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE repositories ADD COLUMN repo_type VARCHAR(20) DEFAULT 'git'"
-        ))
-        conn.execute(text(
-            "ALTER TABLE repositories ALTER COLUMN git_url DROP NOT NULL"
-        ))
-        logger.info("Migration: added repo_type column, made git_url nullable")
+_POSTGRES_ADD_REPO_TYPE: tuple[TextClause, ...] = (
+    text("ALTER TABLE repositories ADD COLUMN repo_type VARCHAR(20) DEFAULT 'git'"),
+    text("ALTER TABLE repositories ALTER COLUMN git_url DROP NOT NULL"),
+)
 
-    # Add environment_id column if missing
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'repositories' AND column_name = 'environment_id'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE repositories ADD COLUMN environment_id INTEGER "
-            "REFERENCES environments(id) ON DELETE SET NULL"
-        ))
-        logger.info("Migration: added environment_id column to repositories")
-
-    # Add report_id column to ai_jobs if missing
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'ai_jobs' AND column_name = 'report_id'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE ai_jobs ADD COLUMN report_id INTEGER "
-            "REFERENCES reports(id)"
-        ))
-        logger.info("Migration: added report_id column to ai_jobs")
-
-    # Add install_status column to environment_packages if missing
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'environment_packages' AND column_name = 'install_status'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE environment_packages ADD COLUMN install_status VARCHAR(20) DEFAULT 'installed'"
-        ))
-        logger.info("Migration: added install_status column to environment_packages")
-
-    # Add install_error column to environment_packages if missing
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'environment_packages' AND column_name = 'install_error'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE environment_packages ADD COLUMN install_error TEXT"
-        ))
-        logger.info("Migration: added install_error column to environment_packages")
-
-    # Add default_runner_type column to environments if missing
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'environments' AND column_name = 'default_runner_type'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE environments ADD COLUMN default_runner_type VARCHAR(20) DEFAULT 'subprocess'"
-        ))
-        logger.info("Migration: added default_runner_type column to environments")
-
-    # Add max_docker_containers column to environments if missing
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'environments' AND column_name = 'max_docker_containers'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE environments ADD COLUMN max_docker_containers INTEGER DEFAULT 1"
-        ))
-        logger.info("Migration: added max_docker_containers column to environments")
+# Free-form paths/URLs on environments are unbounded TEXT (mirrors Alembic
+# b2e9c7d4f180). VARCHAR -> TEXT is a catalog-only change on PostgreSQL.
+_POSTGRES_ENV_TEXT_COLUMNS = text(
+    "ALTER TABLE environments "
+    "ALTER COLUMN venv_path TYPE TEXT, "
+    "ALTER COLUMN index_url TYPE TEXT, "
+    "ALTER COLUMN extra_index_url TYPE TEXT"
+)
 
-    # Phase-4: users.first_login_complete
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'users' AND column_name = 'first_login_complete'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN first_login_complete BOOLEAN NOT NULL DEFAULT FALSE"
-        ))
-        logger.info("Migration: added first_login_complete column to users")
+# Run variables are JSONB (mirrors Alembic 6e2d8f4a1c93); the stored
+# values are `json.dumps` output, so the cast cannot fail.
+_POSTGRES_RUN_VARIABLES_JSONB = text(
+    "ALTER TABLE execution_runs "
+    "ALTER COLUMN variables TYPE JSONB USING variables::jsonb"
+)
 
-    # Story SECURITY-1: users.password_change_required
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'users' AND column_name = 'password_change_required'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN password_change_required BOOLEAN NOT NULL DEFAULT FALSE"
-        ))
-        logger.info("Migration: added password_change_required column to users")
+_POSTGRES_LOGIN_COVERING_INDEX = text(
+    "CREATE INDEX IF NOT EXISTS ix_users_email_login_covering ON users (email) "
+    "INCLUDE (id, hashed_password, is_active, role)"
+)
 
-    # Phase-4: repositories.team_id (nullable; FK enforced by Alembic migration, not here)
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'repositories' AND column_name = 'team_id'"
-    ))
-    if not result.fetchone():
-        conn.execute(text("ALTER TABLE repositories ADD COLUMN team_id INTEGER"))
-        logger.info("Migration: added team_id column to repositories")
 
-    # Story REPO-3: pre-run sync flag
-    result = conn.execute(text(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_name = 'repositories' AND column_name = 'pre_run_sync'"
-    ))
-    if not result.fetchone():
-        conn.execute(text(
-            "ALTER TABLE repositories ADD COLUMN pre_run_sync BOOLEAN DEFAULT FALSE"
-        ))
-        logger.info("Migration: added pre_run_sync column to repositories")
+def _migrate_postgres(conn) -> None:
+    """PostgreSQL migrations."""
+    # One catalog round-trip for every column the steps below probe.
+    existing = set(conn.execute(_POSTGRES_EXISTING_COLUMNS).fetchall())
+
+    if ("repositories", "repo_type") not in existing:
+        for stmt in _POSTGRES_ADD_REPO_TYPE:
+            conn.execute(stmt)
+        logger.info("Migration: added repo_type column, made git_url nullable")
+
+    for table, column, ddl in _POSTGRES_ADD_COLUMNS:
+        if (table, column) not in existing:
+            conn.execute(ddl)
+            logger.info("Migration: added %s column to %s", column, table)
+
+    # Covering index for the login lookup (mirrors Alembic e7c4a2b9d1f0)
+    conn.execute(_POSTGRES_LOGIN_COVERING_INDEX)
+    conn.execute(_POSTGRES_ENV_TEXT_COLUMNS)
+    conn.execute(_POSTGRES_RUN_VARIABLES_JSONB)
+    _ensure_env_pkg_unique_index(conn, _POSTGRES_ENV_PKG_UNIQUE_PROBE)
+    for stmt in _ENV_INDEX_STATEMENTS:
+        conn.execute(stmt)
 
 
 def drop_tables() -> None:
@@ -12,7 +12,11 @@ Everything that needs a Docker client should now do:
 
 `get_docker_client()` always returns a *pinged* client (or raises),
 so callers can use the result directly without re-checking
-connectivity.
+connectivity. The working client is kept for the life of the process
+and only re-pinged once it has been idle for
+`CLIENT_REVALIDATE_SECONDS`; the `docker context inspect` host is
+remembered too, so the fork/exec only happens when that host stops
+answering.
 """
 
 from __future__ import annotations
@@ -20,9 +24,18 @@ from __future__ import annotations
 import json
 import logging
 import subprocess
+import threading
+import time
 
 logger = logging.getLogger("roboscope.docker_client")
 
+CLIENT_REVALIDATE_SECONDS = 60.0
+
+_client_lock = threading.Lock()
+_cached_client = None
+_client_checked_at = 0.0
+_context_host: str | None = None
+
 
 class DockerNotAvailableError(RuntimeError):
     """Raised when the Docker daemon cannot be reached via either
@@ -66,34 +79,77 @@ def _resolve_context_host() -> str | None:
     return None
 
 
+def _ping_host(host: str):
+    """`DockerClient` for `host` if it answers a ping, else None."""
+    import docker
+
+    try:
+        client = docker.DockerClient(base_url=host)
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+def reset_docker_client() -> None:
+    """Forget the cached client and context host.
+
+    Call after an operation failed in a way that suggests the daemon
+    went away, so the next `get_docker_client()` starts from scratch.
+    """
+    global _cached_client, _client_checked_at, _context_host
+    with _client_lock:
+        _cached_client = None
+        _client_checked_at = 0.0
+        _context_host = None
+
+
 def get_docker_client():
     """Return a pinged `docker.DockerClient`.
 
-    Order of attempts:
+    A cached client is returned as-is if it was used within the last
+    `CLIENT_REVALIDATE_SECONDS`, otherwise it is re-pinged. Without a
+    usable cached client the order of attempts is:
       1. `docker.from_env()` (honours `DOCKER_HOST`, default
          `/var/run/docker.sock`, etc.).
       2. `docker.DockerClient(base_url=<context Host>)` for installs
          where `from_env()` can't find the socket — Rancher Desktop,
          Colima, Docker Desktop on macOS without `DOCKER_HOST` set.
+         The Host from an earlier discovery is tried first.
 
     Raises:
         DockerNotAvailableError — if both attempts fail or neither
         produces a client that can `ping()`. The original exception
         is chained.
     """
+    global _cached_client, _client_checked_at, _context_host
     import docker
 
-    try:
-        client = docker.from_env()
-        client.ping()
-        return client
-    except Exception as orig_err:
-        host = _resolve_context_host()
-        if host:
+    with _client_lock:
+        now = time.monotonic()
+        if _cached_client is not None:
+            if now - _client_checked_at < CLIENT_REVALIDATE_SECONDS:
+                _client_checked_at = now
+                return _cached_client
             try:
-                client = docker.DockerClient(base_url=host)
-                client.ping()
-                return client
+                _cached_client.ping()
+                _client_checked_at = now
+                return _cached_client
             except Exception:
+                _cached_client = None
+
+        try:
+            client = docker.from_env()
+            client.ping()
+        except Exception as orig_err:
+            client = _ping_host(_context_host) if _context_host else None
+            if client is None:
+                host = _resolve_context_host()
+                client = _ping_host(host) if host else None
+                _context_host = host if client is not None else None
+            if client is None:
                 raise DockerNotAvailableError() from orig_err
-        raise DockerNotAvailableError() from orig_err
+
+        _cached_client = client
+        _client_checked_at = now
+        return client
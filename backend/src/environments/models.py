@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base, TimestampMixin
@@ -16,7 +16,7 @@ class Environment(Base, TimestampMixin):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     python_version: Mapped[str] = mapped_column(String(20), default="3.12")
-    venv_path: Mapped[str | None] = mapped_column(String(500), default=None)
+    venv_path: Mapped[str | None] = mapped_column(Text, default=None)
     docker_image: Mapped[str | None] = mapped_column(String(500), default=None)
     docker_image_built_at: Mapped[datetime | None] = mapped_column(DateTime, default=None)
     packages_changed_at: Mapped[datetime | None] = mapped_column(DateTime, default=None)
@@ -24,11 +24,13 @@ class Environment(Base, TimestampMixin):
     max_docker_containers: Mapped[int] = mapped_column(Integer, default=1)
     is_default: Mapped[bool] = mapped_column(Boolean, default=False)
     description: Mapped[str | None] = mapped_column(Text, default=None)
-    index_url: Mapped[str | None] = mapped_column(String(500), default=None)
-    extra_index_url: Mapped[str | None] = mapped_column(String(500), default=None)
+    index_url: Mapped[str | None] = mapped_column(Text, default=None)
+    extra_index_url: Mapped[str | None] = mapped_column(Text, default=None)
     docker_build_status: Mapped[str | None] = mapped_column(String(20), default=None)
     docker_build_error: Mapped[str | None] = mapped_column(Text, default=None)
     docker_build_log: Mapped[str | None] = mapped_column(Text, default=None)
+    # SHA-256 of the Dockerfile `docker_image` was last built from
+    docker_image_hash: Mapped[str | None] = mapped_column(String(64), default=None)
     created_by: Mapped[int] = mapped_column(ForeignKey("users.id"))
 
 
@@ -36,10 +38,12 @@ class EnvironmentPackage(Base):
     """Installed package in an environment."""
 
     __tablename__ = "environment_packages"
+    # uq_env_pkg's index leads with environment_id, so it also serves
+    # per-environment scans; no separate single-column index is needed.
     __table_args__ = (UniqueConstraint("environment_id", "package_name", name="uq_env_pkg"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    environment_id: Mapped[int] = mapped_column(ForeignKey("environments.id", ondelete="CASCADE"), index=True)
+    environment_id: Mapped[int] = mapped_column(ForeignKey("environments.id", ondelete="CASCADE"))
     package_name: Mapped[str] = mapped_column(String(255))
     version: Mapped[str | None] = mapped_column(String(50), default=None)
     installed_version: Mapped[str | None] = mapped_column(String(50), default=None)
@@ -51,9 +55,11 @@ class EnvironmentVariable(Base):
     """Environment variable."""
 
     __tablename__ = "environment_variables"
+    # Serves both key lookups and the key-ordered listing per environment.
+    __table_args__ = (Index("ix_env_var_env_key", "environment_id", "key"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    environment_id: Mapped[int] = mapped_column(ForeignKey("environments.id", ondelete="CASCADE"), index=True)
+    environment_id: Mapped[int] = mapped_column(ForeignKey("environments.id", ondelete="CASCADE"))
     key: Mapped[str] = mapped_column(String(255))
     value: Mapped[str] = mapped_column(Text)
     is_secret: Mapped[bool] = mapped_column(Boolean, default=False)
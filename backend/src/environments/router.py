@@ -1,8 +1,12 @@
 """Environment management API endpoints."""
 
+import json
 import logging
+import shutil
+import subprocess
+import time
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import PlainTextResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -26,36 +30,80 @@ from src.environments.schemas import (
 )
 from src.environments.service import (
     add_package,
+    add_packages,
     add_variable,
+    cache_env_read,
     clone_environment,
     create_environment,
     delete_environment,
+    docker_image_tag,
+    docker_package_specs,
     generate_dockerfile,
+    get_cached_env_read,
     get_environment,
+    get_environment_package,
+    get_environment_with_packages,
+    get_environment_with_variables,
     get_keyword_cache,
     keyword_cache_is_fresh,
     list_environments,
-    list_packages,
-    list_variables,
     pip_list_installed,
     remove_package,
     search_pypi,
     update_environment,
 )
+from src.environments.tasks import (
+    _get_conflicting_browser_package,
+    _is_batteries_package,
+    _is_browser_package,
+    build_docker_image,
+    cleanup_venv,
+    create_venv,
+    install_packages,
+    introspect_keywords_task,
+    rfbrowser_init_task,
+)
+from src.environments.tasks import install_package as install_package_task
+from src.environments.tasks import uninstall_package as uninstall_package_task
+from src.environments.tasks import upgrade_package as upgrade_package_task
+from src.environments.venv_utils import (
+    PythonVersionError,
+    check_python_version_compatibility,
+    check_rfbrowser_initialized,
+    validate_python_version,
+)
 from src.task_executor import TaskDispatchError, dispatch_task
+from src.utc_response import UtcJSONResponse
 
 logger = logging.getLogger("roboscope.environments")
 
 router = APIRouter()
 
+# Columns copied verbatim from EnvironmentPackage rows into PackageResponse.
+_PACKAGE_RESPONSE_COLUMNS = tuple(
+    name for name in PackageResponse.model_fields if name in EnvironmentPackage.__table__.c
+)
+
 
 @router.get("", response_model=list[EnvResponse])
 def get_environments(
+    limit: int | None = Query(None, ge=1, le=200),
+    after_id: int | None = None,
     db: Session = Depends(get_db),
     _current_user: User = Depends(get_current_user),
 ):
-    """List all environments."""
-    return list_environments(db)
+    """List all environments.
+
+    Pass `limit` and/or `after_id` (the last id of the previous page) for
+    keyset pagination ordered by id; without them the full list is
+    returned ordered by name.
+    """
+    # Serialised here so FastAPI does not re-validate every row against
+    # `response_model`, which still documents the shape.
+    return UtcJSONResponse([
+        EnvResponse.model_validate(env).model_dump(mode="json")
+        for env in list_environments(db, limit=limit, after_id=after_id)
+    ])
 
 
 @router.post("", response_model=EnvResponse, status_code=status.HTTP_201_CREATED)
@@ -65,12 +113,6 @@ def add_environment(
     current_user: User = Depends(require_role(Role.EDITOR)),
 ):
     """Create a new environment."""
-    from src.environments.venv_utils import (
-        PythonVersionError,
-        check_python_version_compatibility,
-        validate_python_version,
-    )
-
     # Validate and normalize python version
     try:
         data.python_version = validate_python_version(data.python_version)
@@ -103,10 +145,10 @@ def setup_default_environment(
 ):
     """Create a default environment with essential Robot Framework libraries."""
     # Check if roboscope-default already exists
-    result = db.execute(
-        select(Environment).where(Environment.name == "roboscope-default")
-    )
-    if result.scalar_one_or_none() is not None:
+    already_exists = db.execute(
+        select(select(Environment.id).where(Environment.name == "roboscope-default").exists())
+    ).scalar()
+    if already_exists:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Default environment 'roboscope-default' already exists",
@@ -123,8 +165,7 @@ def setup_default_environment(
         current_user.id,
     )
 
-    for pkg_name in DEFAULT_RF_PACKAGES:
-        add_package(db, env.id, PackageCreate(package_name=pkg_name))
+    add_packages(db, env.id, list(DEFAULT_RF_PACKAGES))
 
     # Detect Docker availability and configure accordingly
     docker_available = _is_docker_available()
@@ -136,17 +177,9 @@ def setup_default_environment(
 
     # Dispatch venv creation first, then package installs (FIFO queue)
     try:
-        from src.environments.tasks import (
-            build_docker_image,
-            create_venv,
-        )
-        from src.environments.tasks import (
-            install_package as install_package_task,
-        )
-
         dispatch_task(create_venv, env.id)
-        for pkg_name in DEFAULT_RF_PACKAGES:
-            dispatch_task(install_package_task, env.id, pkg_name, None)
+        # One task, one resolver run for all default packages
+        dispatch_task(install_packages, env.id, list(DEFAULT_RF_PACKAGES))
 
         # If Docker is available, queue a Docker image build after packages
         if docker_available:
@@ -157,12 +190,35 @@ def setup_default_environment(
     return env
 
 
+# Last Docker probe as (available, probed_at). A positive answer holds for
+# the life of the process; a negative one is re-probed after
+# `_DOCKER_RETRY_SECONDS`, so a daemon started (or a binary installed)
+# after the backend is picked up without a restart.
+_DOCKER_RETRY_SECONDS = 30.0
+_docker_probe: tuple[bool, float] | None = None
+
+
 def _is_docker_available() -> bool:
-    """Check if Docker is available on this system."""
-    import subprocess as _sp
+    """Check if Docker is available on this system.
 
+    A missing binary is ruled out without forking, and the ``docker info``
+    round-trip (up to 5s) is not repeated while the last answer holds.
+    """
+    global _docker_probe
+    now = time.monotonic()
+    probe = _docker_probe
+    if probe is not None and (probe[0] or now - probe[1] < _DOCKER_RETRY_SECONDS):
+        return probe[0]
+    available = _probe_docker()
+    _docker_probe = (available, now)
+    return available
+
+
+def _probe_docker() -> bool:
+    if shutil.which("docker") is None:
+        return False
     try:
-        result = _sp.run(
+        result = subprocess.run(
             ["docker", "info"],
             capture_output=True,
             timeout=5,
@@ -179,10 +235,16 @@ def get_env(
     _current_user: User = Depends(get_current_user),
 ):
     """Get environment details."""
-    env = get_environment(db, env_id)
-    if env is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
-    return env
+    payload = get_cached_env_read("env", env_id)
+    if payload is None:
+        env = get_environment(db, env_id)
+        if env is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found",
+            )
+        payload = EnvResponse.model_validate(env).model_dump(mode="json")
+        cache_env_read("env", env_id, payload)
+    return UtcJSONResponse(payload)
 
 
 @router.patch("/{env_id}", response_model=EnvResponse)
@@ -209,7 +271,13 @@ def remove_env(
     env = get_environment(db, env_id)
     if env is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
-    delete_environment(db, env)
+    trash = delete_environment(db, env)
+    if trash is not None:
+        try:
+            dispatch_task(cleanup_venv, str(trash))
+        except TaskDispatchError as e:
+            logger.warning("Failed to dispatch venv cleanup, removing inline: %s", e)
+            shutil.rmtree(trash, ignore_errors=True)
 
 
 @router.post("/{env_id}/clone", response_model=EnvResponse, status_code=status.HTTP_201_CREATED)
@@ -236,29 +304,23 @@ def get_dockerfile(
     _current_user: User = Depends(require_role(Role.EDITOR)),
 ):
     """Generate and return a Dockerfile for this environment."""
-    env = get_environment(db, env_id)
+    env, packages = get_environment_with_packages(db, env_id)
     if env is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
 
-    packages = list_packages(db, env_id)
     if not packages:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Environment has no packages",
         )
 
-    pkg_specs = []
-    for pkg in packages:
-        if pkg.version:
-            pkg_specs.append(f"{pkg.package_name}=={pkg.version}")
-        else:
-            pkg_specs.append(pkg.package_name)
+    pkg_specs = docker_package_specs([(pkg.package_name, pkg.version) for pkg in packages])
 
     content = generate_dockerfile(
         python_version=env.python_version or "3.12",
         packages=pkg_specs,
     )
-    return PlainTextResponse(content)
+    return content
 
 
 @router.post("/{env_id}/docker-build")
@@ -268,25 +330,17 @@ def docker_build(
     _current_user: User = Depends(require_package_op("docker_build")),
 ):
     """Build a Docker image for this environment."""
-    env = get_environment(db, env_id)
+    env, packages = get_environment_with_packages(db, env_id)
     if env is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
 
-    packages = list_packages(db, env_id)
     if not packages:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Environment has no packages",
         )
 
-    db.commit()
-
-    safe_name = env.name.lower().replace(" ", "-")
-    image_tag = f"roboscope/{safe_name}:latest"
-
     try:
-        from src.environments.tasks import build_docker_image
-
         dispatch_task(build_docker_image, env_id)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch Docker build: %s", e)
@@ -295,7 +349,7 @@ def docker_build(
             detail=f"Task dispatch failed: {e}",
         )
 
-    return {"status": "building", "image_tag": image_tag}
+    return {"status": "building", "image_tag": docker_image_tag(env.name)}
 
 
 @router.post("/{env_id}/docker-build-dismiss")
@@ -363,21 +417,26 @@ POPULAR_RF_LIBRARIES = [
     {"name": "rpaframework", "description": "RPA libraries collection"},
 ]
 
+# The list never changes at runtime, so encode it once at import.
+_POPULAR_RF_LIBRARIES_JSON = json.dumps(POPULAR_RF_LIBRARIES, separators=(",", ":")).encode("utf-8")
+
 
 @router.get("/packages/popular")
 def get_popular_packages(
     _current_user: User = Depends(get_current_user),
 ):
     """Get list of popular Robot Framework libraries."""
-    return POPULAR_RF_LIBRARIES
+    return Response(content=_POPULAR_RF_LIBRARIES_JSON, media_type="application/json")
 
 
 @router.get("/packages/search", response_model=list[PyPISearchResult])
 def search_packages(
+    response: Response,
     q: str = Query(..., min_length=2, max_length=100),
     _current_user: User = Depends(get_current_user),
 ):
     """Search PyPI for packages."""
+    response.headers["Cache-Control"] = "private, max-age=300"
     return search_pypi(q)
 
 
@@ -388,39 +447,56 @@ def get_packages(
     _current_user: User = Depends(get_current_user),
 ):
     """List packages in an environment."""
-    env = get_environment(db, env_id)
-    if env is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
-
-    packages = list_packages(db, env_id)
-
+    cached = get_cached_env_read("packages", env_id)
+    if cached is None:
+        env, packages = get_environment_with_packages(db, env_id)
+        if env is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found",
+            )
+        rows = [
+            PackageResponse.model_construct(
+                **{name: getattr(p, name) for name in _PACKAGE_RESPONSE_COLUMNS}
+            ).model_dump(mode="json")
+            for p in packages
+        ]
+        cached = (env.venv_path, rows)
+        cache_env_read("packages", env_id, cached)
+    venv_path, rows = cached
+    return UtcJSONResponse(_with_rfbrowser_status(rows, venv_path))
+
+
+def _with_rfbrowser_status(rows: list[dict], venv_path: str | None) -> list[dict]:
+    """Add the rfbrowser init status to package rows.
+
+    Read from the venv on every call: `rfbrowser init` changes it without
+    a DB write, so it is never part of the cached rows.
+    """
     # Check rfbrowser init status for standard browser package
-    from src.environments.tasks import _is_batteries_package, _is_browser_package
-    from src.environments.venv_utils import check_rfbrowser_initialized
-
     has_standard_browser = any(
-        _is_browser_package(p.package_name) and p.install_status == "installed"
-        for p in packages
+        _is_browser_package(row["package_name"]) and row["install_status"] == "installed"
+        for row in rows
     )
     rfbrowser_ok = (
-        check_rfbrowser_initialized(env.venv_path)
-        if has_standard_browser and env.venv_path
+        check_rfbrowser_initialized(venv_path)
+        if has_standard_browser and venv_path
         else False
     )
 
     results = []
-    for p in packages:
-        resp = PackageResponse.model_validate(p)
-        if p.install_status == "installed":
-            if _is_browser_package(p.package_name):
+    for row in rows:
+        if row["install_status"] == "installed":
+            if _is_browser_package(row["package_name"]):
                 # Standard browser needs rfbrowser init
-                resp.rfbrowser_status = "ok" if rfbrowser_ok else "needed"
-                resp.needs_rfbrowser_init = not rfbrowser_ok
-            elif _is_batteries_package(p.package_name):
+                row = {
+                    **row,
+                    "rfbrowser_status": "ok" if rfbrowser_ok else "needed",
+                    "needs_rfbrowser_init": not rfbrowser_ok,
+                }
+            elif _is_batteries_package(row["package_name"]):
                 # Batteries variant is self-contained — always ok
-                resp.rfbrowser_status = "ok"
-        results.append(resp)
-
+                row = {**row, "rfbrowser_status": "ok"}
+        results.append(row)
     return results
 
 
@@ -473,8 +549,6 @@ def get_environment_keywords(
     returns the current (possibly stale or empty) cache with status
     ``building`` so the caller can render what's there and poll for the rest.
     """
-    import json
-
     env = get_environment(db, env_id)
     if env is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
@@ -512,7 +586,6 @@ def get_environment_keywords(
             cache.status = "building"
         cache.updated_at = now  # stamp the dispatch so the in-flight guard works
         db.commit()
-        from src.environments.tasks import introspect_keywords_task
         try:
             dispatch_task(introspect_keywords_task, env_id)
         except TaskDispatchError:
@@ -539,7 +612,6 @@ def install_package(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
 
     # Check for conflicting Browser library variants
-    from src.environments.tasks import _get_conflicting_browser_package
     conflict = _get_conflicting_browser_package(env_id, data.package_name, db)
     if conflict:
         raise HTTPException(
@@ -556,9 +628,7 @@ def install_package(
 
     # Trigger async installation
     try:
-        from src.environments.tasks import install_package
-
-        dispatch_task(install_package, env_id, data.package_name, data.version)
+        dispatch_task(install_package_task, env_id, data.package_name, data.version)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch package install: %s", e)
         raise HTTPException(
@@ -577,17 +647,9 @@ def upgrade_package(
     _current_user: User = Depends(require_package_op("upgrade")),
 ):
     """Upgrade a package to its latest version."""
-    env = get_environment(db, env_id)
+    env, pkg = get_environment_package(db, env_id, package_name)
     if env is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
-
-    # Find existing package record
-    pkg = db.execute(
-        select(EnvironmentPackage).where(
-            EnvironmentPackage.environment_id == env_id,
-            EnvironmentPackage.package_name == package_name,
-        )
-    ).scalars().first()
     if pkg is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Package not found")
 
@@ -596,9 +658,7 @@ def upgrade_package(
     db.commit()
 
     try:
-        from src.environments.tasks import upgrade_package
-
-        dispatch_task(upgrade_package, env_id, package_name)
+        dispatch_task(upgrade_package_task, env_id, package_name)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch package upgrade: %s", e)
         raise HTTPException(
@@ -617,16 +677,9 @@ def retry_package_install(
     _current_user: User = Depends(require_package_op("install")),
 ):
     """Retry a failed package installation."""
-    env = get_environment(db, env_id)
+    env, pkg = get_environment_package(db, env_id, package_name)
     if env is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
-
-    pkg = db.execute(
-        select(EnvironmentPackage).where(
-            EnvironmentPackage.environment_id == env_id,
-            EnvironmentPackage.package_name == package_name,
-        )
-    ).scalars().first()
     if pkg is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Package not found")
 
@@ -635,8 +688,6 @@ def retry_package_install(
     db.commit()
 
     try:
-        from src.environments.tasks import install_package as install_package_task
-
         dispatch_task(install_package_task, env_id, package_name, pkg.version)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch package retry: %s", e)
@@ -661,7 +712,6 @@ def run_rfbrowser_init(
     if not env.venv_path:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No venv configured")
 
-    from src.environments.tasks import _is_browser_package
     # Find the browser package record
     installed_packages = db.execute(
         select(EnvironmentPackage).where(
@@ -680,7 +730,6 @@ def run_rfbrowser_init(
         )
 
     try:
-        from src.environments.tasks import rfbrowser_init_task
         dispatch_task(rfbrowser_init_task, env_id)
     except TaskDispatchError as e:
         raise HTTPException(
@@ -705,9 +754,7 @@ def uninstall_package(
     remove_package(db, env_id, package_name)
 
     try:
-        from src.environments.tasks import uninstall_package
-
-        dispatch_task(uninstall_package, env_id, package_name)
+        dispatch_task(uninstall_package_task, env_id, package_name)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch package uninstall: %s", e)
         raise HTTPException(
@@ -726,15 +773,19 @@ def get_variables(
     _current_user: User = Depends(get_current_user),
 ):
     """List variables in an environment."""
-    env = get_environment(db, env_id)
-    if env is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found")
-    variables = list_variables(db, env_id)
-    # Mask secret values
-    for var in variables:
-        if var.is_secret:
-            var.value = "********"
-    return variables
+    payload = get_cached_env_read("variables", env_id)
+    if payload is None:
+        env, variables = get_environment_with_variables(db, env_id)
+        if env is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found",
+            )
+        # Secret values are already masked by the query
+        payload = [
+            EnvVarResponse.model_construct(**var).model_dump(mode="json") for var in variables
+        ]
+        cache_env_read("variables", env_id, payload)
+    return UtcJSONResponse(payload)
 
 
 @router.post("/{env_id}/variables", response_model=EnvVarResponse, status_code=status.HTTP_201_CREATED)
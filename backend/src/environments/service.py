@@ -1,16 +1,29 @@
 """Environment management service."""
 
+import atexit
+import bisect
+import functools
+import importlib.util
 import json
 import logging
 import shutil
 import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 import httpx
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, delete, event, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, object_session
 
 from src.config import settings
+from src.database import on_transaction_end
 from src.environments.models import (
     Environment,
     EnvironmentKeywordCache,
@@ -22,16 +35,106 @@ from src.environments.schemas import EnvCreate, EnvUpdate, EnvVarCreate, Package
 logger = logging.getLogger("roboscope.environments")
 
 
-def list_environments(db: Session) -> list[Environment]:
-    """List all environments."""
-    result = db.execute(select(Environment).order_by(Environment.name))
-    return list(result.scalars().all())
+# Short-TTL cache for the read-heavy per-environment GET endpoints
+# (details, packages, variables), keyed by (kind, env_id) and holding
+# DB-derived response payloads only — filesystem-derived state such as
+# the rfbrowser init status is computed per request. Writes to an
+# environment, its packages or variables evict the cache once the
+# writing transaction ends: ORM unit-of-work writes drop that
+# environment's entries, bulk statements drop everything (see
+# `_evict_env_reads` / `_evict_env_bulk_writes`). The TTL bounds writes
+# made by other worker processes.
+ENV_READ_CACHE_TTL = 10.0
+_ENV_READ_CACHE_MAX = 512
+_env_read_cache: dict[tuple[str, int], tuple[float, Any]] = {}
+_env_read_cache_lock = threading.Lock()
+_ENV_CACHED_MAPPERS = frozenset(
+    m.__mapper__ for m in (Environment, EnvironmentPackage, EnvironmentVariable)
+)
+
+
+def get_cached_env_read(kind: str, env_id: int) -> Any | None:
+    """Return a fresh cached response for `(kind, env_id)`, if any."""
+    with _env_read_cache_lock:
+        entry = _env_read_cache.get((kind, env_id))
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def cache_env_read(kind: str, env_id: int, value: Any) -> None:
+    """Store a built response for `(kind, env_id)`."""
+    with _env_read_cache_lock:
+        if len(_env_read_cache) >= _ENV_READ_CACHE_MAX:
+            _env_read_cache.clear()
+        _env_read_cache[(kind, env_id)] = (time.monotonic() + ENV_READ_CACHE_TTL, value)
+
+
+def clear_env_read_cache() -> None:
+    """Drop every cached environment read."""
+    with _env_read_cache_lock:
+        _env_read_cache.clear()
+
+
+def _evict_env_id(env_id: int) -> None:
+    with _env_read_cache_lock:
+        for key in [k for k in _env_read_cache if k[1] == env_id]:
+            del _env_read_cache[key]
+
+
+@event.listens_for(Environment, "after_insert")
+@event.listens_for(Environment, "after_update")
+@event.listens_for(Environment, "after_delete")
+@event.listens_for(EnvironmentPackage, "after_insert")
+@event.listens_for(EnvironmentPackage, "after_update")
+@event.listens_for(EnvironmentPackage, "after_delete")
+@event.listens_for(EnvironmentVariable, "after_insert")
+@event.listens_for(EnvironmentVariable, "after_update")
+@event.listens_for(EnvironmentVariable, "after_delete")
+def _evict_env_reads(mapper, connection, target) -> None:
+    env_id = target.id if isinstance(target, Environment) else target.environment_id
+    session = object_session(target)
+    if session is None:
+        _evict_env_id(env_id)
+    else:
+        on_transaction_end(session, ("env", env_id), functools.partial(_evict_env_id, env_id))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _evict_env_bulk_writes(orm_execute_state) -> None:
+    # Bulk INSERT/UPDATE/DELETE statements bypass the mapper events above
+    if (
+        (orm_execute_state.is_insert or orm_execute_state.is_update
+         or orm_execute_state.is_delete)
+        and orm_execute_state.bind_mapper in _ENV_CACHED_MAPPERS
+    ):
+        on_transaction_end(orm_execute_state.session, ("env", None), clear_env_read_cache)
+
+
+def list_environments(
+    db: Session, limit: int | None = None, after_id: int | None = None,
+) -> list[Environment]:
+    """List environments.
+
+    Without `limit`/`after_id` every environment is returned, ordered by
+    name. With either set, pages by keyset instead (`id > after_id ORDER
+    BY id LIMIT limit`) — an index seek rather than a full scan.
+    """
+    if limit is None and after_id is None:
+        stmt = select(Environment).order_by(Environment.name)
+    else:
+        stmt = select(Environment).order_by(Environment.id)
+        if after_id is not None:
+            stmt = stmt.where(Environment.id > after_id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+    return list(db.execute(stmt).scalars().all())
 
 
 def get_environment(db: Session, env_id: int) -> Environment | None:
     """Get an environment by ID."""
-    result = db.execute(select(Environment).where(Environment.id == env_id))
-    return result.scalar_one_or_none()
+    # Identity-map hit first; only falls through to a SELECT on a miss.
+    return db.get(Environment, env_id)
 
 
 def create_environment(db: Session, data: EnvCreate, user_id: int) -> Environment:
@@ -77,28 +180,33 @@ def update_environment(db: Session, env: Environment, data: EnvUpdate) -> Enviro
     return env
 
 
-def delete_environment(db: Session, env: Environment) -> None:
-    """Delete an environment and its venv."""
+def delete_environment(db: Session, env: Environment) -> Path | None:
+    """Delete an environment and detach its venv.
+
+    The venv directory is only renamed out of the way (cheap and atomic);
+    the returned path is left for the caller to remove in the background,
+    since ``rmtree`` on a full venv walks tens of thousands of files.
+    """
+    trash = None
     if env.venv_path:
         venv_path = Path(env.venv_path)
         if venv_path.exists():
-            shutil.rmtree(venv_path, ignore_errors=True)
-
-    # Delete related packages and variables
-    packages = db.execute(
-        select(EnvironmentPackage).where(EnvironmentPackage.environment_id == env.id)
-    )
-    for pkg in packages.scalars().all():
-        db.delete(pkg)
+            trash = venv_path.with_name(f"{venv_path.name}.deleting-{uuid.uuid4().hex}")
+            try:
+                venv_path.rename(trash)
+            except OSError:
+                logger.warning("Could not rename venv %s, removing in place", venv_path)
+                shutil.rmtree(venv_path, ignore_errors=True)
+                trash = None
 
-    variables = db.execute(
-        select(EnvironmentVariable).where(EnvironmentVariable.environment_id == env.id)
-    )
-    for var in variables.scalars().all():
-        db.delete(var)
+    # Delete related packages and variables with one statement each. The
+    # FKs declare ON DELETE CASCADE, but SQLite runs with foreign_keys off.
+    db.execute(delete(EnvironmentPackage).where(EnvironmentPackage.environment_id == env.id))
+    db.execute(delete(EnvironmentVariable).where(EnvironmentVariable.environment_id == env.id))
 
     db.delete(env)
     db.flush()
+    return trash
 
 
 def clone_environment(db: Session, env: Environment, new_name: str, user_id: int) -> Environment:
@@ -117,29 +225,29 @@ def clone_environment(db: Session, env: Environment, new_name: str, user_id: int
         user_id,
     )
 
-    # Copy packages
-    packages = list_packages(db, env.id)
-    for pkg in packages:
-        new_pkg = EnvironmentPackage(
-            environment_id=new_env.id,
-            package_name=pkg.package_name,
-            version=pkg.version,
+    # Copy packages and variables server-side (INSERT ... SELECT); the
+    # stored values are copied as-is, so secrets stay encrypted.
+    db.execute(
+        insert(EnvironmentPackage).from_select(
+            ["environment_id", "package_name", "version"],
+            select(
+                literal(new_env.id),
+                EnvironmentPackage.package_name,
+                EnvironmentPackage.version,
+            ).where(EnvironmentPackage.environment_id == env.id),
         )
-        db.add(new_pkg)
-
-    # Copy variables
-    variables = list_variables(db, env.id)
-    for var in variables:
-        new_var = EnvironmentVariable(
-            environment_id=new_env.id,
-            key=var.key,
-            value=var.value,
-            is_secret=var.is_secret,
+    )
+    db.execute(
+        insert(EnvironmentVariable).from_select(
+            ["environment_id", "key", "value", "is_secret"],
+            select(
+                literal(new_env.id),
+                EnvironmentVariable.key,
+                EnvironmentVariable.value,
+                EnvironmentVariable.is_secret,
+            ).where(EnvironmentVariable.environment_id == env.id),
         )
-        db.add(new_var)
-
-    db.flush()
-    db.refresh(new_env)
+    )
     return new_env
 
 
@@ -152,14 +260,63 @@ def list_packages(db: Session, env_id: int) -> list[EnvironmentPackage]:
     Automatically resets stuck packages (pending/installing with no active task)
     to 'failed' so the UI doesn't show a perpetual spinner.
     """
-    from src.environments.tasks import is_package_task_active
-
     result = db.execute(
         select(EnvironmentPackage)
         .where(EnvironmentPackage.environment_id == env_id)
         .order_by(EnvironmentPackage.package_name)
     )
     packages = list(result.scalars().all())
+    _reset_stuck_packages(db, env_id, packages)
+    return packages
+
+
+def get_environment_with_packages(
+    db: Session, env_id: int,
+) -> tuple[Environment | None, list[EnvironmentPackage]]:
+    """Load an environment and its packages in a single round-trip.
+
+    Same semantics as `get_environment` followed by `list_packages`,
+    fused into one LEFT JOIN. Returns `(None, [])` if the environment
+    does not exist.
+    """
+    rows = db.execute(
+        select(Environment, EnvironmentPackage)
+        .outerjoin(EnvironmentPackage, EnvironmentPackage.environment_id == Environment.id)
+        .where(Environment.id == env_id)
+        .order_by(EnvironmentPackage.package_name)
+    ).all()
+    if not rows:
+        return None, []
+    packages = [pkg for _, pkg in rows if pkg is not None]
+    _reset_stuck_packages(db, env_id, packages)
+    return rows[0][0], packages
+
+
+def get_environment_package(
+    db: Session, env_id: int, package_name: str,
+) -> tuple[Environment | None, EnvironmentPackage | None]:
+    """Load an environment and one of its packages in a single round-trip."""
+    row = db.execute(
+        select(Environment, EnvironmentPackage)
+        .outerjoin(
+            EnvironmentPackage,
+            and_(
+                EnvironmentPackage.environment_id == Environment.id,
+                EnvironmentPackage.package_name == package_name,
+            ),
+        )
+        .where(Environment.id == env_id)
+        .limit(1)
+    ).first()
+    if row is None:
+        return None, None
+    return row[0], row[1]
+
+
+def _reset_stuck_packages(
+    db: Session, env_id: int, packages: list[EnvironmentPackage],
+) -> None:
+    from src.environments.tasks import is_package_task_active
 
     dirty = False
     for pkg in packages:
@@ -175,8 +332,6 @@ def list_packages(db: Session, env_id: int) -> list[EnvironmentPackage]:
     if dirty:
         db.commit()
 
-    return packages
-
 
 def add_package(db: Session, env_id: int, data: PackageCreate) -> EnvironmentPackage:
     """Add a package to an environment.
@@ -186,51 +341,104 @@ def add_package(db: Session, env_id: int, data: PackageCreate) -> EnvironmentPac
     creating a duplicate row — which would cause MultipleResultsFound errors
     in subsequent retry/upgrade queries.
     """
-    existing = db.execute(
-        select(EnvironmentPackage).where(
-            EnvironmentPackage.environment_id == env_id,
-            EnvironmentPackage.package_name == data.package_name,
-        )
-    ).scalars().first()
-
-    if existing is not None:
-        existing.version = data.version
-        existing.install_status = "pending"
-        existing.install_error = None
-        existing.installed_version = None
-        db.flush()
-        db.refresh(existing)
-        return existing
-
-    pkg = EnvironmentPackage(
+    # One INSERT ... ON CONFLICT DO UPDATE ... RETURNING instead of a
+    # SELECT followed by an UPDATE or INSERT and a refresh.
+    dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = dialect_insert(EnvironmentPackage).values(
         environment_id=env_id,
         package_name=data.package_name,
         version=data.version,
+        install_status="pending",
     )
-    db.add(pkg)
-    db.flush()
-    db.refresh(pkg)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EnvironmentPackage.environment_id, EnvironmentPackage.package_name],
+        set_={
+            "version": stmt.excluded.version,
+            "install_status": "pending",
+            "install_error": None,
+            "installed_version": None,
+        },
+    ).returning(EnvironmentPackage)
+    pkg = db.scalars(stmt, execution_options={"populate_existing": True}).one()
     return pkg
 
 
-def remove_package(db: Session, env_id: int, package_name: str) -> None:
-    """Remove a package from an environment."""
-    # Use .all() defensively: the unique constraint guarantees at most one row,
-    # but pre-migration databases may still have duplicates that need cleaning up.
-    pkgs = db.execute(
-        select(EnvironmentPackage).where(
+def add_packages(db: Session, env_id: int, package_names: list[str]) -> None:
+    """Add unpinned packages to a freshly created environment in one INSERT.
+
+    Unlike `add_package` there is no existing-row check: only call this
+    for an environment that has no packages yet.
+    """
+    if not package_names:
+        return
+    db.execute(
+        insert(EnvironmentPackage),
+        [{"environment_id": env_id, "package_name": name} for name in package_names],
+    )
+
+
+def remove_package(db: Session, env_id: int, package_name: str) -> bool:
+    """Remove a package from an environment.
+
+    One DELETE; it also clears any duplicates a pre-migration database may
+    still hold. Returns whether a row was removed.
+    """
+    result = db.execute(
+        delete(EnvironmentPackage).where(
             EnvironmentPackage.environment_id == env_id,
             EnvironmentPackage.package_name == package_name,
         )
-    ).scalars().all()
-    for pkg in pkgs:
-        db.delete(pkg)
-    db.flush()
+    )
+    return result.rowcount > 0
 
 
 # --- Variables ---
 
 
+SECRET_MASK = "********"
+
+
+def get_environment_with_variables(
+    db: Session, env_id: int,
+) -> tuple[Environment | None, list[dict]]:
+    """Load an environment and its variables (ordered by key) in one round-trip.
+
+    Variables come back as plain column dicts with secret values masked
+    by a CASE in the SELECT itself — the ciphertext never leaves the
+    database and no ORM instance is loaded (or dirtied) for them.
+    """
+    rows = db.execute(
+        select(
+            Environment,
+            EnvironmentVariable.id,
+            EnvironmentVariable.environment_id,
+            EnvironmentVariable.key,
+            case(
+                (EnvironmentVariable.is_secret, literal(SECRET_MASK)),
+                else_=EnvironmentVariable.value,
+            ).label("value"),
+            EnvironmentVariable.is_secret,
+        )
+        .outerjoin(EnvironmentVariable, EnvironmentVariable.environment_id == Environment.id)
+        .where(Environment.id == env_id)
+        .order_by(EnvironmentVariable.key)
+    ).all()
+    if not rows:
+        return None, []
+    variables = [
+        {
+            "id": row.id,
+            "environment_id": row.environment_id,
+            "key": row.key,
+            "value": row.value,
+            "is_secret": row.is_secret,
+        }
+        for row in rows
+        if row.id is not None
+    ]
+    return rows[0][0], variables
+
+
 def list_variables(db: Session, env_id: int) -> list[EnvironmentVariable]:
     """List variables in an environment."""
     result = db.execute(
@@ -273,64 +481,202 @@ def decrypt_variable_value(var: EnvironmentVariable) -> str:
 
 def _unset_defaults(db: Session) -> None:
     """Unset all default environments."""
-    result = db.execute(
-        select(Environment).where(Environment.is_default == True)
+    # One UPDATE; in-session instances are synchronised by the ORM.
+    db.execute(
+        update(Environment).where(Environment.is_default.is_(True)).values(is_default=False)
     )
-    for env in result.scalars().all():
-        env.is_default = False
 
 
 # --- PyPI ---
 
 
+# PyPI lookups are slow network round-trips and users re-type the same
+# prefixes, so results are memoised per normalised query for
+# `_PYPI_SEARCH_CACHE_TTL` seconds. Failed lookups, including non-200
+# answers from PyPI, are not cached.
+_PYPI_SEARCH_CACHE_MAX = 1024
+_PYPI_SEARCH_CACHE_TTL = 300.0
+_pypi_search_cache: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+_pypi_search_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class _PyPIProjectIndex:
+    """Searchable snapshot of the PyPI project list.
+
+    Names are sorted by their lowercase form, so prefix hits are a
+    `bisect` slice. Substring hits scan one newline-joined blob of the
+    lowercase names with `str.find` (C speed) and map each hit back to
+    its name through the `offsets` table.
+    """
+
+    lowers: list[str]
+    names: list[str]
+    blob: str
+    offsets: list[int]
+
+    @classmethod
+    def build(cls, names: list[str]) -> "_PyPIProjectIndex":
+        pairs = sorted((name.lower(), name) for name in names if name)
+        lowers = [lower for lower, _ in pairs]
+        offsets = []
+        pos = 0
+        for lower in lowers:
+            offsets.append(pos)
+            pos += len(lower) + 1
+        return cls(lowers, [name for _, name in pairs], "\n".join(lowers), offsets)
+
+    def match(self, query_lower: str, limit: int) -> list[str]:
+        """Names containing `query_lower`: prefix hits first, then the rest."""
+        if not query_lower or "\n" in query_lower:
+            return []
+        lo = bisect.bisect_left(self.lowers, query_lower)
+        hi = bisect.bisect_right(self.lowers, query_lower + "\uffff", lo)
+        found = list(range(lo, min(hi, lo + limit)))
+        start = 0
+        while len(found) < limit:
+            pos = self.blob.find(query_lower, start)
+            if pos < 0:
+                break
+            i = bisect.bisect_right(self.offsets, pos) - 1
+            if not lo <= i < hi:
+                found.append(i)
+            start = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self.blob)
+        return [self.names[i] for i in found]
+
+
+# The PyPI simple index lists every project (~15 MB of JSON). It is kept
+# in memory as a `_PyPIProjectIndex` and revalidated with a conditional
+# GET once `_PYPI_INDEX_TTL` seconds have passed since the last check;
+# a 304 keeps the parsed copy. State is (checked_at, etag, last_modified,
+# index).
+_PYPI_SIMPLE_URL = "https://pypi.org/simple/"
+_PYPI_INDEX_TTL = 3600.0
+_EMPTY_PYPI_INDEX = _PyPIProjectIndex([], [], "", [])
+_pypi_index: tuple[float, str | None, str | None, _PyPIProjectIndex] | None = None
+_pypi_index_lock = threading.Lock()
+
+
+def clear_pypi_search_cache() -> None:
+    """Drop every memoised PyPI search result and the cached project index."""
+    global _pypi_index
+    with _pypi_search_cache_lock:
+        _pypi_search_cache.clear()
+    with _pypi_index_lock:
+        _pypi_index = None
+
+
+def _pypi_project_index(client: httpx.Client) -> tuple[_PyPIProjectIndex, bool]:
+    """Return the searchable PyPI project list, fetching it if stale.
+
+    The flag is False when PyPI answered with an error; the last good
+    index (or an empty one) is returned so the search still answers.
+    """
+    global _pypi_index
+    # Held across the download so concurrent searches share one fetch
+    with _pypi_index_lock:
+        now = time.monotonic()
+        cached = _pypi_index
+        if cached is not None and now - cached[0] < _PYPI_INDEX_TTL:
+            return cached[3], True
+
+        headers = {"Accept": "application/vnd.pypi.simple.v1+json"}
+        if cached is not None:
+            if cached[1]:
+                headers["If-None-Match"] = cached[1]
+            if cached[2]:
+                headers["If-Modified-Since"] = cached[2]
+        response = client.get(_PYPI_SIMPLE_URL, headers=headers)
+
+        if response.status_code == 304 and cached is not None:
+            _pypi_index = (now, cached[1], cached[2], cached[3])
+            return cached[3], True
+        if response.status_code != 200:
+            return (cached[3] if cached is not None else _EMPTY_PYPI_INDEX), False
+
+        index = _PyPIProjectIndex.build(
+            [p.get("name", "") for p in response.json().get("projects", [])]
+        )
+        _pypi_index = (
+            now, response.headers.get("ETag"), response.headers.get("Last-Modified"), index,
+        )
+        return index, True
+
+
+@functools.lru_cache(maxsize=1)
+def _pypi_client() -> httpx.Client:
+    """Process-wide PyPI client, so searches reuse pooled keep-alive connections.
+
+    HTTP/2 is negotiated only when the optional `h2` package is installed.
+    """
+    client = httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=10.0,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+    atexit.register(client.close)
+    return client
+
+
 def search_pypi(query: str) -> list[dict]:
     """Search PyPI for packages using the JSON API."""
+    key = query.strip().lower()
+    now = time.monotonic()
+    with _pypi_search_cache_lock:
+        entry = _pypi_search_cache.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _pypi_search_cache.move_to_end(key)
+                return [dict(r) for r in entry[1]]
+            del _pypi_search_cache[key]
+
     results = []
+    upstream_failed = False
     try:
-        with httpx.Client(timeout=10.0) as client:
-            # PyPI doesn't have a search API anymore, use the simple JSON endpoint
-            # Search by trying exact match first, then fall back to warehouse search
-            response = client.get(
-                f"https://pypi.org/pypi/{query}/json",
-            )
-            if response.status_code == 200:
-                data = response.json()
-                info = data.get("info", {})
-                results.append({
-                    "name": info.get("name", query),
-                    "version": info.get("version", ""),
-                    "summary": info.get("summary", ""),
-                    "author": info.get("author", ""),
-                })
-
-            # Also search for robotframework-related packages if query is short
-            if len(query) >= 2:
-                search_response = client.get(
-                    "https://pypi.org/simple/",
-                    headers={"Accept": "application/vnd.pypi.simple.v1+json"},
-                )
-                if search_response.status_code == 200:
-                    data = search_response.json()
-                    projects = data.get("projects", [])
-                    query_lower = query.lower()
-                    matched = [
-                        p for p in projects
-                        if query_lower in p.get("name", "").lower()
-                    ][:20]
-
-                    for proj in matched:
-                        name = proj.get("name", "")
-                        if not any(r["name"] == name for r in results):
-                            results.append({
-                                "name": name,
-                                "version": "",
-                                "summary": "",
-                                "author": "",
-                            })
+        client = _pypi_client()
+        # PyPI doesn't have a search API anymore, use the simple JSON endpoint
+        # Search by trying exact match first, then fall back to warehouse search
+        response = client.get(
+            f"https://pypi.org/pypi/{query}/json",
+        )
+        if response.status_code == 200:
+            data = response.json()
+            info = data.get("info", {})
+            results.append({
+                "name": info.get("name", query),
+                "version": info.get("version", ""),
+                "summary": info.get("summary", ""),
+                "author": info.get("author", ""),
+            })
+        elif response.status_code != 404:
+            upstream_failed = True
+
+        # Also search for robotframework-related packages if query is short
+        if len(query) >= 2:
+            index, index_ok = _pypi_project_index(client)
+            upstream_failed = upstream_failed or not index_ok
+            matched = index.match(query.lower(), 20)
+
+            for name in matched:
+                if not any(r["name"] == name for r in results):
+                    results.append({
+                        "name": name,
+                        "version": "",
+                        "summary": "",
+                        "author": "",
+                    })
     except Exception as e:
         logger.warning("PyPI search failed: %s", e)
+        return results[:20]
 
-    return results[:20]
+    results = results[:20]
+    if upstream_failed:
+        return results
+    with _pypi_search_cache_lock:
+        _pypi_search_cache[key] = (now + _PYPI_SEARCH_CACHE_TTL, [dict(r) for r in results])
+        if len(_pypi_search_cache) > _PYPI_SEARCH_CACHE_MAX:
+            _pypi_search_cache.popitem(last=False)
+    return results
 
 
 def _strip_version(pkg_spec: str) -> str:
@@ -606,6 +952,31 @@ def playwright_docker_base_image() -> str:
     return f"mcr.microsoft.com/playwright/python:v{playwright_pinned_version()}-noble"
 
 
+# Whitespace and path separators are not valid in an image repository name.
+_IMAGE_SLUG_TABLE = str.maketrans(" \t/", "---")
+
+
+@functools.lru_cache(maxsize=256)
+def docker_image_tag(env_name: str) -> str:
+    """Return the Docker image tag used for an environment's image."""
+    return f"roboscope/{env_name.casefold().translate(_IMAGE_SLUG_TABLE)}:latest"
+
+
+def docker_package_specs(packages: list[tuple[str, str | None]]) -> list[str]:
+    """Return the pip specs a Docker image installs for (name, version) pairs.
+
+    robotframework is always included, since it is required to run tests.
+    Specs are returned in canonical order, so environments with the same
+    package set render the same RUN line and share the cached install
+    layer, and the Dockerfile preview matches what is actually built.
+    """
+    specs = [f"{name}=={version}" if version else name for name, version in packages]
+    if not any(s.split("==")[0].lower() == "robotframework" for s in specs):
+        specs.append("robotframework")
+    specs.sort(key=str.lower)
+    return specs
+
+
 def generate_dockerfile(
     python_version: str,
     packages: list[str],
@@ -619,6 +990,17 @@ def generate_dockerfile(
     and all browser system dependencies). Node.js is installed separately
     because rfbrowser init requires npm. Otherwise, python-slim.
     """
+    return _render_dockerfile(python_version, tuple(packages), base_image)
+
+
+@functools.lru_cache(maxsize=128)
+def _render_dockerfile(
+    python_version: str,
+    packages: tuple[str, ...],
+    base_image: str | None,
+) -> str:
+    # Memoised: the output depends only on the arguments, and the
+    # dockerfile endpoint re-renders the same package set on every view.
     needs_browser_standard = _has_browser_package(packages)
     needs_batteries = _has_batteries_package(packages)
     needs_browser_any = needs_browser_standard or needs_batteries
@@ -662,9 +1044,8 @@ def generate_dockerfile(
         ]
 
     lines.append("RUN uv pip install --system --no-cache-dir \\")
-    for i, pkg in enumerate(packages):
-        suffix = "" if i == len(packages) - 1 else " \\"
-        lines.append(f"    {pkg}{suffix}")
+    if packages:
+        lines.append("    " + " \\\n    ".join(packages))
     lines.append("")
 
     # Story Playwright-fix-E (2026-04-27, verified by real-build smoke):
@@ -783,26 +1164,69 @@ def rebuild_keyword_cache(db: Session, env_id: int) -> EnvironmentKeywordCache |
     return cache
 
 
+# Listings are read from the dist-info directories (`uv pip list` is only
+# the fallback) and memoised per venv, keyed on the site-packages mtime,
+# which changes whenever a distribution is installed, upgraded or removed;
+# the TTL covers filesystems with coarse mtime resolution. Failed listings
+# are not cached.
+_PIP_LIST_CACHE_TTL = 30.0
+_pip_list_cache: dict[str, tuple[int, float, list[dict]]] = {}
+_pip_list_cache_lock = threading.Lock()
+
+
+def clear_pip_list_cache() -> None:
+    """Drop every memoised `pip_list_installed` result."""
+    with _pip_list_cache_lock:
+        _pip_list_cache.clear()
+
+
 def pip_list_installed(venv_path: str | None) -> list[dict]:
-    """List all packages installed in a venv via uv pip list --format=json."""
+    """List all packages installed in a venv as ``[{"name", "version"}]``.
+
+    Read from the dist-info METADATA files; falls back to
+    ``uv pip list --format=json`` for layouts the reader does not handle.
+    """
     if not venv_path:
         return []
 
-    from src.environments.venv_utils import pip_list_cmd, get_python_path
+    from src.environments.venv_utils import (
+        get_python_path,
+        get_site_packages_dir,
+        pip_list_cmd,
+        read_installed_distributions,
+    )
 
     python_path = get_python_path(venv_path)
     if not Path(python_path).exists():
         return []
 
+    site_packages = get_site_packages_dir(venv_path)
+    stamp = site_packages.stat().st_mtime_ns if site_packages is not None else None
+    now = time.monotonic()
+    if stamp is not None:
+        with _pip_list_cache_lock:
+            entry = _pip_list_cache.get(venv_path)
+        if entry is not None and entry[0] == stamp and entry[1] > now:
+            return [dict(p) for p in entry[2]]
+
     try:
-        result = subprocess.run(
-            pip_list_cmd(venv_path),
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        packages = read_installed_distributions(venv_path)
+        if packages is None:
+            result = subprocess.run(
+                pip_list_cmd(venv_path),
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+            if result.returncode == 0:
+                packages = json.loads(result.stdout)
+        if packages is not None:
+            if stamp is not None:
+                with _pip_list_cache_lock:
+                    _pip_list_cache[venv_path] = (
+                        stamp, now + _PIP_LIST_CACHE_TTL, [dict(p) for p in packages],
+                    )
+            return packages
     except Exception as e:
         logger.warning("pip list failed: %s", e)
 
@@ -1,12 +1,23 @@
 """Background tasks for environment operations."""
 
 import asyncio
+import functools
+import hashlib
+import io
 import logging
+import os
+import queue
+import re
+import shutil
 import subprocess
-from datetime import UTC
+import tarfile
+import threading
+from collections.abc import Coroutine
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any, BinaryIO
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 import src.auth.models  # noqa: F401
 from src.database import get_sync_session
@@ -18,11 +29,53 @@ from src.environments.venv_utils import (
     pip_install_cmd,
     pip_show_cmd,
     pip_uninstall_cmd,
+    read_installed_versions,
     rfbrowser_init_cmd,
 )
 
 logger = logging.getLogger("roboscope.environments.tasks")
 
+# `pip show` fields: one regex search instead of a splitlines() walk.
+_PIP_SHOW_VERSION_RE = re.compile(r"^Version:[ \t]*(.+?)[ \t\r]*$", re.M)
+_PIP_SHOW_NAME_VERSION_RE = re.compile(r"^(Name|Version):[ \t]*(.+?)[ \t\r]*$", re.M)
+
+
+def _pip_show_version(stdout: str) -> str | None:
+    match = _PIP_SHOW_VERSION_RE.search(stdout)
+    return match.group(1) if match else None
+
+
+def _installed_versions(venv_path: str, package_names: list[str]) -> dict[str, str]:
+    """Installed versions keyed by the given names.
+
+    Read from the dist-info METADATA files first; `pip show` (an extra
+    interpreter launch) only runs for names that were not found there.
+    """
+    versions = read_installed_versions(venv_path, package_names)
+    missing = [name for name in package_names if name not in versions]
+    if missing:
+        # `pip show` takes several names and prints one block per package
+        show_result = subprocess.run(
+            pip_show_cmd(venv_path, *missing),
+            capture_output=True,
+            text=True,
+        )
+        shown: dict[str, str] = {}
+        current = None
+        for field, value in _PIP_SHOW_NAME_VERSION_RE.findall(show_result.stdout):
+            if field == "Name":
+                current = _normalize_name(value)
+            elif current is not None:
+                shown[current] = value
+        for name in missing:
+            version = shown.get(_normalize_name(name))
+            if version is None and len(missing) == 1:
+                version = _pip_show_version(show_result.stdout)
+            if version is not None:
+                versions[name] = version
+    return versions
+
+
 # Track active package install/upgrade tasks so we can detect stuck packages.
 # Key: (env_id, package_name), value: True while task is running.
 _active_package_tasks: dict[tuple[int, str], bool] = {}
@@ -145,25 +198,85 @@ def is_package_task_active(env_id: int, package_name: str) -> bool:
     return _active_package_tasks.get((env_id, package_name), False)
 
 
+# Broadcasts from worker threads are queued and drained on the event loop
+# in bursts: only the first event after the queue ran empty wakes the loop,
+# and one task sends the whole burst in order. A Docker build can emit
+# hundreds of log lines a second; a cross-thread wakeup per line is not free.
+_broadcast_queue: "queue.SimpleQueue[Coroutine[Any, Any, Any]]" = queue.SimpleQueue()
+_broadcast_drain_lock = threading.Lock()
+_broadcast_drain_scheduled = False
+
+
+def _post_broadcast(coro: Coroutine[Any, Any, Any]) -> bool:
+    """Queue ``coro`` for the event loop. False if no loop is running."""
+    global _broadcast_drain_scheduled
+    from src.main import _event_loop
+
+    if not (_event_loop and _event_loop.is_running()):
+        coro.close()
+        return False
+    _broadcast_queue.put(coro)
+    with _broadcast_drain_lock:
+        if _broadcast_drain_scheduled:
+            return True
+        _broadcast_drain_scheduled = True
+    try:
+        _event_loop.call_soon_threadsafe(_drain_broadcasts)
+    except RuntimeError:  # loop closed between the check and the call
+        with _broadcast_drain_lock:
+            _broadcast_drain_scheduled = False
+        return False
+    return True
+
+
+def _drain_broadcasts() -> None:
+    """Event-loop side: send everything queued so far, in order."""
+    global _broadcast_drain_scheduled
+    with _broadcast_drain_lock:
+        _broadcast_drain_scheduled = False
+    burst = []
+    while True:
+        try:
+            burst.append(_broadcast_queue.get_nowait())
+        except queue.Empty:
+            break
+    if burst:
+        asyncio.ensure_future(_send_burst(burst))
+
+
+async def _send_burst(burst: list[Coroutine[Any, Any, Any]]) -> None:
+    for coro in burst:
+        try:
+            await coro
+        except Exception:
+            logger.exception("WebSocket broadcast failed")
+
+
+def _reset_broadcast_queue() -> None:
+    """Drop queued broadcasts and the pending-drain flag (tests)."""
+    global _broadcast_drain_scheduled
+    with _broadcast_drain_lock:
+        _broadcast_drain_scheduled = False
+    while True:
+        try:
+            _broadcast_queue.get_nowait().close()
+        except queue.Empty:
+            break
+
+
 def _broadcast_package_status(env_id: int, package_name: str, status: str, **extra) -> None:
     """Broadcast a package status change from a sync background thread."""
-    from src.main import _event_loop
     from src.websocket.manager import ws_manager
 
     coro = ws_manager.broadcast_package_status(env_id, package_name, status, **extra)
-
-    if _event_loop and _event_loop.is_running():
-        asyncio.run_coroutine_threadsafe(coro, _event_loop)
-    else:
+    if not _post_broadcast(coro):
         logger.warning("No event loop available to broadcast package %s status", package_name)
 
 
 def _mark_packages_changed(session, env_id: int) -> None:
     """Update packages_changed_at timestamp on the environment."""
-    from datetime import datetime
-    env = session.execute(
-        select(Environment).where(Environment.id == env_id)
-    ).scalar_one_or_none()
+    # The task already loaded the environment; get() hits the identity map
+    env = session.get(Environment, env_id)
     if env:
         env.packages_changed_at = datetime.now(UTC)
 
@@ -173,39 +286,75 @@ BATTERIES_PACKAGE_NAMES = {"robotframework-browser-batteries", "robotframework_b
 ALL_BROWSER_VARIANTS = BROWSER_PACKAGE_NAMES | BATTERIES_PACKAGE_NAMES
 
 
+# Package names come from a small, repeating set; these checks run on
+# every install/upgrade status transition, so memoize them.
+@functools.lru_cache(maxsize=256)
+def _normalize_name(package_name: str) -> str:
+    return package_name.lower().replace("_", "-")
+
+
+@functools.lru_cache(maxsize=256)
 def _is_browser_package(package_name: str) -> bool:
     """Check if a package name refers to robotframework-browser (standard)."""
-    return package_name.lower().replace("_", "-") in BROWSER_PACKAGE_NAMES
+    return _normalize_name(package_name) in BROWSER_PACKAGE_NAMES
 
 
+@functools.lru_cache(maxsize=256)
 def _is_batteries_package(package_name: str) -> bool:
     """Check if a package name refers to robotframework-browser-batteries."""
-    return package_name.lower().replace("_", "-") in BATTERIES_PACKAGE_NAMES
+    return _normalize_name(package_name) in BATTERIES_PACKAGE_NAMES
 
 
+@functools.lru_cache(maxsize=256)
 def _is_any_browser_variant(package_name: str) -> bool:
     """Check if a package is any Browser library variant."""
-    normalized = package_name.lower().replace("_", "-")
-    return normalized in BROWSER_PACKAGE_NAMES or normalized in BATTERIES_PACKAGE_NAMES
+    return _normalize_name(package_name) in ALL_BROWSER_VARIANTS
 
 
 def _get_conflicting_browser_package(env_id: int, package_name: str, session) -> str | None:
     """Return the name of a conflicting browser variant already installed, or None."""
     if not _is_any_browser_variant(package_name):
         return None
-    pkgs = session.execute(
-        select(EnvironmentPackage).where(
+    # Only the names are needed; walk them straight off the cursor
+    names = session.execute(
+        select(EnvironmentPackage.package_name).where(
             EnvironmentPackage.environment_id == env_id,
             EnvironmentPackage.install_status.in_(["installed", "installing", "pending"]),
         )
-    ).scalars().all()
-    for p in pkgs:
-        if p.package_name.lower().replace("_", "-") != package_name.lower().replace("_", "-"):
-            if _is_any_browser_variant(p.package_name):
-                return p.package_name
+    ).scalars()
+    normalized = _normalize_name(package_name)
+    for name in names:
+        if _normalize_name(name) != normalized and _is_any_browser_variant(name):
+            return name
     return None
 
 
+# What `rfbrowser init` (Python -> npm -> Playwright downloads) needs from
+# the parent environment: home/locale/temp, proxy and CA settings, and the
+# Windows basics without which Node cannot start.
+_RFBROWSER_ENV_KEYS = frozenset({
+    "HOME", "USER", "LANG", "LC_ALL", "LC_CTYPE", "TMPDIR", "TEMP", "TMP",
+    "XDG_CACHE_HOME", "XDG_CONFIG_HOME",
+    "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "ALL_PROXY",
+    "SSL_CERT_FILE", "SSL_CERT_DIR", "REQUESTS_CA_BUNDLE",
+    "SYSTEMROOT", "SYSTEMDRIVE", "WINDIR", "COMSPEC", "PATHEXT",
+    "USERPROFILE", "APPDATA", "LOCALAPPDATA", "PROGRAMFILES", "PROGRAMDATA",
+})
+_RFBROWSER_ENV_PREFIXES = ("PLAYWRIGHT_", "NODE_", "NPM_CONFIG_")
+
+
+@functools.lru_cache(maxsize=1)
+def _rfbrowser_base_env() -> dict[str, str]:
+    """Whitelisted subset of the process environment for ``rfbrowser init``.
+
+    Built once; callers copy it and add PATH.
+    """
+    return {
+        key: value for key, value in os.environ.items()
+        if key.upper() in _RFBROWSER_ENV_KEYS or key.upper().startswith(_RFBROWSER_ENV_PREFIXES)
+    }
+
+
 def _run_rfbrowser_init(
     venv_path: str,
     env_id: int,
@@ -218,15 +367,13 @@ def _run_rfbrowser_init(
     Downloads Playwright Node.js dependencies and browser binaries.
     On failure, marks the package as failed with an informative error.
     """
-    import os
-
     logger.info("Running rfbrowser init for env %d ...", env_id)
     _broadcast_package_status(env_id, package_name, "initializing")
 
     try:
-        env_vars = os.environ.copy()
+        env_vars = dict(_rfbrowser_base_env())
         bin_dir = get_venv_bin_dir(venv_path)
-        env_vars["PATH"] = bin_dir + os.pathsep + env_vars.get("PATH", "")
+        env_vars["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
 
         result = subprocess.run(
             rfbrowser_init_cmd(venv_path),
@@ -305,6 +452,7 @@ def create_venv(env_id: int) -> dict:
                     return {"status": "error", "message": str(e)}
 
             venv_path = Path(env.venv_path)
+            installed: dict[str, str] = {}
             if not venv_path.exists():
                 result = subprocess.run(
                     create_venv_cmd(str(venv_path), env.python_version),
@@ -326,22 +474,35 @@ def create_venv(env_id: int) -> dict:
                         )
                     logger.error("venv creation failed for env %d: %s", env_id, error_msg)
                     return {"status": "error", "message": error_msg}
+            else:
+                # Existing venv (e.g. the task was queued twice): only
+                # seed what is missing instead of re-running the resolver.
+                installed = read_installed_versions(
+                    str(venv_path), ["robotframework", "robotframework-roboscopeheal"]
+                )
+                if len(installed) == 2:
+                    logger.info("venv at %s is already seeded, nothing to do", venv_path)
+                    return {"status": "success", "message": f"Venv at {venv_path} already set up"}
 
-            # Install robotframework by default
-            result = subprocess.run(
-                pip_install_cmd(str(venv_path), "robotframework"),
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode != 0:
-                error_msg = result.stderr or result.stdout or "Unknown error"
-                if "No matching distribution" in error_msg or "requires-python" in error_msg.lower():
-                    error_msg = (
-                        f"robotframework is not yet available for Python {env.python_version}. "
-                        f"Consider using Python 3.12 or 3.13 instead. Details: {error_msg}"
-                    )
-                logger.error("robotframework install failed for env %d: %s", env_id, error_msg)
-                return {"status": "error", "message": error_msg}
+            if "robotframework" not in installed:
+                # Install robotframework by default
+                result = subprocess.run(
+                    pip_install_cmd(str(venv_path), "robotframework"),
+                    capture_output=True,
+                    text=True,
+                )
+                if result.returncode != 0:
+                    error_msg = result.stderr or result.stdout or "Unknown error"
+                    if (
+                        "No matching distribution" in error_msg
+                        or "requires-python" in error_msg.lower()
+                    ):
+                        error_msg = (
+                            f"robotframework is not yet available for Python {env.python_version}. "
+                            f"Consider using Python 3.12 or 3.13 instead. Details: {error_msg}"
+                        )
+                    logger.error("robotframework install failed for env %d: %s", env_id, error_msg)
+                    return {"status": "error", "message": error_msg}
 
             # Story HEAL-VENDORED phase-2 — also seed the heal library
             # so the user's test cases can use `Library RoboScopeHeal` +
@@ -361,7 +522,8 @@ def create_venv(env_id: int) -> dict:
             # re-add on subsequent installs; this branch runs only at
             # `create_venv` time, see `_install_vendored_heal_into_venv`
             # docstring).
-            _install_vendored_heal_into_venv(str(venv_path), env_id)
+            if "robotframework-roboscopeheal" not in installed:
+                _install_vendored_heal_into_venv(str(venv_path), env_id)
 
             logger.info("Created venv at %s", venv_path)
             return {"status": "success", "message": f"Created venv at {venv_path}"}
@@ -381,10 +543,11 @@ def install_package(env_id: int, package_name: str, version: str | None = None)
 
 def _install_package_inner(env_id: int, package_name: str, version: str | None = None) -> dict:
     """Inner install logic."""
+    from src.environments.service import get_environment_package
+
     with get_sync_session() as session:
-        env = session.execute(
-            select(Environment).where(Environment.id == env_id)
-        ).scalar_one_or_none()
+        # Environment and package record in one round-trip
+        env, pkg = get_environment_package(session, env_id, package_name)
 
         if env is None or env.venv_path is None:
             return {"status": "error", "message": "Environment not found or no venv"}
@@ -403,13 +566,6 @@ def _install_package_inner(env_id: int, package_name: str, version: str | None =
                 return {"status": "error", "message": error_msg}
 
         # Mark as installing
-        pkg = session.execute(
-            select(EnvironmentPackage).where(
-                EnvironmentPackage.environment_id == env_id,
-                EnvironmentPackage.package_name == package_name,
-            )
-        ).scalars().first()
-
         if pkg:
             pkg.install_status = "installing"
             pkg.install_error = None
@@ -439,6 +595,8 @@ def _install_package_inner(env_id: int, package_name: str, version: str | None =
             else:
                 pkg_spec = f"{package_name}=={version}" if version else package_name
 
+            # Only stderr is ever read (for the error message); pip's
+            # progress output on stdout is discarded instead of buffered.
             subprocess.run(
                 pip_install_cmd(
                     env.venv_path,
@@ -447,36 +605,29 @@ def _install_package_inner(env_id: int, package_name: str, version: str | None =
                     extra_index_url=env.extra_index_url,
                 ),
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
             )
 
             # Get installed version
-            show_result = subprocess.run(
-                pip_show_cmd(env.venv_path, package_name),
-                capture_output=True,
-                text=True,
-            )
-            installed_version = None
-            for line in show_result.stdout.splitlines():
-                if line.startswith("Version:"):
-                    installed_version = line.split(":", 1)[1].strip()
-                    break
+            installed_version = _installed_versions(env.venv_path, [package_name]).get(package_name)
 
-            # Update DB record — success
+            # Update DB record — success; status and the env's
+            # packages_changed_at go out in a single commit
             if pkg:
                 pkg.installed_version = installed_version
                 pkg.install_status = "installed"
                 pkg.install_error = None
-                session.commit()
+            _mark_packages_changed(session, env_id)
+            session.commit()
+            if pkg:
                 _broadcast_package_status(
                     env_id, package_name, "installed",
                     installed_version=installed_version,
                 )
 
             logger.info("Installed %s==%s in env %d", package_name, installed_version, env_id)
-            _mark_packages_changed(session, env_id)
-            session.commit()
 
             # Auto-init rfbrowser after robotframework-browser install (NOT for batteries)
             if _is_browser_package(package_name) and not _is_batteries_package(package_name):
@@ -517,6 +668,129 @@ def _install_package_inner(env_id: int, package_name: str, version: str | None =
             return {"status": "error", "message": error_msg}
 
 
+def install_packages(env_id: int, package_names: list[str]) -> dict:
+    """Install several packages with a single resolver run.
+
+    Versions pinned on the package records are honoured. Used for bulk
+    provisioning (e.g. the default environment). Packages
+    that need special handling — vendored sources, standard Browser with
+    its ``rfbrowser init`` — and every package of a failed combined install
+    go through :func:`install_package` one by one, so each record still
+    ends up with its own status and error message.
+    """
+    batch = [
+        name for name in package_names
+        if _shipped_vendor_path(name) is None
+        and not (_is_browser_package(name) and not _is_batteries_package(name))
+    ]
+    individual = [name for name in package_names if name not in batch]
+
+    if len(batch) > 1:
+        for name in batch:
+            _active_package_tasks[(env_id, name)] = True
+        try:
+            if not _install_batch_inner(env_id, batch):
+                individual = batch + individual
+        finally:
+            for name in batch:
+                _active_package_tasks.pop((env_id, name), None)
+    else:
+        individual = batch + individual
+
+    results = [install_package(env_id, name) for name in individual]
+    failed = [r for r in results if r.get("status") != "success"]
+    if failed:
+        return {"status": "error", "message": f"{len(failed)} package(s) failed to install"}
+    return {"status": "success", "packages": package_names}
+
+
+def _install_batch_inner(env_id: int, package_names: list[str]) -> bool:
+    """Run one ``pip install`` for all of ``package_names``.
+
+    Returns False (leaving records untouched for the per-package fallback)
+    if the venv is missing or the combined install fails.
+    """
+    with get_sync_session() as session:
+        env = session.execute(
+            select(Environment).where(Environment.id == env_id)
+        ).scalar_one_or_none()
+        if env is None or env.venv_path is None or not Path(env.venv_path).exists():
+            return False
+
+        # Only ids and pins are needed; status writes below are bulk statements.
+        pkgs = {
+            name: (pkg_id, version)
+            for pkg_id, name, version in session.execute(
+                select(
+                    EnvironmentPackage.id,
+                    EnvironmentPackage.package_name,
+                    EnvironmentPackage.version,
+                ).where(
+                    EnvironmentPackage.environment_id == env_id,
+                    EnvironmentPackage.package_name.in_(package_names),
+                )
+            )
+        }
+        session.execute(
+            update(EnvironmentPackage)
+            .where(EnvironmentPackage.id.in_([pkg_id for pkg_id, _ in pkgs.values()]))
+            .values(install_status="installing", install_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        for name in pkgs:
+            _broadcast_package_status(env_id, name, "installing")
+
+        specs = [
+            f"{name}=={pkgs[name][1]}" if name in pkgs and pkgs[name][1] else name
+            for name in package_names
+        ]
+        try:
+            subprocess.run(
+                pip_install_cmd(
+                    env.venv_path,
+                    *specs,
+                    index_url=env.index_url,
+                    extra_index_url=env.extra_index_url,
+                ),
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(
+                "combined install of %s failed in env %d, retrying individually: %s",
+                ", ".join(package_names), env_id, getattr(e, "stderr", None) or e,
+            )
+            return False
+
+        versions = _installed_versions(env.venv_path, list(package_names))
+
+        if pkgs:
+            # ORM bulk UPDATE by primary key: one executemany for the batch
+            session.execute(
+                update(EnvironmentPackage),
+                [
+                    {
+                        "id": pkg_id,
+                        "installed_version": versions.get(name),
+                        "install_status": "installed",
+                        "install_error": None,
+                    }
+                    for name, (pkg_id, _) in pkgs.items()
+                ],
+            )
+        _mark_packages_changed(session, env_id)
+        session.commit()
+        for name in pkgs:
+            _broadcast_package_status(
+                env_id, name, "installed", installed_version=versions.get(name),
+            )
+        logger.info("Installed %s in env %d", ", ".join(package_names), env_id)
+        return True
+
+
 def upgrade_package(env_id: int, package_name: str) -> dict:
     """Upgrade a pip package to its latest version."""
     _active_package_tasks[(env_id, package_name)] = True
@@ -528,22 +802,16 @@ def upgrade_package(env_id: int, package_name: str) -> dict:
 
 def _upgrade_package_inner(env_id: int, package_name: str) -> dict:
     """Inner upgrade logic."""
+    from src.environments.service import get_environment_package
+
     with get_sync_session() as session:
-        env = session.execute(
-            select(Environment).where(Environment.id == env_id)
-        ).scalar_one_or_none()
+        # Environment and package record in one round-trip
+        env, pkg = get_environment_package(session, env_id, package_name)
 
         if env is None or env.venv_path is None:
             return {"status": "error", "message": "Environment not found or no venv"}
 
         # Mark as installing
-        pkg = session.execute(
-            select(EnvironmentPackage).where(
-                EnvironmentPackage.environment_id == env_id,
-                EnvironmentPackage.package_name == package_name,
-            )
-        ).scalars().first()
-
         if pkg:
             pkg.install_status = "installing"
             pkg.install_error = None
@@ -560,36 +828,29 @@ def _upgrade_package_inner(env_id: int, package_name: str) -> dict:
                     extra_index_url=env.extra_index_url,
                 ),
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
             )
 
             # Get installed version
-            show_result = subprocess.run(
-                pip_show_cmd(env.venv_path, package_name),
-                capture_output=True,
-                text=True,
-            )
-            installed_version = None
-            for line in show_result.stdout.splitlines():
-                if line.startswith("Version:"):
-                    installed_version = line.split(":", 1)[1].strip()
-                    break
+            installed_version = _installed_versions(env.venv_path, [package_name]).get(package_name)
 
-            # Update DB record — success
+            # Update DB record — success; status and the env's
+            # packages_changed_at go out in a single commit
             if pkg:
                 pkg.installed_version = installed_version
                 pkg.install_status = "installed"
                 pkg.install_error = None
-                session.commit()
+            _mark_packages_changed(session, env_id)
+            session.commit()
+            if pkg:
                 _broadcast_package_status(
                     env_id, package_name, "installed",
                     installed_version=installed_version,
                 )
 
             logger.info("Upgraded %s to %s in env %d", package_name, installed_version, env_id)
-            _mark_packages_changed(session, env_id)
-            session.commit()
 
             # Auto-init rfbrowser after robotframework-browser upgrade
             if _is_browser_package(package_name):
@@ -679,29 +940,49 @@ def _check_docker_disk_space(
 
 def _broadcast_docker_build_log(env_id: int, line: str, done: bool = False) -> None:
     """Broadcast a Docker build log line from a sync background thread."""
-    from src.main import _event_loop
     from src.websocket.manager import ws_manager
 
     coro = ws_manager.broadcast_docker_build_log(env_id, line, done=done)
-
-    if _event_loop and _event_loop.is_running():
-        asyncio.run_coroutine_threadsafe(coro, _event_loop)
-    else:
+    if not _post_broadcast(coro):
         logger.warning("No event loop available to broadcast docker build log for env %d", env_id)
 
 
+def _stream_build_context(files: dict[str, bytes]) -> BinaryIO:
+    """Tar ``files`` into a pipe and return its read end.
+
+    A writer thread produces the archive in streaming mode (``w|``), so
+    docker-py can send the context chunked while it is generated instead
+    of the whole tarball being buffered in memory first.
+    """
+    read_fd, write_fd = os.pipe()
+
+    def _write() -> None:
+        try:
+            with os.fdopen(write_fd, "wb") as w, tarfile.open(fileobj=w, mode="w|") as tar:
+                for name, data in files.items():
+                    info = tarfile.TarInfo(name=name)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+        except BrokenPipeError:
+            pass  # reader gave up (build aborted)
+
+    threading.Thread(target=_write, name="docker-context", daemon=True).start()
+    return os.fdopen(read_fd, "rb")
+
+
 def build_docker_image(env_id: int) -> dict:
     """Build a Docker image for an environment with all its packages."""
-    import io
-    import tarfile
-
     with get_sync_session() as session:
-        env = session.execute(
-            select(Environment).where(Environment.id == env_id)
-        ).scalar_one_or_none()
-
-        if env is None:
+        # Environment plus its package specs in one LEFT JOIN
+        rows = session.execute(
+            select(Environment, EnvironmentPackage.package_name, EnvironmentPackage.version)
+            .outerjoin(EnvironmentPackage, EnvironmentPackage.environment_id == Environment.id)
+            .where(Environment.id == env_id)
+        ).all()
+
+        if not rows:
             return {"status": "error", "message": "Environment not found"}
+        env = rows[0][0]
 
         # Mark as building, clear previous log
         env.docker_build_status = "building"
@@ -709,23 +990,16 @@ def build_docker_image(env_id: int) -> dict:
         env.docker_build_log = None
         session.commit()
 
-        packages = session.execute(
-            select(EnvironmentPackage).where(EnvironmentPackage.environment_id == env_id)
-        ).scalars().all()
-
         try:
-            from src.environments.service import generate_dockerfile
-
-            pkg_specs = []
-            for pkg in packages:
-                if pkg.version:
-                    pkg_specs.append(f"{pkg.package_name}=={pkg.version}")
-                else:
-                    pkg_specs.append(pkg.package_name)
+            from src.environments.service import (
+                docker_image_tag,
+                docker_package_specs,
+                generate_dockerfile,
+            )
 
-            # Always include robotframework — it's required to run tests
-            if not any(s.split("==")[0].lower() == "robotframework" for s in pkg_specs):
-                pkg_specs.insert(0, "robotframework")
+            pkg_specs = docker_package_specs(
+                [(name, version) for _, name, version in rows if name is not None]
+            )
 
             dockerfile_content = generate_dockerfile(
                 python_version=env.python_version or "3.12",
@@ -733,20 +1007,29 @@ def build_docker_image(env_id: int) -> dict:
             )
 
             # Story REFACTOR-1 — shared bootstrap helper.
-            from src.docker_client import get_docker_client
+            from src.docker_client import get_docker_client, reset_docker_client
             client = get_docker_client()
 
-            # Build image from in-memory tarball
-            dockerfile_bytes = dockerfile_content.encode("utf-8")
-            f = io.BytesIO()
-            with tarfile.open(fileobj=f, mode="w") as tar:
-                info = tarfile.TarInfo(name="Dockerfile")
-                info.size = len(dockerfile_bytes)
-                tar.addfile(info, io.BytesIO(dockerfile_bytes))
-            f.seek(0)
-
-            safe_name = env.name.lower().replace(" ", "-")
-            tag = f"roboscope/{safe_name}:latest"
+            tag = docker_image_tag(env.name)
+
+            # The rendered Dockerfile covers the package set, the Python
+            # version and the template: if it is unchanged and the image
+            # is still there, a rebuild would produce the same image.
+            dockerfile_hash = hashlib.sha256(dockerfile_content.encode("utf-8")).hexdigest()
+            if (
+                env.docker_image == tag
+                and env.docker_image_hash == dockerfile_hash
+                and _docker_image_exists(client, tag)
+            ):
+                msg = f"Image {tag} is up to date, skipping rebuild"
+                _broadcast_docker_build_log(env_id, msg)
+                _broadcast_docker_build_log(env_id, "", done=True)
+                env.docker_image_built_at = datetime.now(UTC)
+                env.docker_build_status = "success"
+                env.docker_build_log = msg
+                session.commit()
+                logger.info("Docker image %s for env %d is up to date", tag, env_id)
+                return {"status": "success", "image_tag": tag}
 
             logger.info("Building Docker image %s for env %d", tag, env_id)
 
@@ -764,20 +1047,42 @@ def build_docker_image(env_id: int) -> dict:
                 log_lines.append(msg)
                 _broadcast_docker_build_log(env_id, msg)
 
-            resp = client.api.build(
-                fileobj=f, custom_context=True, tag=tag, rm=True, decode=True,
-            )
-            for chunk in resp:
-                if "stream" in chunk:
-                    line = chunk["stream"].rstrip("\n")
-                    if line:
-                        log_lines.append(line)
-                        _broadcast_docker_build_log(env_id, line)
-                elif "error" in chunk:
-                    error_msg = chunk["error"].rstrip("\n")
-                    log_lines.append(f"ERROR: {error_msg}")
-                    _broadcast_docker_build_log(env_id, f"ERROR: {error_msg}")
-                    raise RuntimeError(error_msg)
+            import docker.errors
+            import requests
+
+            build_files = {"Dockerfile": dockerfile_content.encode("utf-8")}
+            context = _stream_build_context(build_files)
+            try:
+                resp = client.api.build(
+                    fileobj=context, custom_context=True, tag=tag, rm=True, decode=True,
+                )
+            except (docker.errors.APIError, requests.exceptions.ConnectionError) as exc:
+                # The shared client may predate a daemon restart: reconnect
+                # once and resend the (already consumed) context.
+                context.close()
+                logger.info("Docker build request failed (%s), reconnecting", exc)
+                reset_docker_client()
+                client = get_docker_client()
+                context = _stream_build_context(build_files)
+                try:
+                    resp = client.api.build(
+                        fileobj=context, custom_context=True, tag=tag, rm=True, decode=True,
+                    )
+                except Exception:
+                    context.close()
+                    raise
+            with context:
+                for chunk in resp:
+                    if "stream" in chunk:
+                        line = chunk["stream"].rstrip("\n")
+                        if line:
+                            log_lines.append(line)
+                            _broadcast_docker_build_log(env_id, line)
+                    elif "error" in chunk:
+                        error_msg = chunk["error"].rstrip("\n")
+                        log_lines.append(f"ERROR: {error_msg}")
+                        _broadcast_docker_build_log(env_id, f"ERROR: {error_msg}")
+                        raise RuntimeError(error_msg)
 
             # Clean up dangling images from previous builds
             try:
@@ -795,8 +1100,8 @@ def build_docker_image(env_id: int) -> dict:
             _broadcast_docker_build_log(env_id, "", done=True)
 
             # Update environment's docker_image in DB
-            from datetime import datetime
             env.docker_image = tag
+            env.docker_image_hash = dockerfile_hash
             env.docker_image_built_at = datetime.now(UTC)
             env.docker_build_status = "success"
             env.docker_build_error = None
@@ -817,6 +1122,16 @@ def build_docker_image(env_id: int) -> dict:
             return {"status": "error", "message": error_msg}
 
 
+def _docker_image_exists(client, tag: str) -> bool:
+    import docker.errors
+
+    try:
+        client.images.get(tag)
+    except docker.errors.DockerException:
+        return False
+    return True
+
+
 def _enrich_docker_error(error: str) -> str:
     """Add actionable hints to common Docker errors."""
     lower = error.lower()
@@ -896,6 +1211,13 @@ def introspect_keywords_task(env_id: int) -> dict:
         return {"status": cache.status, "count": count}
 
 
+def cleanup_venv(path: str) -> dict:
+    """Remove a venv directory detached by ``delete_environment``."""
+    shutil.rmtree(path, ignore_errors=True)
+    logger.info("Removed venv directory %s", path)
+    return {"status": "success", "path": path}
+
+
 def uninstall_package(env_id: int, package_name: str) -> dict:
     """Uninstall a pip package from an environment's virtualenv."""
     with get_sync_session() as session:
@@ -910,7 +1232,8 @@ def uninstall_package(env_id: int, package_name: str) -> dict:
             subprocess.run(
                 pip_uninstall_cmd(env.venv_path, package_name),
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
             )
             logger.info("Uninstalled %s from env %d", package_name, env_id)
@@ -1,5 +1,6 @@
 """Cross-platform venv path utilities + uv command builders."""
 
+import functools
 import logging
 import os
 import re
@@ -75,11 +76,22 @@ def check_python_version_compatibility(version: str) -> PythonVersionWarning | N
     return None
 
 
+# shutil.which walks and stats every PATH entry; every uv command builder
+# goes through here. Hits are memoised per PATH value, misses are not, so a
+# uv installed later is still found.
+_uv_which_cache: dict[str, str] = {}
+
+
 def get_uv_path() -> str:
     """Return path to uv binary. Checks settings.UV_PATH first, then PATH."""
     if settings.UV_PATH:
         return settings.UV_PATH
-    uv = shutil.which("uv")
+    search_path = os.environ.get("PATH", "")
+    uv = _uv_which_cache.get(search_path)
+    if uv is None:
+        uv = shutil.which("uv")
+        if uv:
+            _uv_which_cache[search_path] = uv
     if uv:
         return uv
     raise FileNotFoundError(
@@ -102,6 +114,98 @@ def get_venv_bin_dir(venv_path: str) -> str:
     return str(Path(venv_path) / "bin")
 
 
+def get_site_packages_dir(venv_path: str) -> Path | None:
+    """Cross-platform site-packages directory of a venv, or None if absent."""
+    venv = Path(venv_path)
+    if sys.platform == "win32":
+        site_packages = venv / "Lib" / "site-packages"
+        return site_packages if site_packages.is_dir() else None
+    # Unix — python version in path varies, use glob
+    return next(venv.glob("lib/python*/site-packages"), None)
+
+
+_PEP503_SEPARATORS_RE = re.compile(r"[-_.]+")
+_METADATA_NAME_RE = re.compile(rb"^Name:[ \t]*(\S+)", re.M)
+_METADATA_VERSION_RE = re.compile(rb"^Version:[ \t]*(\S+)", re.M)
+
+
+@functools.lru_cache(maxsize=1024)
+def canonicalize_package_name(name: str) -> str:
+    """PEP 503 normalized form of a distribution name."""
+    return _PEP503_SEPARATORS_RE.sub("-", name).lower()
+
+
+def read_installed_versions(venv_path: str, package_names: list[str]) -> dict[str, str]:
+    """Installed versions read straight from the venv's ``*.dist-info/METADATA``.
+
+    Keyed by the given names; names with no dist-info are left out. No
+    interpreter is launched, so callers can fall back to ``pip show`` for
+    whatever is missing.
+    """
+    site_packages = get_site_packages_dir(venv_path)
+    if site_packages is None:
+        return {}
+    wanted = {canonicalize_package_name(name): name for name in package_names}
+    versions: dict[str, str] = {}
+    try:
+        entries = list(os.scandir(site_packages))
+    except OSError:
+        return {}
+    for entry in entries:
+        if not entry.name.endswith(".dist-info"):
+            continue
+        dist_name = entry.name[: -len(".dist-info")].rpartition("-")[0]
+        name = wanted.get(canonicalize_package_name(dist_name))
+        if name is None:
+            continue
+        header = _read_metadata_header(entry.path)
+        match = _METADATA_VERSION_RE.search(header) if header else None
+        if match:
+            versions[name] = match.group(1).decode("utf-8", "replace")
+    return versions
+
+
+def read_installed_distributions(venv_path: str) -> list[dict] | None:
+    """``pip list``-style ``[{"name", "version"}]`` from the dist-info dirs.
+
+    Sorted by name. Returns None if site-packages is missing or holds
+    legacy ``*.egg-info`` metadata, which is left to ``uv pip list``.
+    """
+    site_packages = get_site_packages_dir(venv_path)
+    if site_packages is None:
+        return None
+    try:
+        entries = list(os.scandir(site_packages))
+    except OSError:
+        return None
+    packages = []
+    for entry in entries:
+        if entry.name.endswith(".egg-info"):
+            return None
+        if not entry.name.endswith(".dist-info"):
+            continue
+        header = _read_metadata_header(entry.path)
+        name = _METADATA_NAME_RE.search(header) if header else None
+        version = _METADATA_VERSION_RE.search(header) if header else None
+        if name is None or version is None:
+            continue
+        packages.append({
+            "name": name.group(1).decode("utf-8", "replace"),
+            "version": version.group(1).decode("utf-8", "replace"),
+        })
+    packages.sort(key=lambda p: p["name"].lower())
+    return packages
+
+
+def _read_metadata_header(dist_info: str) -> bytes | None:
+    """First bytes of a dist-info METADATA file (Name/Version live at the top)."""
+    try:
+        with open(os.path.join(dist_info, "METADATA"), "rb") as f:
+            return f.read(4096)
+    except OSError:
+        return None
+
+
 def create_venv_cmd(venv_path: str, python_version: str | None = None) -> list[str]:
     """Build command to create a venv with uv.
 
@@ -145,10 +249,10 @@ def pip_uninstall_cmd(venv_path: str, *packages: str) -> list[str]:
     return [uv, "pip", "uninstall", "--python", get_python_path(venv_path), *packages]
 
 
-def pip_show_cmd(venv_path: str, package: str) -> list[str]:
+def pip_show_cmd(venv_path: str, *packages: str) -> list[str]:
     """Build uv pip show command targeting a venv."""
     uv = get_uv_path()
-    return [uv, "pip", "show", "--python", get_python_path(venv_path), package]
+    return [uv, "pip", "show", "--python", get_python_path(venv_path), *packages]
 
 
 def pip_list_cmd(venv_path: str) -> list[str]:
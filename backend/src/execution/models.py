@@ -11,7 +11,8 @@ else:
     class StrEnum(str, Enum):
         pass
 
-from sqlalchemy import Boolean, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Enum, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base, TimestampMixin
@@ -39,22 +40,47 @@ class RunnerType(StrEnum):
     DOCKER = "docker"
 
 
+def _str_enum(enum_cls: type[StrEnum]) -> Enum:
+    """Column type for a StrEnum stored by value in the existing VARCHAR(20).
+
+    Reads come back as enum members; unknown strings are rejected before
+    they reach the database. Not a native enum, so no migration is needed
+    and SQLite/PostgreSQL keep the same DDL.
+    """
+    return Enum(
+        enum_cls,
+        native_enum=False,
+        length=20,
+        values_callable=lambda members: [m.value for m in members],
+        validate_strings=True,
+    )
+
+
 class ExecutionRun(Base, TimestampMixin):
     """A single test execution run."""
 
     __tablename__ = "execution_runs"
+    # "Runs of this schedule (in this status)"; also serves the FK check
+    # on execution_runs.schedule_id when a schedule is deleted.
+    __table_args__ = (Index("ix_runs_schedule_status", "schedule_id", "status"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     repository_id: Mapped[int] = mapped_column(ForeignKey("repositories.id"), index=True)
     environment_id: Mapped[int | None] = mapped_column(ForeignKey("environments.id"), default=None)
-    run_type: Mapped[str] = mapped_column(String(20), default=RunType.SINGLE)
-    runner_type: Mapped[str] = mapped_column(String(20), default=RunnerType.SUBPROCESS)
-    status: Mapped[str] = mapped_column(String(20), default=RunStatus.PENDING, index=True)
+    run_type: Mapped[RunType] = mapped_column(_str_enum(RunType), default=RunType.SINGLE)
+    runner_type: Mapped[RunnerType] = mapped_column(
+        _str_enum(RunnerType), default=RunnerType.SUBPROCESS
+    )
+    status: Mapped[RunStatus] = mapped_column(
+        _str_enum(RunStatus), default=RunStatus.PENDING, index=True
+    )
     target_path: Mapped[str] = mapped_column(String(500))
     branch: Mapped[str] = mapped_column(String(100), default="main")
     tags_include: Mapped[str | None] = mapped_column(String(500), default=None)
     tags_exclude: Mapped[str | None] = mapped_column(String(500), default=None)
-    variables: Mapped[str | None] = mapped_column(Text, default=None)  # JSON string
+    variables: Mapped[dict | None] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), default=None
+    )
     parallel: Mapped[bool] = mapped_column(Boolean, default=False)
     retry_count: Mapped[int] = mapped_column(Integer, default=0)
     max_retries: Mapped[int] = mapped_column(Integer, default=0)
@@ -81,7 +107,9 @@ class Schedule(Base, TimestampMixin):
     environment_id: Mapped[int | None] = mapped_column(ForeignKey("environments.id"), default=None)
     target_path: Mapped[str] = mapped_column(String(500))
     branch: Mapped[str] = mapped_column(String(100), default="main")
-    runner_type: Mapped[str] = mapped_column(String(20), default=RunnerType.SUBPROCESS)
+    runner_type: Mapped[RunnerType] = mapped_column(
+        _str_enum(RunnerType), default=RunnerType.SUBPROCESS
+    )
     tags_include: Mapped[str | None] = mapped_column(String(500), default=None)
     tags_exclude: Mapped[str | None] = mapped_column(String(500), default=None)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
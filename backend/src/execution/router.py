@@ -5,8 +5,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from fastapi.responses import PlainTextResponse
-from sqlalchemy import select
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from src.auth.constants import Role
@@ -42,6 +42,7 @@ from src.execution.service import (
     list_runs,
     list_schedules,
     retry_run,
+    set_run_fields,
     toggle_schedule,
     update_schedule,
 )
@@ -82,18 +83,18 @@ def start_run(
         from src.execution.tasks import execute_test_run
 
         result = dispatch_task(execute_test_run, run.id)
-        run.task_id = result.id
+        run = set_run_fields(db, run.id, task_id=result.id)
         db.commit()
-        db.refresh(run)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch run %d: %s", run.id, e)
         # H3: commit the terminal ERROR state explicitly. The run was already
         # committed as PENDING above; a flush-only here left it stranded in
         # PENDING (no PENDING-reaper exists) if request teardown didn't commit.
-        run.status = RunStatus.ERROR
-        run.error_message = f"Task dispatch failed: {e}"
+        run = set_run_fields(
+            db, run.id,
+            status=RunStatus.ERROR, error_message=f"Task dispatch failed: {e}",
+        )
         db.commit()
-        db.refresh(run)
 
     return run
 
@@ -744,26 +745,21 @@ def cancel_all_runs(
 ):
     """Cancel all pending and running executions."""
     from src.execution.models import ExecutionRun
-    result = db.execute(
-        select(ExecutionRun).where(
-            ExecutionRun.status.in_([RunStatus.PENDING, RunStatus.RUNNING])
-        )
-    )
-    runs = list(result.scalars().all())
-    cancelled = 0
-    for run in runs:
-        run.status = RunStatus.CANCELLED
-        run.finished_at = datetime.now(timezone.utc)
-        cancelled += 1
-    db.flush()
+    # One set-based UPDATE; RETURNING hands back the ids to signal below
+    run_ids = list(db.execute(
+        update(ExecutionRun)
+        .where(ExecutionRun.status.in_([RunStatus.PENDING, RunStatus.RUNNING]))
+        .values(status=RunStatus.CANCELLED, finished_at=datetime.now(timezone.utc))
+        .returning(ExecutionRun.id)
+    ).scalars().all())
 
     # Kill active runner processes
     from src.execution.tasks import cancel_active_run
-    for run in runs:
-        cancel_active_run(run.id)
+    for run_id in run_ids:
+        cancel_active_run(run_id)
 
-    logger.info("Cancelled %d runs", cancelled)
-    return {"cancelled": cancelled}
+    logger.info("Cancelled %d runs", len(run_ids))
+    return {"cancelled": len(run_ids)}
 
 
 @router.post("/runs/{run_id}/retry", response_model=RunResponse, status_code=status.HTTP_201_CREATED)
@@ -789,27 +785,70 @@ def retry_run_endpoint(
         from src.execution.tasks import execute_test_run
 
         result = dispatch_task(execute_test_run, new_run.id)
-        new_run.task_id = result.id
-        db.flush()
-        db.refresh(new_run)
+        new_run = set_run_fields(db, new_run.id, task_id=result.id)
     except TaskDispatchError as e:
         logger.error("Failed to dispatch retry run %d: %s", new_run.id, e)
-        new_run.status = RunStatus.ERROR
-        new_run.error_message = f"Task dispatch failed: {e}"
-        db.flush()
-        db.refresh(new_run)
+        new_run = set_run_fields(
+            db, new_run.id,
+            status=RunStatus.ERROR, error_message=f"Task dispatch failed: {e}",
+        )
 
     return new_run
 
 
-@router.get("/runs/{run_id}/output")
-def get_run_output(
-    run_id: int,
-    stream: str = Query(default="stdout", description="stdout or stderr"),
-    db: Session = Depends(get_db),
-    _current_user: User = Depends(get_current_user),
-):
-    """Get stdout or stderr output of a run."""
+_OUTPUT_CHUNK_SIZE = 64 * 1024
+_OUTPUT_MEDIA_TYPE = "text/plain; charset=utf-8"
+
+
+def _parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges, in which case the whole log is served. Raises 416 when the
+    range starts past the end of the log.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_log_bytes(path: Path, start: int, length: int):
+    """Yield exactly `length` bytes of `path` from `start`, in chunks.
+
+    The runner may still be appending to the log, so reading stops at the
+    byte count taken up front instead of at EOF.
+    """
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(_OUTPUT_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _run_output_response(
+    db: Session, run_id: int, stream: str, request: Request
+) -> Response:
     run = get_run(db, run_id)
     if run is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
@@ -817,11 +856,58 @@ def get_run_output(
         return PlainTextResponse("")
 
     log_file = Path(run.output_dir) / f"{stream}.log"
-    if not log_file.exists():
+    try:
+        size = log_file.stat().st_size
+    except FileNotFoundError:
         return PlainTextResponse("")
 
-    content = log_file.read_text(encoding="utf-8", errors="replace")
-    return PlainTextResponse(content)
+    # The log can grow while it is being sent (the Docker runner appends
+    # to it live), so the size is snapshotted once and exactly that many
+    # bytes are streamed. `Range: bytes=N-` lets a poller fetch only what
+    # was appended since its last read.
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = _parse_byte_range(request.headers.get("range"), size)
+    if byte_range is None:
+        start, length, status_code = 0, size, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=_OUTPUT_MEDIA_TYPE)
+    return StreamingResponse(
+        _iter_log_bytes(log_file, start, length),
+        status_code=status_code,
+        headers=headers,
+        media_type=_OUTPUT_MEDIA_TYPE,
+    )
+
+
+@router.get("/runs/{run_id}/output")
+def get_run_output(
+    run_id: int,
+    request: Request,
+    stream: str = Query(default="stdout", description="stdout or stderr"),
+    db: Session = Depends(get_db),
+    _current_user: User = Depends(get_current_user),
+):
+    """Get stdout or stderr output of a run (supports byte `Range` requests)."""
+    return _run_output_response(db, run_id, stream, request)
+
+
+@router.head("/runs/{run_id}/output")
+def head_run_output(
+    run_id: int,
+    request: Request,
+    stream: str = Query(default="stdout", description="stdout or stderr"),
+    db: Session = Depends(get_db),
+    _current_user: User = Depends(get_current_user),
+):
+    """Current size of a run's output (Content-Length) without the body."""
+    return _run_output_response(db, run_id, stream, request)
 
 
 @router.get("/runs/{run_id}/report")
@@ -1,7 +1,9 @@
 """Docker-based test runner for isolated execution."""
 
+import codecs
 import logging
 import time
+from collections import deque
 from collections.abc import Callable
 from pathlib import Path
 
@@ -19,6 +21,62 @@ logger = logging.getLogger("roboscope.execution.docker")
 # keep working — the symbol lives in `src.docker_client` now (REFACTOR-1).
 __all__ = ["DockerNotAvailableError", "DockerImageNotFoundError", "DockerRunner"]
 
+# The full container output goes to `<output_dir>/stdout.log` and
+# `stderr.log` as it streams; only this many trailing lines per stream are
+# kept in memory for `RunResult.stdout`/`stderr` (error-hint matching and
+# the inline failure message).
+STDOUT_TAIL_LINES = 1000
+
+
+class _LogSink:
+    """One demultiplexed container stream.
+
+    Chunks are decoded INCREMENTALLY (M3: decoding each raw chunk on its
+    own corrupts multibyte UTF-8 — accented DE/FR/ES test names — when a
+    character straddles a chunk boundary), appended to `path` (opened on
+    the first write), and split on real line boundaries for `on_line`.
+    """
+
+    def __init__(self, path: Path, on_line: Callable[[str], None] | None) -> None:
+        self._path = path
+        self._on_line = on_line
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._file = None
+        self._partial = ""
+        self._closed = False
+        self.tail: deque[str] = deque(maxlen=STDOUT_TAIL_LINES)
+
+    def write(self, chunk: bytes) -> None:
+        self._append(self._decoder.decode(chunk))
+
+    def close(self) -> None:
+        """Flush decoder state and the trailing partial line."""
+        if self._closed:
+            return
+        self._closed = True
+        self._append(self._decoder.decode(b"", final=True))
+        if self._file is not None:
+            self._file.close()
+        if self._partial and self._on_line:
+            self._on_line(self._partial)
+
+    def text(self) -> str:
+        """The in-memory tail: complete lines plus any trailing partial."""
+        return "".join(f"{line}\n" for line in self.tail) + self._partial
+
+    def _append(self, text: str) -> None:
+        if not text:
+            return
+        if self._file is None:
+            self._file = self._path.open("w", encoding="utf-8", newline="")
+        self._file.write(text)
+        self._partial += text
+        while "\n" in self._partial:
+            line, self._partial = self._partial.split("\n", 1)
+            self.tail.append(line)
+            if self._on_line:
+                self._on_line(line)
+
 
 class DockerImageNotFoundError(RuntimeError):
     """Raised when the Docker image does not exist locally or in any registry."""
@@ -124,7 +182,9 @@ class DockerRunner(AbstractRunner):
         if variables:
             env_vars.update({f"ROBOT_{k}": str(v) for k, v in variables.items()})
 
-        stdout_lines: list[str] = []
+        out_dir = Path(output_dir)
+        stdout_sink = _LogSink(out_dir / "stdout.log", on_output)
+        stderr_sink = _LogSink(out_dir / "stderr.log", on_output)
         try:
             # Create and start container
             self._container = client.containers.run(
@@ -142,30 +202,22 @@ class DockerRunner(AbstractRunner):
                 cpu_quota=200000,  # 2 CPUs
             )
 
-            # Stream logs. M3: decode INCREMENTALLY and split on real line
-            # boundaries — decoding each raw chunk independently corrupts
-            # multibyte UTF-8 (accented DE/FR/ES test names) when a character
-            # straddles a chunk boundary, and emits partial lines to on_output.
-            import codecs
-
-            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
-            line_buf = ""
-            for log_chunk in self._container.logs(stream=True, follow=True):
-                if self._cancelled:
-                    break
-                text = decoder.decode(log_chunk)
-                if not text:
-                    continue
-                stdout_lines.append(text)
-                line_buf += text
-                while "\n" in line_buf:
-                    complete, line_buf = line_buf.split("\n", 1)
-                    if on_output:
-                        on_output(complete)
-            # Flush any trailing partial line + decoder state at stream end.
-            line_buf += decoder.decode(b"", final=True)
-            if line_buf and on_output:
-                on_output(line_buf)
+            # One attach socket, demultiplexed into (stdout, stderr) frames;
+            # `logs=True` replays anything written before we attached. Both
+            # streams still feed the live `on_output` view.
+            try:
+                for out_chunk, err_chunk in self._container.attach(
+                    stdout=True, stderr=True, stream=True, logs=True, demux=True,
+                ):
+                    if self._cancelled:
+                        break
+                    if out_chunk:
+                        stdout_sink.write(out_chunk)
+                    if err_chunk:
+                        stderr_sink.write(err_chunk)
+            finally:
+                stdout_sink.close()
+                stderr_sink.close()
 
             # Wait for completion
             result = self._container.wait(timeout=timeout)
@@ -184,7 +236,8 @@ class DockerRunner(AbstractRunner):
                 output_xml_path=output_xml if Path(output_xml).exists() else "",
                 log_html_path=log_html if Path(log_html).exists() else "",
                 report_html_path=report_html if Path(report_html).exists() else "",
-                stdout="".join(stdout_lines),
+                stdout=stdout_sink.text(),
+                stderr=stderr_sink.text(),
                 duration_seconds=duration,
             )
 
@@ -205,7 +258,8 @@ class DockerRunner(AbstractRunner):
                 exit_code=-1,
                 output_dir=output_dir,
                 timed_out=timed_out,
-                stdout="".join(stdout_lines),
+                stdout=stdout_sink.text(),
+                stderr=stderr_sink.text(),
                 error_message=(
                     f"Timeout after {timeout} seconds" if timed_out else str(e)
                 ),
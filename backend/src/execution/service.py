@@ -1,9 +1,8 @@
 """Execution service: run management, scheduling."""
 
-import json
 from datetime import datetime, timezone
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from src.execution.models import ExecutionRun, RunStatus, RunType, RunnerType, Schedule
@@ -25,7 +24,7 @@ def create_run(db: Session, data: RunCreate, user_id: int) -> ExecutionRun:
         branch=data.branch,
         tags_include=data.tags_include,
         tags_exclude=data.tags_exclude,
-        variables=json.dumps(data.variables) if data.variables else None,
+        variables=data.variables or None,
         parallel=data.parallel,
         max_retries=data.max_retries,
         timeout_seconds=data.timeout_seconds,
@@ -102,6 +101,21 @@ def update_run_status(
     return run
 
 
+def set_run_fields(db: Session, run_id: int, **values) -> ExecutionRun:
+    """UPDATE columns of a run and load the resulting row in the same statement.
+
+    The in-session instance (if any) is refreshed from the RETURNING row,
+    replacing a flush + refresh pair.
+    """
+    return db.execute(
+        update(ExecutionRun)
+        .where(ExecutionRun.id == run_id)
+        .values(**values)
+        .returning(ExecutionRun),
+        execution_options={"populate_existing": True},
+    ).scalar_one()
+
+
 def cancel_run(db: Session, run: ExecutionRun) -> ExecutionRun:
     """Cancel a pending or running execution."""
     if run.status not in (RunStatus.PENDING, RunStatus.RUNNING):
@@ -1,7 +1,6 @@
 """Background tasks for test execution."""
 
 import asyncio
-import json
 import logging
 import threading
 import uuid
@@ -335,8 +334,7 @@ def execute_test_run(run_id: int) -> dict:
 
             runner.prepare(repo.local_path, run.target_path, env_config)
 
-            # Parse variables
-            variables = json.loads(run.variables) if run.variables else None
+            variables = run.variables or None
 
             # Story FLAKY-2 — if this repo has quarantine entries, dump
             # them into a snapshot file and register the
@@ -426,10 +424,12 @@ def execute_test_run(run_id: int) -> dict:
             # Save stdout/stderr to files in output_dir
             out_path = Path(output_dir)
             out_path.mkdir(parents=True, exist_ok=True)
-            if result.stdout:
-                (out_path / "stdout.log").write_text(result.stdout, encoding="utf-8")
-            if result.stderr:
-                (out_path / "stderr.log").write_text(result.stderr, encoding="utf-8")
+            # The Docker runner streams the full logs there itself and only
+            # returns tails; don't overwrite them with those.
+            for name, text in (("stdout.log", result.stdout), ("stderr.log", result.stderr)):
+                log_path = out_path / name
+                if text and not log_path.exists():
+                    log_path.write_text(text, encoding="utf-8")
 
             # Parse report if output.xml exists
             if result.output_xml_path and Path(result.output_xml_path).exists():
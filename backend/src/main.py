@@ -9,6 +9,7 @@ import webbrowser
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+import anyio.to_thread
 from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -117,6 +118,16 @@ async def lifespan(app: FastAPI):
     logger.info(f"Database: {'SQLite' if settings.is_sqlite else 'PostgreSQL'}")
     logger.info("Task executor: in-process ThreadPoolExecutor (max_workers=1)")
 
+    # Sync handlers run on AnyIO's worker threads; size that pool to the
+    # expected request concurrency so DB-bound requests don't queue for a
+    # thread before they even reach the connection pool.
+    if settings.THREADPOOL_SIZE > 0:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    logger.info(
+        "Request threadpool: %d workers",
+        anyio.to_thread.current_default_thread_limiter().total_tokens,
+    )
+
     # Require SECRET_KEY to be set explicitly
     if not settings.SECRET_KEY:
         logger.error(
@@ -47,7 +47,7 @@ def get_docker_status(
 ):
     """Probe Docker daemon and return status info."""
     # Story REFACTOR-1 — shared bootstrap helper.
-    from src.docker_client import get_docker_client
+    from src.docker_client import get_docker_client, reset_docker_client
     try:
         client = get_docker_client()
         version_info = client.version()
@@ -86,6 +86,7 @@ def get_docker_status(
         }
     except Exception as e:
         logger.warning("Docker status check failed: %s", e)
+        reset_docker_client()
         return {
             "connected": False,
             "error": str(e),
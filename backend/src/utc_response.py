@@ -27,6 +27,7 @@ from __future__ import annotations
 import re
 from typing import Any
 
+import orjson
 from fastapi.responses import JSONResponse
 
 # Match a JSON string whose entire content is a naive ISO 8601 datetime.
@@ -50,5 +51,14 @@ class UtcJSONResponse(JSONResponse):
     """
 
     def render(self, content: Any) -> bytes:
-        body = super().render(content)
+        # orjson: same compact, UTF-8 output as the stdlib path at a
+        # fraction of the CPU; NON_STR_KEYS matches json.dumps' int-key
+        # coercion (e.g. `MeResponse.effective_roles_by_repo`). Unlike
+        # JSONResponse it writes NaN/Infinity as `null` instead of
+        # failing the request.
+        try:
+            body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which json.dumps still handles
+            body = super().render(content)
         return _NAIVE_ISO_DT_RE.sub(rb'"\1Z"', body)
@@ -185,3 +185,20 @@ class TestXrayToRoboscope:
         names = {ts["name"] for ts in result["test_sets"]}
         assert "TS-1" in names
         assert "TS-2" in names
+
+    def test_multiline_precondition_crlf(self):
+        """CRLF precondition text splits into stripped, non-empty lines."""
+        xray_data = {
+            "tests": [
+                {
+                    "testInfo": {
+                        "summary": "Test A",
+                        "precondition": "  Logged in \r\n\r\nCart is empty\n",
+                    },
+                },
+            ],
+        }
+
+        result = xray_to_roboscope(xray_data)
+        tc = result["test_sets"][0]["test_cases"][0]
+        assert tc["preconditions"] == ["Logged in", "Cart is empty"]
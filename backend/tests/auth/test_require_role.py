@@ -0,0 +1,26 @@
+"""Unit tests for the `require_role` dependency factory."""
+
+import pytest
+from fastapi import HTTPException
+
+from src.auth.constants import ROLE_HIERARCHY, ROLE_LEVEL, Role
+from src.auth.dependencies import require_role
+from src.auth.models import User
+
+
+def test_role_level_mirrors_hierarchy():
+    assert {role.value: level for role, level in ROLE_HIERARCHY.items()} == ROLE_LEVEL
+
+
+@pytest.mark.parametrize("role", ["editor", "admin"])
+def test_sufficient_role_passes(role):
+    user = User(email="u@test.com", username="u", role=role)
+    assert require_role(Role.EDITOR)(current_user=user) is user
+
+
+@pytest.mark.parametrize("role", ["viewer", "runner", "not-a-role"])
+def test_insufficient_or_unknown_role_is_forbidden(role):
+    user = User(email="u@test.com", username="u", role=role)
+    with pytest.raises(HTTPException) as exc:
+        require_role(Role.EDITOR)(current_user=user)
+    assert exc.value.status_code == 403
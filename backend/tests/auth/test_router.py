@@ -79,6 +79,26 @@ class TestUserManagement:
         assert response.status_code == 200
         assert isinstance(response.json(), list)
 
+    def test_list_users_keyset_pagination(self, client, admin_user, runner_user, viewer_user):
+        response = client.get(
+            f"/api/v1/auth/users?after_id={admin_user.id}&limit=1",
+            headers=auth_header(admin_user),
+        )
+        assert response.status_code == 200
+        assert [u["id"] for u in response.json()] == [runner_user.id]
+
+    def test_list_users_reflects_new_user(self, client, admin_user):
+        headers = auth_header(admin_user)
+        before = client.get("/api/v1/auth/users", headers=headers).json()
+        client.post("/api/v1/auth/users", json={
+            "email": "fresh@test.com",
+            "username": "fresh",
+            "password": "pass123",
+        }, headers=headers)
+        after = client.get("/api/v1/auth/users", headers=headers)
+        assert len(after.json()) == len(before) + 1
+        assert after.headers["x-total-count"] == str(len(before) + 1)
+
     def test_list_users_non_admin_forbidden(self, client, runner_user):
         response = client.get("/api/v1/auth/users", headers=auth_header(runner_user))
         assert response.status_code == 403
@@ -11,6 +11,9 @@ from src.auth.service import (
     create_user,
     get_user_by_email,
     get_user_by_id,
+    get_cached_user,
+    get_users,
+    count_users,
 )
 from src.auth.schemas import RegisterRequest
 
@@ -29,6 +32,17 @@ class TestPasswordHashing:
         hashed = hash_password("secret123")
         assert verify_password("wrong", hashed) is False
 
+    def test_verify_password_repeat_skips_bcrypt(self, monkeypatch):
+        from src.auth import service
+
+        hashed = hash_password("secret123")
+        assert verify_password("secret123", hashed) is True
+        monkeypatch.setattr(
+            service.bcrypt, "checkpw",
+            lambda *a: pytest.fail("repeat verification should hit the cache"),
+        )
+        assert verify_password("secret123", hashed) is True
+
 
 class TestJwt:
     def test_create_access_token_contains_user_id(self):
@@ -48,6 +62,48 @@ class TestJwt:
         with pytest.raises(ValueError):
             decode_token("invalid.token.here")
 
+    def test_decode_token_cached_per_token(self, monkeypatch):
+        from src.auth import service
+
+        token = create_access_token(43, "viewer")
+        assert decode_token(token)["sub"] == "43"
+
+        def _boom(*args, **kwargs):
+            raise AssertionError("jwt.decode should not run on a cache hit")
+
+        monkeypatch.setattr(service._jwt, "decode", _boom)
+        assert decode_token(token)["sub"] == "43"
+
+    def test_decode_token_cache_honours_expiry(self, monkeypatch):
+        from src.auth import service
+
+        token = create_access_token(44, "viewer")
+        decode_token(token)
+
+        calls = []
+        real_decode = service._jwt.decode
+
+        def _counting_decode(*args, **kwargs):
+            calls.append(1)
+            return real_decode(*args, **kwargs)
+
+        monkeypatch.setattr(service._jwt, "decode", _counting_decode)
+        monkeypatch.setattr(service.time, "time", lambda: 4102444800.0)  # 2100-01-01
+        decode_token(token)
+        assert calls == [1]
+
+    def test_invalid_token_rejected_from_negative_cache(self, monkeypatch):
+        from src.auth import service
+
+        with pytest.raises(ValueError):
+            decode_token("still.not.valid")
+        monkeypatch.setattr(
+            service._jwt, "decode",
+            lambda *a, **kw: pytest.fail("negative cache should short-circuit"),
+        )
+        with pytest.raises(ValueError):
+            decode_token("still.not.valid")
+
 
 class TestUserService:
     def test_create_user(self, db_session):
@@ -67,6 +123,17 @@ class TestUserService:
         assert user is not None
         assert user.id == admin_user.id
 
+    def test_get_auth_user_by_email_returns_credential_row(self, db_session, admin_user):
+        from src.auth.models import User
+        from src.auth.service import get_auth_user_by_email
+
+        row = get_auth_user_by_email(db_session, "admin@test.com")
+        assert not isinstance(row, User)
+        assert row.id == admin_user.id
+        assert row.role == "admin"
+        assert row.is_active is True
+        assert verify_password("admin123", row.hashed_password)
+
     def test_get_user_by_email_not_found(self, db_session):
         user = get_user_by_email(db_session, "nonexistent@test.com")
         assert user is None
@@ -85,6 +152,108 @@ class TestUserService:
         user = authenticate_user(db_session, "admin@test.com", "wrong")
         assert user is None
 
+    async def test_authenticate_user_async_correct(self, db_session, admin_user):
+        from src.auth.service import authenticate_user_async
+
+        user = await authenticate_user_async(db_session, "admin@test.com", "admin123")
+        assert user is not None
+        assert user.id == admin_user.id
+        assert user.last_login_at is not None
+        assert await authenticate_user_async(db_session, "admin@test.com", "wrong") is None
+
+    async def test_authenticate_user_async_queries_off_the_loop(
+        self, db_session, admin_user, monkeypatch,
+    ):
+        import threading
+
+        from src.auth import service
+
+        threads = []
+        real_lookup = service.get_auth_user_by_email
+
+        def lookup(db, email):
+            threads.append(threading.get_ident())
+            return real_lookup(db, email)
+
+        monkeypatch.setattr(service, "get_auth_user_by_email", lookup)
+        assert await service.authenticate_user_async(db_session, "admin@test.com", "admin123")
+        assert threads and threads[0] != threading.get_ident()
+
     def test_authenticate_user_nonexistent(self, db_session):
         user = authenticate_user(db_session, "ghost@test.com", "pass")
         assert user is None
+
+
+class TestUserCache:
+    def test_cached_user_served_without_select(self, db_session, admin_user, monkeypatch):
+        from src.auth import service
+
+        db_session.expunge(admin_user)
+        first = get_cached_user(db_session, admin_user.id)
+        assert admin_user.id in service._user_cache
+
+        db_session.expunge(first)
+        monkeypatch.setattr(
+            service, "get_user_by_id",
+            lambda *a: pytest.fail("cache hit should not query"),
+        )
+        user = get_cached_user(db_session, admin_user.id)
+        assert user is not first
+        assert user.email == "admin@test.com"
+        assert user in db_session
+
+    def test_update_evicts_cached_user(self, db_session, admin_user):
+        from src.auth import service
+
+        db_session.expunge(admin_user)
+        user = get_cached_user(db_session, admin_user.id)
+        assert admin_user.id in service._user_cache
+
+        user.is_active = False
+        db_session.flush()
+        # Other sessions still see the committed row until the commit
+        assert admin_user.id in service._user_cache
+        db_session.commit()
+        assert admin_user.id not in service._user_cache
+
+    def test_read_racing_a_commit_is_not_cached(self, db_session, admin_user, monkeypatch):
+        from src.auth import service
+
+        db_session.expunge(admin_user)
+        real_get = service.get_user_by_id
+
+        def get_during_commit(db, user_id):
+            user = real_get(db, user_id)
+            service._evict_user(user_id)  # a write commits mid-read
+            return user
+
+        monkeypatch.setattr(service, "get_user_by_id", get_during_commit)
+        assert get_cached_user(db_session, admin_user.id) is not None
+        assert admin_user.id not in service._user_cache
+
+
+class TestUserListCache:
+    def test_cached_page_returns_copies(self, db_session, admin_user, monkeypatch):
+        from src.auth import service
+
+        first = get_users(db_session)
+        monkeypatch.setattr(
+            db_session, "execute", lambda *a, **k: pytest.fail("cache hit should not query"),
+        )
+        second = get_users(db_session)
+        third = get_users(db_session)
+        assert [u.email for u in second] == ["admin@test.com"]
+        assert second[0] is not first[0]
+        assert second[0] is not third[0]
+        second[0].username = "mutated"
+        assert service._users_page_cache[(0, 100, None)][1][0].username == "admin"
+
+    def test_count_cached_until_commit(self, db_session, admin_user):
+        assert count_users(db_session) == 1
+        create_user(db_session, RegisterRequest(
+            email="second@test.com", username="second", password="pass123",
+        ))
+        assert count_users(db_session) == 1
+        db_session.commit()
+        assert count_users(db_session) == 2
+
@@ -62,9 +62,14 @@ def db_session(engine):
 
 @pytest.fixture(scope="function")
 def client(db_session: Session):
-    """Provide a test client with overridden DB dependency."""
+    """Provide a test client with overridden DB dependency.
+
+    Like `get_db`, a request that succeeds commits its work, so hooks that
+    run when a transaction ends (cache eviction) fire as in production.
+    """
     def override_get_db():
         yield db_session
+        db_session.commit()
 
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as tc:
@@ -133,12 +138,32 @@ def auth_header(user) -> dict:
 def _reset_process_level_caches():
     """Clear in-process caches that would otherwise leak between tests.
 
-    Currently only the SSO 429-audit dedup dict (sso_router module-level
-    state) — extend this fixture if more per-process caches are added.
+    The SSO 429-audit dedup dict (sso_router module-level state), the
+    auth user snapshot cache (user ids are reused once a test's
+    transaction rolls back), the environment read cache, the pip-list
+    and PyPI search memos, the shared Docker client, queued environment
+    broadcasts and the uv lookup — extend this fixture if more
+    per-process caches are added.
     """
     try:
         from src.auth.sso_router import _clear_audit_dedup_state
         _clear_audit_dedup_state()
     except Exception:
         pass
+    from src.auth.service import clear_user_cache
+    clear_user_cache()
+    from src.environments.service import (
+        clear_env_read_cache,
+        clear_pip_list_cache,
+        clear_pypi_search_cache,
+    )
+    clear_env_read_cache()
+    clear_pip_list_cache()
+    clear_pypi_search_cache()
+    from src.docker_client import reset_docker_client
+    reset_docker_client()
+    from src.environments.tasks import _reset_broadcast_queue
+    _reset_broadcast_queue()
+    from src.environments.venv_utils import _uv_which_cache
+    _uv_which_cache.clear()
     yield
@@ -143,6 +143,12 @@ class TestDockerfileGeneration:
         df = generate_dockerfile("3.12", ["robotframework-browser"], base_image="my-custom:latest")
         assert "FROM my-custom:latest" in df
 
+    def test_repeated_render_is_memoised(self):
+        first = generate_dockerfile("3.12", ["robotframework", "robotframework-requests"])
+        second = generate_dockerfile("3.12", ("robotframework", "robotframework-requests"))
+        assert second is first
+        assert generate_dockerfile("3.13", ["robotframework", "robotframework-requests"]) != first
+
 
 # ---------------------------------------------------------------------------
 # Router conflict check (HTTP 409)
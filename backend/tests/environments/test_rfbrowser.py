@@ -11,6 +11,7 @@ from src.environments.models import Environment, EnvironmentPackage
 from src.environments.service import generate_dockerfile, _has_browser_package
 from src.environments.tasks import (
     _is_browser_package,
+    _rfbrowser_base_env,
     _run_rfbrowser_init,
     install_package,
 )
@@ -92,6 +93,29 @@ class TestRunRfbrowserInit:
         # Verification check called
         mock_check.assert_called_once_with("/fake/venv")
 
+    @patch("src.environments.tasks.check_rfbrowser_initialized", return_value=True)
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_env_is_whitelisted(self, mock_run, mock_broadcast, mock_check, monkeypatch):
+        monkeypatch.setenv("PLAYWRIGHT_BROWSERS_PATH", "/opt/pw")
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy:3128")
+        monkeypatch.setenv("SECRET_KEY", "do-not-leak")
+        _rfbrowser_base_env.cache_clear()
+        mock_run.return_value = MagicMock(returncode=0, stdout="ok", stderr="")
+
+        try:
+            with patch.object(venv_utils.sys, "platform", "linux"):
+                _run_rfbrowser_init(
+                    "/fake/venv", 1, "robotframework-browser", MagicMock(), MagicMock(),
+                )
+        finally:
+            _rfbrowser_base_env.cache_clear()
+
+        env_vars = mock_run.call_args[1]["env"]
+        assert env_vars["PLAYWRIGHT_BROWSERS_PATH"] == "/opt/pw"
+        assert env_vars["HTTPS_PROXY"] == "http://proxy:3128"
+        assert "SECRET_KEY" not in env_vars
+
     @patch("src.environments.tasks.check_rfbrowser_initialized", return_value=False)
     @patch("src.environments.tasks._broadcast_package_status")
     @patch("subprocess.run")
@@ -196,6 +196,28 @@ class TestGetEnvironment:
         response = client.get(f"{URL}/{env.id}")
         assert response.status_code == 401
 
+    def test_get_environment_cache_evicted_on_update(self, client, db_session, admin_user):
+        env = Environment(
+            name="cached-env",
+            python_version="3.12",
+            created_by=admin_user.id,
+        )
+        db_session.add(env)
+        db_session.flush()
+
+        first = client.get(f"{URL}/{env.id}", headers=auth_header(admin_user))
+        assert first.json()["description"] is None
+
+        response = client.patch(
+            f"{URL}/{env.id}",
+            json={"description": "Changed"},
+            headers=auth_header(admin_user),
+        )
+        assert response.status_code == 200
+
+        second = client.get(f"{URL}/{env.id}", headers=auth_header(admin_user))
+        assert second.json()["description"] == "Changed"
+
 
 class TestUpdateEnvironment:
     def test_update_environment_as_admin(self, client, db_session, admin_user):
@@ -268,6 +290,28 @@ class TestDeleteEnvironment:
         )
         assert get_response.status_code == 404
 
+    @patch("src.environments.router.dispatch_task")
+    def test_delete_environment_removes_venv_in_background(
+        self, mock_dispatch, client, db_session, admin_user, tmp_path,
+    ):
+        venv = tmp_path / "venv"
+        venv.mkdir()
+        env = Environment(
+            name="delete-venv-env",
+            python_version="3.12",
+            venv_path=str(venv),
+            created_by=admin_user.id,
+        )
+        db_session.add(env)
+        db_session.flush()
+
+        response = client.delete(f"{URL}/{env.id}", headers=auth_header(admin_user))
+        assert response.status_code == 204
+        assert not venv.exists()
+        func, trash = mock_dispatch.call_args[0]
+        assert func.__name__ == "cleanup_venv"
+        assert trash.startswith(str(venv) + ".deleting-")
+
     def test_delete_environment_not_found(self, client, admin_user):
         response = client.delete(
             f"{URL}/99999",
@@ -404,6 +448,29 @@ class TestPackages:
         assert data[0]["package_name"] == "flask"
         assert data[0]["version"] == "3.0.0"
 
+    def test_rfbrowser_status_not_served_from_cache(self, client, db_session, admin_user):
+        env = Environment(
+            name="pkg-rfb-env", python_version="3.12", venv_path="/tmp/venv",
+            created_by=admin_user.id,
+        )
+        db_session.add(env)
+        db_session.flush()
+        db_session.add(EnvironmentPackage(
+            environment_id=env.id, package_name="robotframework-browser",
+            install_status="installed",
+        ))
+        db_session.flush()
+
+        url = f"{URL}/{env.id}/packages"
+        with patch("src.environments.router.check_rfbrowser_initialized", return_value=False):
+            first = client.get(url, headers=auth_header(admin_user)).json()
+        with patch("src.environments.router.check_rfbrowser_initialized", return_value=True):
+            second = client.get(url, headers=auth_header(admin_user)).json()
+        assert first[0]["rfbrowser_status"] == "needed"
+        assert first[0]["needs_rfbrowser_init"] is True
+        assert second[0]["rfbrowser_status"] == "ok"
+        assert second[0]["needs_rfbrowser_init"] is False
+
     def test_list_packages_env_not_found(self, client, admin_user):
         response = client.get(
             f"{URL}/99999/packages",
@@ -559,6 +626,10 @@ class TestVariables:
         assert secret["value"] == "********"
         assert secret["is_secret"] is True
 
+        # ...in the response only, never on the stored row
+        db_session.refresh(secret_var)
+        assert secret_var.value == "super-secret-value"
+
     def test_list_variables_env_not_found(self, client, admin_user):
         response = client.get(
             f"{URL}/99999/variables",
@@ -881,3 +952,157 @@ class TestRfLibraries:
             headers=auth_header(admin_user),
         )
         assert response.status_code == 404
+
+
+class TestDockerfile:
+    def test_get_dockerfile_is_plain_text(self, client, db_session, admin_user):
+        env = Environment(name="df-env", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+        db_session.add(EnvironmentPackage(
+            environment_id=env.id, package_name="robotframework", version="7.1",
+        ))
+        db_session.flush()
+
+        response = client.get(f"{URL}/{env.id}/dockerfile", headers=auth_header(admin_user))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text.startswith("FROM python:3.12-slim")
+        assert "robotframework==7.1" in response.text
+
+    def test_get_dockerfile_lists_specs_in_build_order(self, client, db_session, admin_user):
+        from src.environments.service import docker_package_specs, generate_dockerfile
+
+        env = Environment(name="df-order", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+        for name in ("robotframework-requests", "Robotframework-Browser"):
+            db_session.add(EnvironmentPackage(environment_id=env.id, package_name=name))
+        db_session.flush()
+
+        response = client.get(f"{URL}/{env.id}/dockerfile", headers=auth_header(admin_user))
+        assert response.status_code == 200
+        specs = docker_package_specs(
+            [("robotframework-requests", None), ("Robotframework-Browser", None)]
+        )
+        assert specs == ["robotframework", "Robotframework-Browser", "robotframework-requests"]
+        assert response.text == generate_dockerfile(python_version="3.12", packages=specs)
+
+
+class TestDockerBuild:
+    @patch("src.environments.router.dispatch_task")
+    def test_docker_build_dispatches_and_returns_tag(
+        self, mock_dispatch, client, db_session, admin_user,
+    ):
+        env = Environment(name="Build Env", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+        db_session.add(EnvironmentPackage(environment_id=env.id, package_name="robotframework"))
+        db_session.flush()
+
+        response = client.post(f"{URL}/{env.id}/docker-build", headers=auth_header(admin_user))
+        assert response.status_code == 200
+        assert response.json() == {"status": "building", "image_tag": "roboscope/build-env:latest"}
+        mock_dispatch.assert_called_once()
+
+    def test_docker_build_without_packages(self, client, db_session, admin_user):
+        env = Environment(name="empty-build-env", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+
+        response = client.post(f"{URL}/{env.id}/docker-build", headers=auth_header(admin_user))
+        assert response.status_code == 400
+
+
+class TestSetupDefault:
+    @patch("src.environments.router._is_docker_available", return_value=False)
+    @patch("src.environments.router.dispatch_task")
+    def test_setup_default_creates_env(
+        self, mock_dispatch, _mock_docker, client, db_session, admin_user,
+    ):
+        response = client.post(f"{URL}/setup-default", headers=auth_header(admin_user))
+        assert response.status_code == 201
+        assert response.json()["name"] == "roboscope-default"
+
+        from src.environments.router import DEFAULT_RF_PACKAGES
+
+        packages = db_session.execute(
+            select(EnvironmentPackage).where(
+                EnvironmentPackage.environment_id == response.json()["id"]
+            )
+        ).scalars().all()
+        assert sorted(p.package_name for p in packages) == sorted(DEFAULT_RF_PACKAGES)
+        assert all(p.install_status == "pending" for p in packages)
+
+    def test_setup_default_conflict(self, client, db_session, admin_user):
+        db_session.add(Environment(
+            name="roboscope-default",
+            python_version="3.12",
+            created_by=admin_user.id,
+        ))
+        db_session.flush()
+
+        response = client.post(f"{URL}/setup-default", headers=auth_header(admin_user))
+        assert response.status_code == 409
+
+
+class TestPopularPackages:
+    def test_popular_packages(self, client, viewer_user):
+        from src.environments.router import POPULAR_RF_LIBRARIES
+
+        response = client.get(f"{URL}/packages/popular", headers=auth_header(viewer_user))
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == POPULAR_RF_LIBRARIES
+
+
+class TestSearchPackages:
+    @patch("src.environments.router.search_pypi", return_value=[])
+    def test_search_is_privately_cacheable(self, mock_search, client, viewer_user):
+        response = client.get(
+            f"{URL}/packages/search", params={"q": "robot"}, headers=auth_header(viewer_user),
+        )
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "private, max-age=300"
+        mock_search.assert_called_once_with("robot")
+
+
+class TestDockerAvailability:
+    def setup_method(self):
+        import src.environments.router as env_router
+        env_router._docker_probe = None
+
+    teardown_method = setup_method
+
+    def test_missing_binary_skips_subprocess(self):
+        from src.environments.router import _is_docker_available
+
+        with patch("src.environments.router.shutil.which", return_value=None), \
+                patch("subprocess.run") as mock_run:
+            assert _is_docker_available() is False
+        mock_run.assert_not_called()
+
+    def test_probe_result_is_cached(self):
+        from src.environments.router import _is_docker_available
+
+        with patch("src.environments.router.shutil.which", return_value="/usr/bin/docker"), \
+                patch("subprocess.run", return_value=MagicMock(returncode=0)) as mock_run:
+            assert _is_docker_available() is True
+            assert _is_docker_available() is True
+        mock_run.assert_called_once()
+
+    def test_negative_result_is_reprobed_after_retry_window(self, monkeypatch):
+        import src.environments.router as env_router
+
+        clock = [1000.0]
+        monkeypatch.setattr(env_router.time, "monotonic", lambda: clock[0])
+        with patch("src.environments.router.shutil.which", return_value=None) as mock_which:
+            assert env_router._is_docker_available() is False
+            clock[0] += env_router._DOCKER_RETRY_SECONDS - 1
+            assert env_router._is_docker_available() is False
+            assert mock_which.call_count == 1
+
+            mock_which.return_value = "/usr/bin/docker"
+            clock[0] += 2
+            with patch("subprocess.run", return_value=MagicMock(returncode=0)):
+                assert env_router._is_docker_available() is True
@@ -1,5 +1,10 @@
 """Tests for environment management service."""
 
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import httpx
 import pytest
 
 from src.environments.models import Environment, EnvironmentPackage, EnvironmentVariable
@@ -7,14 +12,21 @@ from src.environments.schemas import EnvCreate, EnvUpdate, EnvVarCreate, Package
 from src.environments.service import (
     add_package,
     add_variable,
+    cache_env_read,
     clone_environment,
     create_environment,
     delete_environment,
+    docker_image_tag,
+    get_cached_env_read,
     get_environment,
+    get_environment_package,
+    get_environment_with_packages,
     list_environments,
     list_packages,
     list_variables,
+    pip_list_installed,
     remove_package,
+    search_pypi,
     update_environment,
 )
 
@@ -44,6 +56,21 @@ class TestListEnvironments:
         assert result[0].name == "alpha"
         assert result[1].name == "beta"
 
+    def test_list_environments_keyset_pages(self, db_session, admin_user):
+        envs = [
+            Environment(name=name, python_version="3.12", created_by=admin_user.id)
+            for name in ("gamma", "alpha", "beta")
+        ]
+        db_session.add_all(envs)
+        db_session.flush()
+        ids = sorted(e.id for e in envs)
+
+        first = list_environments(db_session, limit=2)
+        assert [e.id for e in first] == ids[:2]
+
+        second = list_environments(db_session, limit=2, after_id=first[-1].id)
+        assert [e.id for e in second] == ids[2:]
+
 
 class TestGetEnvironment:
     def test_get_environment_found(self, db_session, admin_user):
@@ -175,6 +202,31 @@ class TestDeleteEnvironment:
         variables = list_variables(db_session, env_id)
         assert variables == []
 
+    def test_venv_renamed_for_background_removal(self, db_session, admin_user, tmp_path):
+        venv = tmp_path / "env-venv"
+        (venv / "bin").mkdir(parents=True)
+        env = Environment(
+            name="trash-env",
+            python_version="3.12",
+            venv_path=str(venv),
+            created_by=admin_user.id,
+        )
+        db_session.add(env)
+        db_session.flush()
+
+        trash = delete_environment(db_session, env)
+
+        assert not venv.exists()
+        assert trash is not None and trash.parent == tmp_path
+        assert trash.name.startswith("env-venv.deleting-")
+        assert (trash / "bin").is_dir()
+
+    def test_no_venv_nothing_to_remove(self, db_session, admin_user):
+        env = Environment(name="bare-env", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+        assert delete_environment(db_session, env) is None
+
 
 class TestCloneEnvironment:
     def test_clone_environment(self, db_session, admin_user):
@@ -217,6 +269,7 @@ class TestCloneEnvironment:
         assert len(cloned_packages) == 2
         pkg_names = {p.package_name for p in cloned_packages}
         assert pkg_names == {"pytest", "requests"}
+        assert {p.environment_id for p in cloned_packages} == {cloned.id}
 
         # Verify variables were copied
         cloned_vars = list_variables(db_session, cloned.id)
@@ -225,6 +278,8 @@ class TestCloneEnvironment:
         assert var_keys == {"DB_HOST", "SECRET"}
         secret_var = next(v for v in cloned_vars if v.key == "SECRET")
         assert secret_var.is_secret is True
+        source_secret = next(v for v in list_variables(db_session, source.id) if v.key == "SECRET")
+        assert secret_var.value == source_secret.value
 
 
 class TestPackages:
@@ -241,6 +296,49 @@ class TestPackages:
         result = list_packages(db_session, env.id)
         assert result == []
 
+    def test_get_environment_with_packages(self, db_session, admin_user):
+        env = Environment(
+            name="pkg-fused-env",
+            python_version="3.12",
+            created_by=admin_user.id,
+        )
+        db_session.add(env)
+        db_session.flush()
+        db_session.refresh(env)
+
+        loaded, packages = get_environment_with_packages(db_session, env.id)
+        assert loaded.id == env.id
+        assert packages == []
+
+        add_package(db_session, env.id, PackageCreate(package_name="zeep"))
+        add_package(db_session, env.id, PackageCreate(package_name="flask"))
+        loaded, packages = get_environment_with_packages(db_session, env.id)
+        assert loaded.id == env.id
+        assert [p.package_name for p in packages] == ["flask", "zeep"]
+
+        assert get_environment_with_packages(db_session, 99999) == (None, [])
+
+    def test_get_environment_package(self, db_session, admin_user):
+        env = Environment(
+            name="pkg-single-env",
+            python_version="3.12",
+            created_by=admin_user.id,
+        )
+        db_session.add(env)
+        db_session.flush()
+        db_session.refresh(env)
+        add_package(db_session, env.id, PackageCreate(package_name="flask"))
+
+        loaded, pkg = get_environment_package(db_session, env.id, "flask")
+        assert loaded.id == env.id
+        assert pkg.package_name == "flask"
+
+        loaded, pkg = get_environment_package(db_session, env.id, "missing")
+        assert loaded.id == env.id
+        assert pkg is None
+
+        assert get_environment_package(db_session, 99999, "flask") == (None, None)
+
     def test_add_package(self, db_session, admin_user):
         env = Environment(
             name="pkg-add-env",
@@ -275,6 +373,27 @@ class TestPackages:
         assert pkg.package_name == "numpy"
         assert pkg.version is None
 
+    def test_add_existing_package_resets_row(self, db_session, admin_user):
+        env = Environment(name="pkg-readd-env", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+        first = add_package(db_session, env.id, PackageCreate(package_name="flask", version="2.0"))
+        first.install_status = "failed"
+        first.install_error = "boom"
+        first.installed_version = "2.0"
+        db_session.flush()
+
+        again = add_package(
+            db_session, env.id, PackageCreate(package_name="flask", version="3.0.0"),
+        )
+
+        assert again is first
+        assert again.version == "3.0.0"
+        assert again.install_status == "pending"
+        assert again.install_error is None
+        assert again.installed_version is None
+        assert len(list_packages(db_session, env.id)) == 1
+
     def test_remove_package(self, db_session, admin_user):
         env = Environment(
             name="pkg-rm-env",
@@ -291,7 +410,7 @@ class TestPackages:
         packages_before = list_packages(db_session, env.id)
         assert len(packages_before) == 1
 
-        remove_package(db_session, env.id, "django")
+        assert remove_package(db_session, env.id, "django") is True
 
         packages_after = list_packages(db_session, env.id)
         assert len(packages_after) == 0
@@ -307,7 +426,7 @@ class TestPackages:
         db_session.refresh(env)
 
         # Should not raise
-        remove_package(db_session, env.id, "nonexistent-pkg")
+        assert remove_package(db_session, env.id, "nonexistent-pkg") is False
 
     def test_list_packages_ordered_by_name(self, db_session, admin_user):
         env = Environment(
@@ -396,3 +515,209 @@ class TestVariables:
 
         variables = list_variables(db_session, env.id)
         assert [v.key for v in variables] == ["AAA", "MMM", "ZZZ"]
+
+
+class TestSearchPyPI:
+    def test_client_is_shared(self):
+        from src.environments.service import _pypi_client
+
+        assert _pypi_client() is _pypi_client()
+
+    def _client(self, get):
+        client = MagicMock()
+        client.get.side_effect = get
+        return client
+
+    def test_repeated_query_served_from_cache(self):
+        def get(url, **kwargs):
+            if url.endswith("/json"):
+                return MagicMock(status_code=200, json=lambda: {
+                    "info": {
+                        "name": "robotframework", "version": "7.1", "summary": "", "author": "",
+                    },
+                })
+            return MagicMock(status_code=200, headers={}, json=lambda: {"projects": []})
+
+        client = self._client(get)
+        with patch("src.environments.service._pypi_client", return_value=client):
+            first = search_pypi("robotframework")
+            second = search_pypi("RobotFramework ")
+
+        assert first == second
+        assert first[0]["name"] == "robotframework"
+        assert client.get.call_count == 2  # JSON + simple index, once
+
+    def test_failed_lookup_not_cached(self):
+        client = self._client(httpx.ConnectError("offline"))
+        with patch("src.environments.service._pypi_client", return_value=client):
+            assert search_pypi("requests") == []
+            assert search_pypi("requests") == []
+
+        assert client.get.call_count == 2
+
+    def _index_client(self, simple_responses):
+        def get(url, **kwargs):
+            if url.endswith("/json"):
+                return MagicMock(status_code=404)
+            return simple_responses.pop(0)
+
+        return self._client(get)
+
+    def test_upstream_error_not_cached(self):
+        client = self._index_client([MagicMock(status_code=503), MagicMock(status_code=503)])
+        with patch("src.environments.service._pypi_client", return_value=client):
+            assert search_pypi("requests") == []
+            assert search_pypi("requests") == []
+
+        simple_calls = [c for c in client.get.call_args_list if c.args[0].endswith("/simple/")]
+        assert len(simple_calls) == 2
+
+    def test_exact_match_error_not_cached(self):
+        def get(url, **kwargs):
+            if url.endswith("/json"):
+                return MagicMock(status_code=503)
+            return MagicMock(status_code=200, headers={}, json=lambda: {"projects": []})
+
+        client = self._client(get)
+        with patch("src.environments.service._pypi_client", return_value=client):
+            search_pypi("requests")
+            search_pypi("requests")
+
+        json_calls = [c for c in client.get.call_args_list if c.args[0].endswith("/json")]
+        assert len(json_calls) == 2
+
+    def test_project_index_fetched_once_across_queries(self):
+        index = MagicMock(
+            status_code=200,
+            headers={"ETag": '"v1"'},
+            json=lambda: {"projects": [{"name": "robotframework-Browser"}, {"name": "requests"}]},
+        )
+        client = self._index_client([index])
+        with patch("src.environments.service._pypi_client", return_value=client):
+            assert [r["name"] for r in search_pypi("browser")] == ["robotframework-Browser"]
+            assert [r["name"] for r in search_pypi("requ")] == ["requests"]
+
+        simple_calls = [c for c in client.get.call_args_list if c.args[0].endswith("/simple/")]
+        assert len(simple_calls) == 1
+
+    def test_project_index_revalidated_with_etag(self, monkeypatch):
+        from src.environments import service
+
+        monkeypatch.setattr(service, "_PYPI_INDEX_TTL", 0.0)
+        index = MagicMock(
+            status_code=200,
+            headers={"ETag": '"v1"'},
+            json=lambda: {"projects": [{"name": "requests"}]},
+        )
+        client = self._index_client([index, MagicMock(status_code=304)])
+        with patch("src.environments.service._pypi_client", return_value=client):
+            search_pypi("requ")
+            assert [r["name"] for r in search_pypi("reques")] == ["requests"]
+
+        revalidation = client.get.call_args_list[-1]
+        assert revalidation.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+    def test_project_index_ranks_prefix_hits_first(self):
+        from src.environments.service import _PyPIProjectIndex
+
+        index = _PyPIProjectIndex.build(
+            ["robotframework-requests", "Requests", "requests-oauthlib", "types-requests", "flask"]
+        )
+        assert index.match("requests", 20) == [
+            "Requests", "requests-oauthlib", "robotframework-requests", "types-requests",
+        ]
+        assert index.match("requests", 2) == ["Requests", "requests-oauthlib"]
+        assert index.match("nomatch", 20) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX venv layout")
+class TestPipListInstalled:
+    def _venv(self, tmp_path):
+        (tmp_path / "bin").mkdir()
+        (tmp_path / "bin" / "python").touch()
+        site_packages = tmp_path / "lib" / "python3.12" / "site-packages"
+        site_packages.mkdir(parents=True)
+        return site_packages
+
+    def _dist(self, site_packages, name, version):
+        dist_info = site_packages / f"{name.replace('-', '_')}-{version}.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+        )
+
+    def test_reads_dist_info_without_subprocess(self, tmp_path):
+        site_packages = self._venv(tmp_path)
+        self._dist(site_packages, "robotframework-browser", "19.1.0")
+        self._dist(site_packages, "Robotframework", "7.1")
+        (site_packages / "_virtualenv.py").touch()
+
+        with patch("src.environments.service.subprocess.run") as mock_run:
+            assert pip_list_installed(str(tmp_path)) == [
+                {"name": "Robotframework", "version": "7.1"},
+                {"name": "robotframework-browser", "version": "19.1.0"},
+            ]
+        mock_run.assert_not_called()
+
+    def test_cached_until_site_packages_changes(self, tmp_path):
+        site_packages = self._venv(tmp_path)
+        # Legacy egg-info metadata routes the listing through `uv pip list`
+        (site_packages / "legacy-1.0.egg-info").mkdir()
+        listing = MagicMock(returncode=0, stdout='[{"name": "robotframework", "version": "7.1"}]')
+
+        with patch("src.environments.venv_utils.get_uv_path", return_value="uv"), \
+                patch("src.environments.service.subprocess.run", return_value=listing) as mock_run:
+            first = pip_list_installed(str(tmp_path))
+            second = pip_list_installed(str(tmp_path))
+            assert mock_run.call_count == 1
+            assert first == second == [{"name": "robotframework", "version": "7.1"}]
+
+            stat = site_packages.stat()
+            os.utime(site_packages, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            pip_list_installed(str(tmp_path))
+            assert mock_run.call_count == 2
+
+    def test_failed_listing_not_cached(self, tmp_path):
+        site_packages = self._venv(tmp_path)
+        (site_packages / "legacy-1.0.egg-info").mkdir()
+        failure = MagicMock(returncode=1, stdout="")
+
+        with patch("src.environments.venv_utils.get_uv_path", return_value="uv"), \
+                patch("src.environments.service.subprocess.run", return_value=failure) as mock_run:
+            assert pip_list_installed(str(tmp_path)) == []
+            assert pip_list_installed(str(tmp_path)) == []
+            assert mock_run.call_count == 2
+
+
+class TestDockerImageTag:
+    def test_slugifies_name(self):
+        assert docker_image_tag("My Env") == "roboscope/my-env:latest"
+        assert docker_image_tag("team/Env\tOne") == "roboscope/team-env-one:latest"
+
+
+class TestEnvReadCache:
+    def _env(self, db_session, admin_user):
+        env = Environment(name="cache-env", python_version="3.12", created_by=admin_user.id)
+        db_session.add(env)
+        db_session.flush()
+        cache_env_read("env", env.id, {"name": env.name})
+        return env
+
+    def test_orm_write_evicts_on_commit(self, db_session, admin_user):
+        env = self._env(db_session, admin_user)
+        env.description = "changed"
+        db_session.flush()
+        # Other sessions still see the committed row until the commit
+        assert get_cached_env_read("env", env.id) is not None
+        db_session.commit()
+        assert get_cached_env_read("env", env.id) is None
+
+    def test_bulk_write_evicts_on_commit(self, db_session, admin_user):
+        env = self._env(db_session, admin_user)
+        db_session.commit()
+        cache_env_read("packages", env.id, [])
+        remove_package(db_session, env.id, "robotframework")
+        assert get_cached_env_read("packages", env.id) == []
+        db_session.commit()
+        assert get_cached_env_read("packages", env.id) is None
+
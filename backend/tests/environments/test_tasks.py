@@ -1,14 +1,22 @@
 """Unit tests for environment background tasks."""
 
+import asyncio
 import subprocess
+import tarfile
 from unittest.mock import MagicMock, patch
 
 from sqlalchemy import select
 
 from src.environments.models import Environment, EnvironmentPackage
 from src.environments.tasks import (
+    _broadcast_package_status,
+    _drain_broadcasts,
+    _pip_show_version,
+    _stream_build_context,
+    build_docker_image,
     create_venv,
     install_package,
+    install_packages,
     uninstall_package,
     upgrade_package,
 )
@@ -31,11 +39,14 @@ def _make_env(db_session, name="test-env", venv_path="/tmp/test-venv", create_di
     return env
 
 
-def _make_package(db_session, env_id: int, name: str = "requests") -> EnvironmentPackage:
+def _make_package(
+    db_session, env_id: int, name: str = "requests", version: str | None = None,
+) -> EnvironmentPackage:
     """Helper to create an EnvironmentPackage row."""
     pkg = EnvironmentPackage(
         environment_id=env_id,
         package_name=name,
+        version=version,
     )
     db_session.add(pkg)
     db_session.flush()
@@ -75,6 +86,52 @@ class TestCreateVenv:
             for arg in heal_cmd
         ), f"heal vendor path missing from third subprocess call: {heal_cmd!r}"
 
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_existing_venv_without_heal_gets_heal_only(
+        self, mock_run, _mock_broadcast, db_session, tmp_path
+    ):
+        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+        venv = tmp_path / "seeded-venv"
+        dist_info = venv / "lib" / "python3.12" / "site-packages" / "robotframework-7.1.dist-info"
+        dist_info.mkdir(parents=True)
+        (dist_info / "METADATA").write_text("Name: robotframework\nVersion: 7.1\n")
+        env = _make_env(db_session, venv_path=str(venv))
+        db_session.commit()
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = create_venv(env.id)
+
+        assert result["status"] == "success"
+        # robotframework is already there, so only the heal install runs.
+        assert mock_run.call_count == 1
+        heal_cmd = mock_run.call_args[0][0]
+        assert any("robotframework-roboscopeheal" in str(arg) for arg in heal_cmd)
+
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_fully_seeded_venv_is_left_alone(
+        self, mock_run, _mock_broadcast, db_session, tmp_path
+    ):
+        site = tmp_path / "seeded-venv" / "lib" / "python3.12" / "site-packages"
+        for dist, version in (("robotframework", "7.1"), ("robotframework_roboscopeheal", "0.1.0")):
+            dist_info = site / f"{dist}-{version}.dist-info"
+            dist_info.mkdir(parents=True)
+            (dist_info / "METADATA").write_text(f"Name: {dist}\nVersion: {version}\n")
+        venv = tmp_path / "seeded-venv"
+        env = _make_env(db_session, venv_path=str(venv))
+        db_session.commit()
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = create_venv(env.id)
+
+        assert result["status"] == "success"
+        mock_run.assert_not_called()
+
     @patch("src.environments.tasks._broadcast_package_status")
     @patch("subprocess.run")
     def test_env_not_found(self, mock_run, _mock_broadcast, db_session):
@@ -112,6 +169,33 @@ class TestInstallPackage:
         install_cmd = mock_run.call_args_list[0][0][0]
         assert "install" in install_cmd
         assert "robotframework" in install_cmd
+        # stdout is discarded, only stderr is kept for error reporting
+        install_kwargs = mock_run.call_args_list[0].kwargs
+        assert install_kwargs["stdout"] is subprocess.DEVNULL
+        assert install_kwargs["stderr"] is subprocess.PIPE
+
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_install_success_commits_twice(self, mock_run, _mock_broadcast, db_session):
+        env = _make_env(db_session, create_dir=True)
+        _make_package(db_session, env.id, "robotframework")
+        db_session.commit()
+
+        mock_run.side_effect = [
+            MagicMock(returncode=0, stdout="", stderr=""),
+            MagicMock(returncode=0, stdout="Name: robotframework\nVersion: 7.0\n", stderr=""),
+        ]
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs, \
+             patch.object(db_session, "commit", wraps=db_session.commit) as mock_commit:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = install_package(env.id, "robotframework")
+
+        assert result["status"] == "success"
+        # "installing" flip, then status + packages_changed_at together
+        assert mock_commit.call_count == 2
+        assert env.packages_changed_at is not None
 
     @patch("src.environments.tasks._broadcast_package_status")
     @patch("subprocess.run")
@@ -232,6 +316,141 @@ class TestInstallPackage:
         ), "vendor path leaked into versioned install argv"
 
 
+class TestInstallPackages:
+    @patch("src.environments.venv_utils.get_uv_path", return_value="uv")
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_single_resolver_run(self, mock_run, _mock_broadcast, _mock_uv, db_session, tmp_path):
+        env = _make_env(db_session, venv_path=str(tmp_path / "venv"), create_dir=True)
+        _make_package(db_session, env.id, "robotframework")
+        _make_package(db_session, env.id, "robotframework_requests")
+        db_session.commit()
+
+        mock_run.side_effect = [
+            MagicMock(returncode=0, stdout="", stderr=""),  # combined install
+            MagicMock(returncode=0, stdout=(
+                "Name: robotframework\nVersion: 7.0\n---\n"
+                "Name: robotframework-requests\nVersion: 0.9.7\n"
+            ), stderr=""),  # combined show
+        ]
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = install_packages(env.id, ["robotframework", "robotframework_requests"])
+
+        assert result["status"] == "success"
+        assert mock_run.call_count == 2
+        install_cmd = mock_run.call_args_list[0][0][0]
+        assert install_cmd[-2:] == ["robotframework", "robotframework_requests"]
+        pkgs = {
+            p.package_name: p for p in db_session.execute(
+                select(EnvironmentPackage).where(EnvironmentPackage.environment_id == env.id)
+            ).scalars()
+        }
+        assert pkgs["robotframework"].installed_version == "7.0"
+        assert pkgs["robotframework_requests"].installed_version == "0.9.7"
+        assert all(p.install_status == "installed" for p in pkgs.values())
+
+    @patch("src.environments.venv_utils.get_uv_path", return_value="uv")
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_pinned_versions_in_combined_install(
+        self, mock_run, _mock_broadcast, _mock_uv, db_session, tmp_path,
+    ):
+        env = _make_env(db_session, venv_path=str(tmp_path / "venv"), create_dir=True)
+        _make_package(db_session, env.id, "robotframework", version="7.0")
+        _make_package(db_session, env.id, "robotframework-requests")
+        db_session.commit()
+
+        mock_run.side_effect = [
+            MagicMock(returncode=0, stdout="", stderr=""),
+            MagicMock(returncode=0, stdout=(
+                "Name: robotframework\nVersion: 7.0\n---\n"
+                "Name: robotframework-requests\nVersion: 0.9.7\n"
+            ), stderr=""),
+        ]
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = install_packages(env.id, ["robotframework", "robotframework-requests"])
+
+        assert result["status"] == "success"
+        install_cmd = mock_run.call_args_list[0][0][0]
+        assert install_cmd[-2:] == ["robotframework==7.0", "robotframework-requests"]
+
+    @patch("src.environments.venv_utils.get_uv_path", return_value="uv")
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_versions_read_from_metadata(
+        self, mock_run, _mock_broadcast, _mock_uv, db_session, tmp_path,
+    ):
+        venv = tmp_path / "venv"
+        site = venv / "lib" / "python3.12" / "site-packages"
+        for dist, version in (("robotframework", "7.0"), ("robotframework_requests", "0.9.7")):
+            dist_info = site / f"{dist}-{version}.dist-info"
+            dist_info.mkdir(parents=True)
+            (dist_info / "METADATA").write_text(
+                f"Metadata-Version: 2.1\nName: {dist}\nVersion: {version}\n"
+            )
+        env = _make_env(db_session, venv_path=str(venv))
+        _make_package(db_session, env.id, "robotframework")
+        _make_package(db_session, env.id, "robotframework-requests")
+        db_session.commit()
+
+        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = install_packages(env.id, ["robotframework", "robotframework-requests"])
+
+        assert result["status"] == "success"
+        # Only the install itself; no `pip show` round-trip
+        assert mock_run.call_count == 1
+        pkgs = {
+            p.package_name: p for p in db_session.execute(
+                select(EnvironmentPackage).where(EnvironmentPackage.environment_id == env.id)
+            ).scalars()
+        }
+        assert pkgs["robotframework"].installed_version == "7.0"
+        assert pkgs["robotframework-requests"].installed_version == "0.9.7"
+
+    @patch("src.environments.venv_utils.get_uv_path", return_value="uv")
+    @patch("src.environments.tasks._broadcast_package_status")
+    @patch("subprocess.run")
+    def test_failed_batch_falls_back_to_individual_installs(
+        self, mock_run, _mock_broadcast, _mock_uv, db_session, tmp_path,
+    ):
+        env = _make_env(db_session, venv_path=str(tmp_path / "venv"), create_dir=True)
+        _make_package(db_session, env.id, "good-pkg")
+        _make_package(db_session, env.id, "bad-pkg")
+        db_session.commit()
+
+        mock_run.side_effect = [
+            subprocess.CalledProcessError(1, "uv", stderr="resolution failed"),
+            MagicMock(returncode=0, stdout="", stderr=""),  # good-pkg install
+            MagicMock(returncode=0, stdout="Name: good-pkg\nVersion: 1.0\n", stderr=""),
+            subprocess.CalledProcessError(1, "uv", stderr="No matching distribution"),
+        ]
+
+        with patch("src.environments.tasks.get_sync_session") as mock_gs:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = install_packages(env.id, ["good-pkg", "bad-pkg"])
+
+        assert result["status"] == "error"
+        pkgs = {
+            p.package_name: p for p in db_session.execute(
+                select(EnvironmentPackage).where(EnvironmentPackage.environment_id == env.id)
+            ).scalars()
+        }
+        assert pkgs["good-pkg"].install_status == "installed"
+        assert pkgs["bad-pkg"].install_status == "failed"
+        assert "No matching distribution" in pkgs["bad-pkg"].install_error
+
+
 class TestUpgradePackage:
     @patch("src.environments.tasks._broadcast_package_status")
     @patch("subprocess.run")
@@ -274,3 +493,151 @@ class TestUninstallPackage:
         cmd = mock_run.call_args_list[0][0][0]
         assert "uninstall" in cmd
         assert "requests" in cmd
+
+
+class TestPipShowVersion:
+    def test_extracts_version(self):
+        out = "Name: robotframework\nVersion: 7.1.1\nSummary: Generic automation framework\n"
+        assert _pip_show_version(out) == "7.1.1"
+
+    def test_missing_version(self):
+        assert _pip_show_version("WARNING: Package(s) not found: nope\n") is None
+
+
+class TestStreamBuildContext:
+    def test_tar_streamed_through_pipe(self):
+        with (
+            _stream_build_context({"Dockerfile": b"FROM python:3.12-slim\n"}) as context,
+            tarfile.open(fileobj=context, mode="r|") as tar,
+        ):
+            members = [(m.name, tar.extractfile(m).read()) for m in tar]
+        assert members == [("Dockerfile", b"FROM python:3.12-slim\n")]
+
+
+class TestBuildDockerImage:
+    @patch("src.environments.tasks._check_docker_disk_space")
+    @patch("src.environments.tasks._broadcast_docker_build_log")
+    def test_dockerfile_lists_package_specs(self, _mock_log, _mock_disk, db_session):
+        env = _make_env(db_session, name="docker-env")
+        _make_package(db_session, env.id, "robotframework", version="7.0")
+        _make_package(db_session, env.id, "robotframework-requests")
+        db_session.commit()
+
+        sent = {}
+
+        def fake_build(fileobj, **kwargs):
+            with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+                for member in tar:
+                    sent[member.name] = tar.extractfile(member).read().decode()
+            return iter([{"stream": "Successfully built\n"}])
+
+        client = MagicMock()
+        client.api.build.side_effect = fake_build
+        client.images.prune.return_value = {}
+        with patch("src.environments.tasks.get_sync_session") as mock_gs, \
+             patch("src.docker_client.get_docker_client", return_value=client):
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = build_docker_image(env.id)
+
+        assert result["status"] == "success"
+        assert "robotframework==7.0" in sent["Dockerfile"]
+        assert "robotframework-requests" in sent["Dockerfile"]
+        # Specs are sorted so equal package sets give identical layers
+        dockerfile = sent["Dockerfile"]
+        assert dockerfile.index("robotframework-requests") < dockerfile.index("robotframework==7.0")
+        assert env.docker_build_status == "success"
+        assert env.docker_image_hash is not None
+
+    @patch("src.environments.tasks._check_docker_disk_space")
+    @patch("src.environments.tasks._broadcast_docker_build_log")
+    def test_unchanged_dockerfile_skips_rebuild(self, _mock_log, _mock_disk, db_session):
+        env = _make_env(db_session, name="cached-docker-env")
+        db_session.commit()
+
+        client = MagicMock()
+        client.api.build.side_effect = lambda **kwargs: iter([{"stream": "built\n"}])
+        client.images.prune.return_value = {}
+        with patch("src.environments.tasks.get_sync_session") as mock_gs, \
+             patch("src.docker_client.get_docker_client", return_value=client):
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            first = build_docker_image(env.id)
+            second = build_docker_image(env.id)
+
+        assert first == second == {"status": "success", "image_tag": env.docker_image}
+        client.api.build.assert_called_once()
+        client.images.get.assert_called_once_with(env.docker_image)
+        assert env.docker_build_status == "success"
+
+    @patch("src.environments.tasks._check_docker_disk_space")
+    @patch("src.environments.tasks._broadcast_docker_build_log")
+    def test_missing_image_is_rebuilt(self, _mock_log, _mock_disk, db_session):
+        import docker.errors
+
+        env = _make_env(db_session, name="pruned-docker-env")
+        db_session.commit()
+
+        client = MagicMock()
+        client.api.build.side_effect = lambda **kwargs: iter([{"stream": "built\n"}])
+        client.images.prune.return_value = {}
+        client.images.get.side_effect = docker.errors.ImageNotFound("gone")
+        with patch("src.environments.tasks.get_sync_session") as mock_gs, \
+             patch("src.docker_client.get_docker_client", return_value=client):
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            build_docker_image(env.id)
+            build_docker_image(env.id)
+
+        assert client.api.build.call_count == 2
+
+    @patch("src.environments.tasks._check_docker_disk_space")
+    @patch("src.environments.tasks._broadcast_docker_build_log")
+    def test_reconnects_once_when_cached_client_is_stale(self, _mock_log, _mock_disk, db_session):
+        import requests
+
+        env = _make_env(db_session, name="stale-docker-env")
+        db_session.commit()
+
+        stale = MagicMock()
+        stale.api.build.side_effect = requests.exceptions.ConnectionError("socket closed")
+        fresh = MagicMock()
+        fresh.api.build.return_value = iter([{"stream": "Successfully built\n"}])
+        fresh.images.prune.return_value = {}
+        with patch("src.environments.tasks.get_sync_session") as mock_gs, \
+             patch("src.docker_client.get_docker_client", side_effect=[stale, fresh]), \
+             patch("src.docker_client.reset_docker_client") as mock_reset:
+            mock_gs.return_value.__enter__ = MagicMock(return_value=db_session)
+            mock_gs.return_value.__exit__ = MagicMock(return_value=False)
+            result = build_docker_image(env.id)
+
+        assert result["status"] == "success"
+        mock_reset.assert_called_once()
+        fresh.api.build.assert_called_once()
+
+
+class TestBroadcastQueue:
+    def test_burst_sent_in_order_with_one_wakeup(self):
+        sent = []
+
+        async def fake_broadcast(env_id, package_name, status, **extra):
+            sent.append((package_name, status))
+
+        loop = MagicMock()
+        loop.is_running.return_value = True
+        with patch("src.main._event_loop", loop), \
+             patch("src.websocket.manager.ws_manager.broadcast_package_status", fake_broadcast):
+            _broadcast_package_status(1, "a", "installing")
+            _broadcast_package_status(1, "b", "installing")
+            _broadcast_package_status(1, "a", "installed")
+
+        loop.call_soon_threadsafe.assert_called_once_with(_drain_broadcasts)
+
+        async def drain():
+            _drain_broadcasts()
+            await asyncio.gather(
+                *(t for t in asyncio.all_tasks() if t is not asyncio.current_task())
+            )
+
+        asyncio.run(drain())
+        assert sent == [("a", "installing"), ("b", "installing"), ("a", "installed")]
@@ -191,6 +191,17 @@ class TestGetUvPath:
         ):
             assert venv_utils.get_uv_path() == "/usr/local/bin/uv"
 
+    def test_which_result_reused(self):
+        with (
+            patch.object(venv_utils.settings, "UV_PATH", ""),
+            patch.object(
+                venv_utils.shutil, "which", return_value="/usr/local/bin/uv",
+            ) as mock_which,
+        ):
+            venv_utils.get_uv_path()
+            assert venv_utils.get_uv_path() == "/usr/local/bin/uv"
+        mock_which.assert_called_once()
+
     def test_not_found(self):
         with (
             patch.object(venv_utils.settings, "UV_PATH", ""),
@@ -281,6 +292,33 @@ class TestCheckRfbrowserInitialized:
             assert venv_utils.check_rfbrowser_initialized(str(venv)) is True
 
 
+class TestReadInstalledVersions:
+    def _dist(self, site, dirname, metadata):
+        dist_info = site / dirname
+        dist_info.mkdir(parents=True)
+        (dist_info / "METADATA").write_text(metadata)
+
+    def test_matches_normalized_names(self, tmp_path):
+        site = tmp_path / "lib" / "python3.12" / "site-packages"
+        self._dist(
+            site, "robotframework_browser-19.1.0.dist-info",
+            "Name: robotframework-browser\nVersion: 19.1.0\n",
+        )
+        self._dist(
+            site, "Robot.Framework.Extra-1.2.dist-info",
+            "Name: Robot.Framework.Extra\nVersion: 1.2\n",
+        )
+        with patch.object(venv_utils.sys, "platform", "linux"):
+            versions = venv_utils.read_installed_versions(
+                str(tmp_path), ["robotframework-browser", "robot_framework_extra", "missing"],
+            )
+        assert versions == {"robotframework-browser": "19.1.0", "robot_framework_extra": "1.2"}
+
+    def test_no_site_packages(self, tmp_path):
+        with patch.object(venv_utils.sys, "platform", "linux"):
+            assert venv_utils.read_installed_versions(str(tmp_path), ["robotframework"]) == {}
+
+
 class TestCheckPythonVersionCompatibility:
     def test_stable_version_no_warning(self):
         assert check_python_version_compatibility("3.12") is None
@@ -7,7 +7,7 @@ errors. Until this story none of that was covered.
 
 Strategy: mock the docker-py client and container objects. The
 runner's surface against docker-py is tiny (`images.get`,
-`images.pull`, `containers.run`, `container.logs`, `wait`, `stop`,
+`images.pull`, `containers.run`, `container.attach`, `wait`, `stop`,
 `kill`, `remove`) — easy to stub.
 """
 
@@ -139,9 +139,12 @@ class TestPrepare:
 
 
 class TestExecute:
-    def _make_container(self, *, exit_code: int = 0, log_chunks=None):
+    def _make_container(self, *, exit_code: int = 0, log_chunks=None, frames=None):
         container = MagicMock()
-        container.logs.return_value = iter(log_chunks or [b"line one\n", b"line two\n"])
+        if frames is None:
+            # demuxed attach yields (stdout, stderr) pairs
+            frames = [(c, None) for c in log_chunks or [b"line one\n", b"line two\n"]]
+        container.attach.return_value = iter(frames)
         container.wait.return_value = {"StatusCode": exit_code}
         return container
 
@@ -215,6 +218,50 @@ class TestExecute:
         )
         assert captured == ["first line", "second line", "third line"]
 
+    def test_full_log_streamed_to_disk_and_tail_kept_in_memory(self, tmp_path):
+        # "é" split across two chunks must still land intact in the file.
+        chunks = [f"line {i}\n".encode() for i in range(5)] + [b"caf\xc3", b"\xa9 end"]
+        container = self._make_container(exit_code=0, log_chunks=chunks)
+        client = self._make_client(container)
+        out = tmp_path / "out"
+        runner = DockerRunner(image="img:1")
+        runner._client = client
+
+        with patch("src.execution.runners.docker_runner.STDOUT_TAIL_LINES", 2):
+            result = runner.execute(
+                repo_path="/repo", target_path="x", output_dir=str(out),
+            )
+
+        expected = "".join(f"line {i}\n" for i in range(5)) + "café end"
+        assert (out / "stdout.log").read_text(encoding="utf-8") == expected
+        assert result.stdout == "line 3\nline 4\ncafé end"
+        assert not (out / "stderr.log").exists()
+
+    def test_stderr_demuxed_into_its_own_log(self, tmp_path):
+        container = self._make_container(
+            exit_code=1,
+            frames=[(b"PASS\n", None), (None, b"[ WARN ] deprecated\n"), (b"FAIL\n", None)],
+        )
+        client = self._make_client(container)
+        out = tmp_path / "out"
+        runner = DockerRunner(image="img:1")
+        runner._client = client
+
+        captured: list[str] = []
+        result = runner.execute(
+            repo_path="/repo", target_path="x", output_dir=str(out),
+            on_output=captured.append,
+        )
+
+        assert result.stdout == "PASS\nFAIL\n"
+        assert result.stderr == "[ WARN ] deprecated\n"
+        assert (out / "stderr.log").read_text(encoding="utf-8") == "[ WARN ] deprecated\n"
+        # The live view still shows both streams in arrival order.
+        assert captured == ["PASS", "[ WARN ] deprecated", "FAIL"]
+        container.attach.assert_called_once_with(
+            stdout=True, stderr=True, stream=True, logs=True, demux=True,
+        )
+
     def test_listeners_param_logs_warning_but_does_not_break(self, tmp_path, caplog):
         import logging
 
@@ -242,10 +289,10 @@ class TestExecute:
 
         # Generator that flips _cancelled after the first yield.
         def gen():
-            yield b"first\n"
+            yield b"first\n", None
             runner._cancelled = True   # noqa: F821 — closure binds below
-            yield b"never-seen\n"
-        container.logs.return_value = gen()
+            yield b"never-seen\n", None
+        container.attach.return_value = gen()
         container.wait.return_value = {"StatusCode": 0}
         client = MagicMock()
         client.containers.run.return_value = container
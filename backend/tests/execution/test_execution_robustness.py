@@ -139,7 +139,7 @@ def test_docker_timeout_flags_result_and_stops_container(tmp_path) -> None:
         def __init__(self):
             self.stopped = False
 
-        def logs(self, **kwargs):
+        def attach(self, **kwargs):
             return iter(())  # no output, then wait() times out
 
         def wait(self, **kwargs):
@@ -244,8 +244,9 @@ def test_docker_stdout_incremental_decode_no_multibyte_corruption(tmp_path) -> N
     captured: list[str] = []
 
     class _C:
-        def logs(self, **k):
-            return iter(chunks)
+        def attach(self, **k):
+            # demuxed attach yields (stdout, stderr) pairs
+            return iter((chunk, None) for chunk in chunks)
 
         def wait(self, **k):
             return {"StatusCode": 0}
@@ -96,6 +96,28 @@ class TestExecutionRuns:
         assert data["branch"] == "main"
         assert data["triggered_by"] == runner_user.id
         assert data["id"] is not None
+        assert data["task_id"] == "task-001"
+
+    @patch("src.execution.router.dispatch_task")
+    def test_create_run_dispatch_failure_marks_error(
+        self, mock_dispatch, client, runner_user, repo
+    ):
+        """POST /runs returns the run as ERROR when the executor rejects it."""
+        from src.task_executor import TaskDispatchError
+
+        mock_dispatch.side_effect = TaskDispatchError("queue full")
+
+        response = client.post(
+            "/api/v1/runs",
+            json=_run_payload(repo.id),
+            headers=auth_header(runner_user),
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["status"] == RunStatus.ERROR
+        assert data["task_id"] is None
+        assert "queue full" in data["error_message"]
 
     def test_create_run_as_viewer_forbidden(self, client, viewer_user, repo):
         """POST /runs with VIEWER role returns 403."""
@@ -378,6 +400,124 @@ class TestExecutionRuns:
         )
         assert response.status_code == 404
 
+    @patch("src.execution.tasks.cancel_active_run")
+    def test_cancel_all_runs(self, mock_cancel, client, db_session, runner_user, repo):
+        """POST /runs/cancel-all cancels pending/running runs in one statement."""
+        from src.execution.models import ExecutionRun
+
+        runs = [
+            ExecutionRun(
+                repository_id=repo.id, target_path="tests",
+                triggered_by=runner_user.id, status=run_status,
+            )
+            for run_status in (RunStatus.PENDING, RunStatus.RUNNING, RunStatus.PASSED)
+        ]
+        db_session.add_all(runs)
+        db_session.flush()
+
+        response = client.post("/api/v1/runs/cancel-all", headers=auth_header(runner_user))
+
+        assert response.status_code == 200
+        assert response.json() == {"cancelled": 2}
+        assert sorted(c.args[0] for c in mock_cancel.call_args_list) == [runs[0].id, runs[1].id]
+        for run in runs:
+            db_session.refresh(run)
+        assert [r.status for r in runs] == [
+            RunStatus.CANCELLED, RunStatus.CANCELLED, RunStatus.PASSED,
+        ]
+        assert runs[0].finished_at is not None
+
+    def test_get_run_output_streams_log_file(
+        self, client, db_session, runner_user, repo, tmp_path
+    ):
+        """GET /runs/{run_id}/output serves the log file as text."""
+        from src.execution.models import ExecutionRun
+
+        (tmp_path / "stdout.log").write_text("line 1\nline 2\n", encoding="utf-8")
+        run = ExecutionRun(
+            repository_id=repo.id, target_path="tests",
+            triggered_by=runner_user.id, output_dir=str(tmp_path),
+        )
+        db_session.add(run)
+        db_session.flush()
+
+        response = client.get(f"/api/v1/runs/{run.id}/output", headers=auth_header(runner_user))
+        assert response.status_code == 200
+        assert response.text == "line 1\nline 2\n"
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.headers["content-length"] == "14"
+
+        missing = client.get(
+            f"/api/v1/runs/{run.id}/output",
+            params={"stream": "stderr"},
+            headers=auth_header(runner_user),
+        )
+        assert missing.status_code == 200
+        assert missing.text == ""
+
+    def test_get_run_output_tail_via_range(
+        self, client, db_session, runner_user, repo, tmp_path
+    ):
+        """Range requests return only the bytes after the given offset."""
+        from src.execution.models import ExecutionRun
+
+        (tmp_path / "stdout.log").write_text("line 1\nline 2\n", encoding="utf-8")
+        run = ExecutionRun(
+            repository_id=repo.id, target_path="tests",
+            triggered_by=runner_user.id, output_dir=str(tmp_path),
+        )
+        db_session.add(run)
+        db_session.flush()
+        url = f"/api/v1/runs/{run.id}/output"
+
+        head = client.head(url, headers=auth_header(runner_user))
+        assert head.status_code == 200
+        assert head.headers["content-length"] == "14"
+        assert head.content == b""
+
+        tail = client.get(url, headers={**auth_header(runner_user), "Range": "bytes=7-"})
+        assert tail.status_code == 206
+        assert tail.text == "line 2\n"
+        assert tail.headers["content-range"] == "bytes 7-13/14"
+
+        past_end = client.get(url, headers={**auth_header(runner_user), "Range": "bytes=14-"})
+        assert past_end.status_code == 416
+        assert past_end.headers["content-range"] == "bytes */14"
+
+    def test_get_run_output_ignores_bytes_appended_mid_response(
+        self, client, db_session, runner_user, repo, tmp_path, monkeypatch
+    ):
+        """A log that grows while it is sent is cut at the size taken up front."""
+        from src.execution import router as execution_router
+        from src.execution.models import ExecutionRun
+
+        log_file = tmp_path / "stdout.log"
+        log_file.write_text("line 1\nline 2\n", encoding="utf-8")
+        run = ExecutionRun(
+            repository_id=repo.id, target_path="tests",
+            triggered_by=runner_user.id, output_dir=str(tmp_path),
+        )
+        db_session.add(run)
+        db_session.flush()
+
+        real_iter = execution_router._iter_log_bytes
+
+        def appending_iter(path, start, length):
+            for i, chunk in enumerate(real_iter(path, start, length)):
+                if i == 0:
+                    with open(path, "ab") as fh:
+                        fh.write(b"line 3\n")
+                yield chunk
+
+        monkeypatch.setattr(execution_router, "_OUTPUT_CHUNK_SIZE", 4)
+        monkeypatch.setattr(execution_router, "_iter_log_bytes", appending_iter)
+
+        response = client.get(f"/api/v1/runs/{run.id}/output", headers=auth_header(runner_user))
+        assert response.status_code == 200
+        assert response.headers["content-length"] == "14"
+        assert response.text == "line 1\nline 2\n"
+        assert log_file.read_text(encoding="utf-8").endswith("line 3\n")
+
 
 # ---------------------------------------------------------------------------
 # Pending-run activity (Story EXEC-1)
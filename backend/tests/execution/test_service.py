@@ -1,6 +1,8 @@
 """Tests for execution service: run management and scheduling."""
 
 import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import StatementError
 from sqlalchemy.orm import Session
 
 from src.auth.constants import Role
@@ -143,11 +145,29 @@ class TestCreateRun:
         assert run.branch == "develop"
         assert run.tags_include == "smoke"
         assert run.tags_exclude == "slow"
-        assert run.variables is not None  # JSON-serialised
+        assert run.variables == {"ENV": "staging"}
         assert run.parallel is True
         assert run.max_retries == 3
         assert run.timeout_seconds == 7200
 
+    def test_enum_columns_round_trip_as_members(self, db_session, user, repo):
+        run = create_run(db_session, _run_create(repo.id), user.id)
+        db_session.expire(run)
+
+        assert run.status is RunStatus.PENDING
+        assert run.runner_type is RunnerType.SUBPROCESS
+        stored = db_session.execute(
+            text("SELECT status FROM execution_runs WHERE id = :id"), {"id": run.id}
+        ).scalar()
+        assert stored == "pending"
+
+    def test_unknown_status_is_rejected(self, db_session, user, repo):
+        run = create_run(db_session, _run_create(repo.id), user.id)
+        run.status = "bogus"
+        with pytest.raises(StatementError):
+            db_session.flush()
+        db_session.rollback()
+
 
 class TestGetRun:
     def test_get_run_found(self, db_session, user, repo):
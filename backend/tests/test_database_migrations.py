@@ -0,0 +1,202 @@
+"""Tests for the lightweight startup migrations in `src.database`."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src import database
+from src.database import Base
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    """A file-backed SQLite engine with the current schema, swapped in
+    as `src.database.engine` for the duration of the test."""
+    eng = create_engine(f"sqlite:///{tmp_path / 'mig.db'}")
+    Base.metadata.create_all(eng)
+    monkeypatch.setattr(database, "engine", eng)
+    yield eng
+    eng.dispose()
+
+
+def _user_version(eng) -> int:
+    with eng.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def test_run_migrations_records_schema_version(sqlite_engine):
+    assert _user_version(sqlite_engine) == 0
+    database._run_migrations()
+    assert _user_version(sqlite_engine) == database.CURRENT_SCHEMA_VERSION
+
+
+def test_run_migrations_skips_when_current(sqlite_engine, monkeypatch):
+    database._run_migrations()
+    monkeypatch.setattr(
+        database, "_migrate_sqlite",
+        lambda conn: pytest.fail("migrations must be skipped at current version"),
+    )
+    database._run_migrations()
+
+
+def test_sqlite_migration_adds_only_missing_columns(sqlite_engine):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("ALTER TABLE environment_packages DROP COLUMN install_error"))
+        conn.execute(text("ALTER TABLE users DROP COLUMN password_change_required"))
+
+    database._run_migrations()
+
+    with sqlite_engine.connect() as conn:
+        pkg_cols = {r[1] for r in conn.execute(text("PRAGMA table_info(environment_packages)"))}
+        user_cols = {r[1] for r in conn.execute(text("PRAGMA table_info(users)"))}
+    assert "install_error" in pkg_cols
+    assert "password_change_required" in user_cols
+
+
+_LEGACY_REPOSITORIES = (
+    "CREATE TABLE repositories ("
+    "  id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    "  name VARCHAR(255) UNIQUE NOT NULL,"
+    "  git_url VARCHAR(500) NOT NULL,"
+    "  default_branch VARCHAR(100) DEFAULT 'main',"
+    "  local_path VARCHAR(500) NOT NULL,"
+    "  last_synced_at DATETIME,"
+    "  auto_sync BOOLEAN DEFAULT 1,"
+    "  sync_interval_minutes INTEGER DEFAULT 15,"
+    "  created_by INTEGER NOT NULL REFERENCES users(id),"
+    "  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,"
+    "  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP"
+    ")"
+)
+
+
+def test_sqlite_migration_relaxes_legacy_git_url_in_place(sqlite_engine):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("DROP TABLE repositories"))
+        conn.execute(text(_LEGACY_REPOSITORIES))
+        conn.execute(text(
+            "INSERT INTO repositories (name, git_url, local_path, created_by) "
+            "VALUES ('legacy', 'https://example.com/r.git', '/tmp/r', 1)"
+        ))
+
+    database._run_migrations()
+
+    with sqlite_engine.begin() as conn:
+        info = {r[1]: r for r in conn.execute(text("PRAGMA table_info(repositories)"))}
+        assert info["git_url"][3] == 0
+        assert conn.execute(text(
+            "SELECT name, repo_type FROM repositories"
+        )).one() == ("legacy", "git")
+        assert conn.execute(text("PRAGMA integrity_check")).scalar() == "ok"
+        conn.execute(text(
+            "INSERT INTO repositories (name, git_url, local_path, created_by) "
+            "VALUES ('local', NULL, '/tmp/l', 1)"
+        ))
+
+
+def test_sqlite_rejected_schema_edit_falls_back_to_rebuild(sqlite_engine, monkeypatch):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("DROP TABLE repositories"))
+        conn.execute(text(_LEGACY_REPOSITORIES))
+        conn.execute(text(
+            "INSERT INTO repositories (name, git_url, local_path, created_by) "
+            "VALUES ('legacy', 'https://example.com/r.git', '/tmp/r', 1)"
+        ))
+    # Stand-in for a SQLite build that refuses writes to sqlite_master
+    monkeypatch.setattr(
+        database, "_SQLITE_SET_REPO_TABLE_SQL", text("UPDATE no_such_table SET sql = :sql"),
+    )
+
+    database._run_migrations()
+
+    with sqlite_engine.connect() as conn:
+        info = {r[1]: r for r in conn.execute(text("PRAGMA table_info(repositories)"))}
+        assert conn.execute(text(
+            "SELECT name, repo_type FROM repositories"
+        )).one() == ("legacy", "git")
+    assert info["git_url"][3] == 0
+
+
+def test_sqlite_rebuild_fallback_copies_all_rows_in_batches(sqlite_engine, monkeypatch):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("DROP TABLE repositories"))
+        conn.execute(text(_LEGACY_REPOSITORIES))
+        for repo_id in (1, 2, 7, 12):
+            conn.execute(text(
+                "INSERT INTO repositories (id, name, git_url, local_path, created_by) "
+                "VALUES (:id, :name, 'https://example.com/r.git', '/tmp/r', 1)"
+            ), {"id": repo_id, "name": f"repo-{repo_id}"})
+    monkeypatch.setattr(database, "_sqlite_relax_git_url_in_place", lambda conn: False)
+    monkeypatch.setattr(database, "_REBUILD_BATCH_SIZE", 5)
+
+    database._run_migrations()
+
+    with sqlite_engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, repo_type FROM repositories ORDER BY id")).all()
+        info = {r[1]: r for r in conn.execute(text("PRAGMA table_info(repositories)"))}
+    assert rows == [(1, "git"), (2, "git"), (7, "git"), (12, "git")]
+    assert info["git_url"][3] == 0
+
+
+def _env_pkg_indexes(conn) -> list[str]:
+    return [r[1] for r in conn.execute(text("PRAGMA index_list(environment_packages)"))]
+
+
+def test_sqlite_migration_keeps_existing_env_pkg_unique_constraint(sqlite_engine):
+    database._run_migrations()
+
+    with sqlite_engine.connect() as conn:
+        assert "ix_envpkg_env_name" not in _env_pkg_indexes(conn)
+
+
+def test_sqlite_migration_adds_env_pkg_unique_index_for_legacy_table(sqlite_engine):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("DROP TABLE environment_packages"))
+        conn.execute(text(
+            "CREATE TABLE environment_packages ("
+            "  id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            "  environment_id INTEGER NOT NULL,"
+            "  package_name VARCHAR(255) NOT NULL,"
+            "  version VARCHAR(50),"
+            "  installed_version VARCHAR(50),"
+            "  install_status VARCHAR(20),"
+            "  install_error TEXT"
+            ")"
+        ))
+        conn.execute(text(
+            "INSERT INTO environment_packages (id, environment_id, package_name) "
+            "VALUES (1, 1, 'requests'), (2, 1, 'requests'), (3, 1, 'robotframework')"
+        ))
+
+    database._run_migrations()
+
+    with sqlite_engine.connect() as conn:
+        assert "ix_envpkg_env_name" in _env_pkg_indexes(conn)
+        ids = conn.execute(text("SELECT id FROM environment_packages ORDER BY id")).scalars().all()
+    assert ids == [2, 3]
+
+
+def test_run_migrations_releases_write_lock(sqlite_engine):
+    database._run_migrations()  # migrates
+    database._run_migrations()  # fast path
+
+    other = sqlite3.connect(sqlite_engine.url.database, timeout=0)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+    finally:
+        other.close()
+
+
+def test_migration_adds_run_schedule_index(sqlite_engine):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_runs_schedule_status"))
+
+    database._run_migrations()
+
+    with sqlite_engine.connect() as conn:
+        indexes = [r[1] for r in conn.execute(text("PRAGMA index_list(execution_runs)"))]
+    assert "ix_runs_schedule_status" in indexes
@@ -108,6 +108,57 @@ class TestGetDockerClient:
                 get_docker_client()
 
 
+def _drop_cached_client():
+    """Drop the cached client but keep the discovered context host."""
+    import src.docker_client as docker_client
+
+    docker_client._cached_client = None
+
+
+class TestClientCache:
+    def test_client_reused_between_calls(self):
+        import docker as docker_module
+
+        stub_client = MagicMock(name="docker_client")
+        with patch.object(docker_module, "from_env", return_value=stub_client) as mock_from_env:
+            assert get_docker_client() is stub_client
+            assert get_docker_client() is stub_client
+
+        mock_from_env.assert_called_once()
+        stub_client.ping.assert_called_once()
+
+    def test_stale_client_repinged_and_replaced_when_dead(self):
+        import docker as docker_module
+
+        dead = MagicMock(name="dead_client")
+        fresh = MagicMock(name="fresh_client")
+        with patch.object(docker_module, "from_env", side_effect=[dead, fresh]), \
+             patch("src.docker_client.time.monotonic", side_effect=[0.0, 1000.0]):
+            assert get_docker_client() is dead
+            dead.ping.side_effect = RuntimeError("daemon restarted")
+            assert get_docker_client() is fresh
+
+    def test_context_host_discovered_once(self):
+        import json
+
+        import docker as docker_module
+
+        ctx_payload = json.dumps([
+            {"Endpoints": {"docker": {"Host": "unix:///custom/docker.sock"}}},
+        ])
+        with patch.object(docker_module, "from_env", side_effect=RuntimeError("no env")), \
+             patch.object(docker_module, "DockerClient", return_value=MagicMock()), \
+             patch(
+                 "src.docker_client.subprocess.check_output",
+                 return_value=ctx_payload,
+             ) as mock_subprocess:
+            get_docker_client()
+            _drop_cached_client()
+            get_docker_client()
+
+        mock_subprocess.assert_called_once()
+
+
 class TestResolveContextHost:
     def test_returns_none_on_missing_cli(self):
         with patch(
@@ -96,3 +96,22 @@ def test_none_content_renders_as_empty_object_or_null() -> None:
     """Sanity: subclass must not break the parent's None handling."""
     body = _render(None)
     assert body == b"null"
+
+
+def test_int_dict_keys_render_as_strings() -> None:
+    """`MeResponse.effective_roles_by_repo` is keyed by repo id — the
+    body must stay valid JSON whichever serializer backs `render`."""
+    body = _render({"effective_roles_by_repo": {3: "editor"}})
+    assert body == b'{"effective_roles_by_repo":{"3":"editor"}}'
+
+
+def test_nan_and_infinity_render_as_null() -> None:
+    body = _render({"a": float("nan"), "b": float("inf"), "c": float("-inf")})
+    assert body == b'{"a":null,"b":null,"c":null}'
+
+
+def test_integers_beyond_64_bits_fall_back_to_stdlib() -> None:
+    big = 2**64 + 1
+    body = _render({"n": big, "at": "2026-04-29T07:58:04"})
+    assert body == b'{"n":18446744073709551617,"at":"2026-04-29T07:58:04Z"}'
+